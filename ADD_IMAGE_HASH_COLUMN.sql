@@ -0,0 +1,17 @@
+-- Add image_hash column to reports table
+-- Holds the keyed hash (HMAC-SHA256) of the uploaded image, which is also its storage object name
+-- Run this in your Supabase SQL Editor
+
+ALTER TABLE public.reports 
+ADD COLUMN IF NOT EXISTS image_hash TEXT;
+
+-- Find every report sharing an image
+CREATE INDEX IF NOT EXISTS reports_image_hash_idx 
+ON public.reports (image_hash) 
+WHERE image_hash IS NOT NULL;
+
+-- Verify the column was added
+SELECT column_name, data_type 
+FROM information_schema.columns 
+WHERE table_name = 'reports' 
+ORDER BY ordinal_position;
@@ -0,0 +1,111 @@
+-- Archive table for reports moved out of the reports table
+-- The archive_reports management command moves archived and aged reports here,
+-- so the dashboard, statistics and search only work through current reports.
+-- Run this in your Supabase SQL Editor, after ADD_THUMBNAIL_COLUMN.sql,
+-- ADD_USERNAME_COLUMN.sql, ADD_IMAGE_HASH_COLUMN.sql and ADD_UPDATED_AT_COLUMN.sql
+-- The table and functions are only open to service_role: the app reaches them
+-- with SUPABASE_SERVICE_KEY, never with the anon key that browsers may see.
+
+CREATE TABLE IF NOT EXISTS public.reports_archive (
+    id UUID PRIMARY KEY,
+    description TEXT NOT NULL,
+    category TEXT,
+    location TEXT,
+    username TEXT,
+    image_url TEXT,
+    thumbnail_url TEXT,
+    image_hash TEXT,
+    status TEXT,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    archived_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+
+-- The archive view of the dashboard pages through (created_at, id) like the reports table
+CREATE INDEX IF NOT EXISTS reports_archive_created_at_id_idx
+ON public.reports_archive (created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS reports_archive_status_created_at_idx
+ON public.reports_archive (status, created_at DESC, id DESC);
+
+-- No policies: with RLS on, anon and authenticated see nothing; service_role bypasses RLS
+ALTER TABLE public.reports_archive ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Enable read for public" ON public.reports_archive;
+REVOKE ALL ON public.reports_archive FROM PUBLIC, anon, authenticated;
+-- The functions run with the caller's rights, so service_role needs to write too
+GRANT SELECT, INSERT, UPDATE, DELETE ON public.reports_archive TO service_role;
+
+-- Move up to max_rows reports created before created_before, with one of the
+-- statuses (any status when NULL), into the archive, oldest first. Deleting and
+-- inserting in one statement means a report is never in both tables or neither.
+CREATE OR REPLACE FUNCTION public.archive_reports(
+    statuses text[],
+    created_before timestamptz,
+    max_rows integer DEFAULT 500
+)
+RETURNS SETOF public.reports_archive
+LANGUAGE sql
+SET search_path = public
+AS $$
+    WITH moved AS (
+        DELETE FROM public.reports
+        WHERE id IN (
+            SELECT id FROM public.reports
+            WHERE created_at < created_before
+              AND (statuses IS NULL OR status = ANY(statuses))
+            ORDER BY created_at
+            LIMIT max_rows
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, description, category, location, username, image_url, thumbnail_url, image_hash,
+                  status, created_at, updated_at
+    )
+    INSERT INTO public.reports_archive (id, description, category, location, username, image_url,
+                                        thumbnail_url, image_hash, status, created_at, updated_at)
+    SELECT * FROM moved
+    ON CONFLICT (id) DO UPDATE SET
+        description = EXCLUDED.description,
+        category = EXCLUDED.category,
+        location = EXCLUDED.location,
+        username = EXCLUDED.username,
+        image_url = EXCLUDED.image_url,
+        thumbnail_url = EXCLUDED.thumbnail_url,
+        image_hash = EXCLUDED.image_hash,
+        status = EXCLUDED.status,
+        created_at = EXCLUDED.created_at,
+        updated_at = EXCLUDED.updated_at,
+        archived_at = now()
+    RETURNING *;
+$$;
+
+-- Move archived reports back into the reports table; reports whose ID is
+-- already there stay in the archive. updated_at is set so that read replicas
+-- pick the restored reports up.
+CREATE OR REPLACE FUNCTION public.restore_archived_reports(report_ids uuid[])
+RETURNS SETOF public.reports
+LANGUAGE sql
+SET search_path = public
+AS $$
+    WITH moved AS (
+        DELETE FROM public.reports_archive a
+        WHERE a.id = ANY(report_ids)
+          AND NOT EXISTS (SELECT 1 FROM public.reports r WHERE r.id = a.id)
+        RETURNING id, description, category, location, username, image_url, thumbnail_url, image_hash,
+                  status, created_at
+    )
+    INSERT INTO public.reports (id, description, category, location, username, image_url,
+                                thumbnail_url, image_hash, status, created_at, updated_at)
+    SELECT *, now() FROM moved
+    RETURNING *;
+$$;
+
+-- Functions are executable by PUBLIC by default, and Supabase also grants anon and
+-- authenticated; both would let anyone holding the anon key delete reports
+REVOKE EXECUTE ON FUNCTION public.archive_reports(text[], timestamptz, integer) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.restore_archived_reports(uuid[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.archive_reports(text[], timestamptz, integer) TO service_role;
+GRANT EXECUTE ON FUNCTION public.restore_archived_reports(uuid[]) TO service_role;
+
+-- Verify the table was created
+SELECT count(*) FROM public.reports_archive;
@@ -0,0 +1,18 @@
+-- Indexes backing the paginated admin dashboard
+-- Run this in your Supabase SQL Editor
+
+-- Keyset pagination orders by (created_at, id) newest first
+CREATE INDEX IF NOT EXISTS reports_created_at_id_idx
+ON public.reports (created_at DESC, id DESC);
+
+-- Dashboard filters
+CREATE INDEX IF NOT EXISTS reports_status_created_at_idx
+ON public.reports (status, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS reports_category_created_at_idx
+ON public.reports (category, created_at DESC, id DESC);
+
+-- Verify the indexes were created
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE tablename = 'reports';
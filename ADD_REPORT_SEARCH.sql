@@ -0,0 +1,31 @@
+-- Full-text search over report descriptions and locations
+-- Run this in your Supabase SQL Editor
+
+-- Descriptions rank above locations
+ALTER TABLE public.reports
+ADD COLUMN IF NOT EXISTS search_vector tsvector
+GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(description, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(location, '')), 'B')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS reports_search_vector_idx
+ON public.reports USING GIN (search_vector);
+
+-- Matching reports, best match first
+-- Accepts web search syntax: quoted phrases, "or", and -excluded words
+CREATE OR REPLACE FUNCTION public.search_reports(search_query text)
+RETURNS SETOF public.reports
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT r.*
+    FROM public.reports r, websearch_to_tsquery('english', search_query) q
+    WHERE r.search_vector @@ q
+    ORDER BY ts_rank_cd(r.search_vector, q) DESC, r.created_at DESC;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.search_reports(text) TO anon, authenticated;
+
+-- Verify the function works
+SELECT id, description FROM public.search_reports('broken light') LIMIT 5;
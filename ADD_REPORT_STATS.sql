@@ -0,0 +1,34 @@
+-- Aggregated report statistics for the admin dashboard
+-- Run this in your Supabase SQL Editor
+
+CREATE OR REPLACE FUNCTION public.report_stats(days_back integer DEFAULT 14)
+RETURNS json
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT json_build_object(
+        'total', (SELECT count(*) FROM public.reports),
+        'by_status', (
+            SELECT coalesce(json_object_agg(status, n), '{}'::json)
+            FROM (SELECT status, count(*) AS n FROM public.reports GROUP BY status) s
+        ),
+        'by_category', (
+            SELECT coalesce(json_object_agg(coalesce(category, 'uncategorized'), n), '{}'::json)
+            FROM (SELECT category, count(*) AS n FROM public.reports GROUP BY category) c
+        ),
+        'by_day', (
+            SELECT coalesce(json_agg(json_build_object('day', day, 'count', n) ORDER BY day), '[]'::json)
+            FROM (
+                SELECT created_at::date AS day, count(*) AS n
+                FROM public.reports
+                WHERE created_at >= current_date - (days_back - 1)
+                GROUP BY 1
+            ) d
+        )
+    );
+$$;
+
+GRANT EXECUTE ON FUNCTION public.report_stats(integer) TO anon, authenticated;
+
+-- Verify the function works
+SELECT public.report_stats(14);
@@ -0,0 +1,35 @@
+-- Add updated_at column to reports table
+-- Lets the local read replica (sync_replica command) pick up status changes,
+-- not just new reports
+-- Run this in your Supabase SQL Editor
+
+ALTER TABLE public.reports 
+ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT now();
+
+UPDATE public.reports SET updated_at = created_at WHERE updated_at IS NULL;
+
+-- Keep it current on every update
+CREATE OR REPLACE FUNCTION public.set_reports_updated_at()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.updated_at := now();
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS reports_set_updated_at ON public.reports;
+CREATE TRIGGER reports_set_updated_at
+BEFORE UPDATE ON public.reports
+FOR EACH ROW EXECUTE FUNCTION public.set_reports_updated_at();
+
+-- Incremental syncs page through changes in (updated_at, id) order
+CREATE INDEX IF NOT EXISTS reports_updated_at_id_idx 
+ON public.reports (updated_at, id);
+
+-- Verify the column was added
+SELECT column_name, data_type 
+FROM information_schema.columns 
+WHERE table_name = 'reports' 
+ORDER BY ordinal_position;
@@ -0,0 +1,238 @@
+"""
+Async views for admin panel
+
+Used instead of the views in views.py when ASYNC_VIEWS is enabled, so that an
+ASGI server can keep many Supabase calls in flight on one event loop.
+"""
+
+import time
+import asyncio
+import logging
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.shortcuts import render
+from django.http import HttpResponse, JsonResponse
+from core.decorators import async_require_http_methods
+from reports import events
+from reports.async_supabase_client import aget_supabase_client
+from reports.replica import aget_report_reader
+from .decorators import async_admin_required
+from .views import (
+    MAX_BULK_IDS, SSE_KEEPALIVE, SSE_KEEPALIVE_INTERVAL, SSE_RETRY_MS, VALID_STATUSES, bulk_report_ids,
+    dashboard_context, dashboard_query, events_start, events_stream_response, not_modified, page_validators,
+    set_validators, sse_message,
+)
+
+logger = logging.getLogger(__name__)
+
+@async_admin_required
+@async_require_http_methods(["GET"])
+async def admin_dashboard(request):
+    """
+    Display one page of reports in a table, filtered or searched by the query string.
+    With archive=1, the archived reports are listed instead, without statistics.
+    Answers 304 Not Modified when the browser's copy is still current.
+    """
+    try:
+        filter_form, params = dashboard_query(request)
+        
+        if params.get('archived'):
+            # The archive is only kept in Supabase, not in the replica or search index
+            supabase = await aget_supabase_client()
+            page, stats = await supabase.list_reports(**params), None
+        else:
+            supabase = await aget_report_reader()
+            search_text = filter_form.search_text()
+            if search_text:
+                page_request = supabase.search_reports(search_text, params['page_size'], **filter_form.filters())
+            else:
+                page_request = supabase.list_reports(**params)
+            page, stats = await asyncio.gather(page_request, supabase.get_report_stats())
+        
+        # Both read the report cache (and the event log), which may be Redis
+        context = await sync_to_async(dashboard_context, thread_sensitive=False)(
+            request, filter_form, params, page, stats,
+        )
+        etag, last_modified = await sync_to_async(page_validators, thread_sensitive=False)(
+            request, 'admin_dashboard.html',
+            [page, context['stats'], context['supabase_unavailable'], context['query_string'],
+             context['live_updates']],
+            page['reports'], supabase.cache,
+        )
+        response = not_modified(request, etag, last_modified)
+        if response:
+            return response
+        return set_validators(render(request, 'admin_dashboard.html', context), etag, last_modified)
+    except ValueError as e:
+        # Configuration error (missing credentials)
+        logger.error("Configuration error: %s", e)
+        return render(request, 'supabase_error.html')
+    except Exception as e:
+        # Connection or other errors
+        logger.error("Dashboard error: %s", e, exc_info=True)
+        return render(request, 'supabase_error.html')
+
+@async_admin_required
+@async_require_http_methods(["GET"])
+async def report_detail(request, report_id):
+    """
+    Display details of a single report, looking in the archive if it is not current.
+    Answers 304 Not Modified when the browser's copy is still current.
+    """
+    supabase = await aget_report_reader()
+    report = await supabase.get_report(report_id)
+    archived = False
+    if not report:
+        report = await (await aget_supabase_client()).get_archived_report(report_id)
+        archived = report is not None
+    
+    if not report:
+        return render(request, '404.html', {'message': 'Report not found'}, status=404)
+    
+    etag, last_modified = await sync_to_async(page_validators, thread_sensitive=False)(
+        request, 'report_detail.html', report, [report], supabase.cache,
+    )
+    response = not_modified(request, etag, last_modified)
+    if response:
+        return response
+    
+    context = {
+        'report': report,
+        'archived': archived,
+    }
+    return set_validators(render(request, 'report_detail.html', context), etag, last_modified)
+
+@async_admin_required
+@async_require_http_methods(["POST"])
+async def update_report_status(request, report_id):
+    """
+    Update report status (AJAX endpoint)
+    """
+    status = request.POST.get('status', '').strip()
+    
+    if status not in VALID_STATUSES:
+        logger.warning("Invalid status update attempt: %s", status)
+        return HttpResponse('Invalid status', status=400)
+    
+    supabase = await aget_supabase_client()
+    updated = await supabase.update_report_status(report_id, status)
+    
+    if updated:
+        logger.info("Report %s status updated to %s by %s", report_id, status, request.user.username)
+        return HttpResponse('OK', status=200)
+    else:
+        logger.error("Failed to update report %s status", report_id)
+        return HttpResponse('Failed to update', status=500)
+
+@async_admin_required
+@async_require_http_methods(["POST"])
+async def delete_report(request, report_id):
+    """
+    Delete a report (AJAX endpoint)
+    """
+    supabase = await aget_supabase_client()
+    deleted = await supabase.delete_report(report_id)
+    
+    if deleted:
+        logger.info("Report %s deleted by %s", report_id, request.user.username)
+        return HttpResponse('OK', status=200)
+    else:
+        logger.error("Failed to delete report %s", report_id)
+        return HttpResponse('Failed to delete', status=500)
+
+@async_admin_required
+@async_require_http_methods(["POST"])
+async def bulk_update_status(request):
+    """
+    Update the status of the selected reports (AJAX endpoint)
+    """
+    status = request.POST.get('status', '').strip()
+    
+    if status not in VALID_STATUSES:
+        logger.warning("Invalid bulk status update attempt: %s", status)
+        return HttpResponse('Invalid status', status=400)
+    
+    report_ids = bulk_report_ids(request)
+    if report_ids is None:
+        return HttpResponse(f'Select between 1 and {MAX_BULK_IDS} reports', status=400)
+    
+    supabase = await aget_supabase_client()
+    updated = await supabase.update_reports_status(report_ids, status)
+    
+    if updated is None:
+        logger.error("Failed to update status of %s reports", len(report_ids))
+        return HttpResponse('Failed to update', status=500)
+    
+    logger.info("%s reports status updated to %s by %s", updated, status, request.user.username)
+    return JsonResponse({'updated': updated})
+
+@async_admin_required
+@async_require_http_methods(["POST"])
+async def bulk_delete(request):
+    """
+    Delete the selected reports (AJAX endpoint)
+    """
+    report_ids = bulk_report_ids(request)
+    if report_ids is None:
+        return HttpResponse(f'Select between 1 and {MAX_BULK_IDS} reports', status=400)
+    
+    supabase = await aget_supabase_client()
+    deleted = await supabase.delete_reports(report_ids)
+    
+    if deleted is None:
+        logger.error("Failed to delete %s reports", len(report_ids))
+        return HttpResponse('Failed to delete', status=500)
+    
+    logger.info("%s reports deleted by %s", deleted, request.user.username)
+    return JsonResponse({'deleted': deleted})
+
+@async_admin_required
+@async_require_http_methods(["POST"])
+async def bulk_restore(request):
+    """
+    Move the selected reports from the archive back to current reports (AJAX endpoint)
+    """
+    report_ids = bulk_report_ids(request)
+    if report_ids is None:
+        return HttpResponse(f'Select between 1 and {MAX_BULK_IDS} reports', status=400)
+    
+    supabase = await aget_supabase_client()
+    restored = await supabase.restore_reports(report_ids)
+    
+    if restored is None:
+        logger.error("Failed to restore %s reports", len(report_ids))
+        return HttpResponse('Failed to restore', status=500)
+    
+    logger.info("%s reports restored by %s", restored, request.user.username)
+    return JsonResponse({'restored': restored})
+
+async def _event_stream(after):
+    """
+    Yield server-sent events for changes after the given event ID, polling the
+    event log until REPORT_EVENTS_STREAM_TIMEOUT; the browser then reconnects
+    with Last-Event-ID.
+    """
+    yield f'retry: {SSE_RETRY_MS}\n\n'
+    read = sync_to_async(events.read, thread_sensitive=False)
+    now = last_sent = time.monotonic()
+    deadline = now + settings.REPORT_EVENTS_STREAM_TIMEOUT
+    while now < deadline:
+        new_events, after = await read(after)
+        for event in new_events:
+            yield sse_message(event)
+        if new_events:
+            last_sent = now
+        elif now - last_sent >= SSE_KEEPALIVE_INTERVAL:
+            yield SSE_KEEPALIVE
+            last_sent = now
+        await asyncio.sleep(settings.REPORT_EVENTS_POLL_INTERVAL)
+        now = time.monotonic()
+
+@async_admin_required
+@async_require_http_methods(["GET"])
+async def report_events(request):
+    """
+    Stream report changes to an open dashboard as server-sent events
+    """
+    after = await sync_to_async(events_start, thread_sensitive=False)(request)
+    return events_stream_response(_event_stream(after))
@@ -2,9 +2,13 @@
 Decorators for admin panel authentication
 """
 
+import hmac
 from functools import wraps
-from django.shortcuts import redirect
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.shortcuts import redirect, resolve_url
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 
 def admin_required(view_func):
     """
@@ -17,3 +21,34 @@ def admin_required(view_func):
             return redirect('admin_login')
         return view_func(request, *args, **kwargs)
     return wrapper
+
+def async_admin_required(view_func):
+    """
+    Decorator to require admin authentication on async views
+    """
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        # Resolve the lazy user (a session and database lookup) off the event loop
+        user = await sync_to_async(lambda: request.user if request.user.is_authenticated else None)()
+        if user is None:
+            return redirect_to_login(request.get_full_path(), resolve_url('admin_login'))
+        if not user.is_staff:
+            return redirect('admin_login')
+        return await view_func(request, *args, **kwargs)
+    return wrapper
+
+def metrics_access_required(view_func):
+    """
+    Decorator allowing either an admin session or, for scrapers,
+    an "Authorization: Bearer <METRICS_TOKEN>" header
+    """
+    admin_view = admin_required(view_func)
+    
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        token = settings.METRICS_TOKEN
+        authorization = request.headers.get('Authorization', '')
+        if token and hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode()):
+            return view_func(request, *args, **kwargs)
+        return admin_view(request, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,81 @@
+"""
+Forms for admin panel
+"""
+
+from django import forms
+from django.core.exceptions import ValidationError
+from reports.forms import ReportForm
+
+STATUS_CHOICES = [
+    ('new', 'New'),
+    ('reviewed', 'Reviewed'),
+    ('archived', 'Archived'),
+]
+
+
+class ReportFilterForm(forms.Form):
+    """Query-string filters for the dashboard listing"""
+    q = forms.CharField(
+        max_length=200,
+        required=False,
+        widget=forms.TextInput(attrs={
+            'type': 'search',
+            'class': 'form-control form-control-sm',
+            'placeholder': 'Description or location',
+        })
+    )
+    
+    status = forms.ChoiceField(
+        choices=[('', 'All statuses')] + STATUS_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select form-select-sm'})
+    )
+    
+    category = forms.ChoiceField(
+        choices=[('', 'All categories')] + ReportForm.base_fields['category'].choices[1:],
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select form-select-sm'})
+    )
+    
+    date_from = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control form-control-sm'})
+    )
+    
+    date_to = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control form-control-sm'})
+    )
+    
+    # List the reports_archive table instead of current reports
+    archive = forms.BooleanField(required=False, widget=forms.HiddenInput)
+    
+    def clean(self):
+        """Validate the date range"""
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise ValidationError('Start date must be before end date')
+        return cleaned_data
+    
+    def archived(self):
+        """Return whether the archive is being listed"""
+        return self.is_valid() and self.cleaned_data.get('archive', False)
+    
+    def search_text(self):
+        """Return the search text, or None when not searching (the archive is not searchable)"""
+        if not self.is_valid() or self.archived():
+            return None
+        return self.cleaned_data.get('q', '').strip() or None
+    
+    def filters(self):
+        """Return the cleaned filters as keyword arguments for SupabaseClient queries"""
+        if not self.is_valid():
+            return {}
+        return {
+            'status': self.cleaned_data.get('status') or None,
+            'category': self.cleaned_data.get('category') or None,
+            'date_from': self.cleaned_data.get('date_from'),
+            'date_to': self.cleaned_data.get('date_to'),
+        }
@@ -2,15 +2,29 @@
 URLs for admin panel
 """
 
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import views, async_views
+
+# Supabase-bound views have async versions for ASGI deployments
+supabase_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
     path('login/', views.admin_login, name='admin_login'),
     path('logout/', views.admin_logout, name='admin_logout'),
-    path('dashboard/', views.admin_dashboard, name='admin_dashboard'),
-    path('report/<str:report_id>/', views.report_detail, name='report_detail'),
-    path('report/<str:report_id>/status/', views.update_report_status, name='update_report_status'),
-    path('report/<str:report_id>/delete/', views.delete_report, name='delete_report'),
+    path('dashboard/', supabase_views.admin_dashboard, name='admin_dashboard'),
+    path('report/<str:report_id>/', supabase_views.report_detail, name='report_detail'),
+    path('report/<str:report_id>/status/', supabase_views.update_report_status, name='update_report_status'),
+    path('report/<str:report_id>/delete/', supabase_views.delete_report, name='delete_report'),
+    path('reports/bulk-status/', supabase_views.bulk_update_status, name='bulk_update_status'),
+    path('reports/bulk-delete/', supabase_views.bulk_delete, name='bulk_delete'),
+    path('reports/bulk-restore/', supabase_views.bulk_restore, name='bulk_restore'),
+    path('reports/events/poll/', views.report_events_poll, name='report_events_poll'),
     path('export/csv/', views.export_reports_csv, name='export_reports_csv'),
+    path('cache/stats/', views.cache_stats, name='cache_stats'),
+    path('metrics/', views.metrics, name='metrics'),
 ]
+
+# Server-sent events hold the connection open, which only an ASGI server can afford
+if settings.ASYNC_VIEWS:
+    urlpatterns.append(path('reports/events/', async_views.report_events, name='report_events'))
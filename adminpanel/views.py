@@ -2,15 +2,31 @@
 Views for admin panel
 """
 
+import os
 import csv
+import json
+import uuid
+import hashlib
 import logging
+from datetime import timezone
+from functools import lru_cache
+from django.conf import settings
 from django.shortcuts import render, redirect
+from django.urls import reverse
 from django.contrib.auth import authenticate, login, logout
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
 from django.views.decorators.http import require_http_methods
-from django.utils.html import escape
-from reports.supabase_client import get_supabase_client
-from .decorators import admin_required
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+from reports import events
+from reports.circuit import get_breaker
+from reports.replica import get_report_reader
+from reports.supabase_client import get_supabase_client, get_io_executor, DEFAULT_PAGE_SIZE
+from core import metrics as core_metrics
+from .decorators import admin_required, metrics_access_required
+from .forms import ReportFilterForm, STATUS_CHOICES
 
 logger = logging.getLogger(__name__)
 
@@ -32,10 +48,10 @@ def admin_login(request):
         
         if user is not None and user.is_staff:
             login(request, user)
-            logger.info(f"Admin user {username} logged in successfully")
+            logger.info("Admin user %s logged in successfully", username)
             return redirect('admin_dashboard')
         else:
-            logger.warning(f"Failed login attempt for username: {username}")
+            logger.warning("Failed login attempt for username: %s", username)
             error_message = 'Invalid credentials or insufficient permissions.'
     
     context = {
@@ -49,56 +65,220 @@ def admin_logout(request):
     Log out admin user
     """
     if request.user.is_authenticated:
-        logger.info(f"User {request.user.username} logged out")
+        logger.info("User %s logged out", request.user.username)
         logout(request)
     return redirect('admin_login')
 
+VALID_STATUSES = [value for value, label in STATUS_CHOICES]
+
+MAX_BULK_IDS = 1000
+
+def bulk_report_ids(request):
+    """
+    Return the distinct report IDs selected in a bulk request,
+    or None if there are none, too many, or any is not a UUID.
+    """
+    report_ids = list(dict.fromkeys(
+        report_id.strip() for report_id in request.POST.getlist('report_ids') if report_id.strip()
+    ))
+    if not report_ids or len(report_ids) > MAX_BULK_IDS:
+        return None
+    try:
+        return [str(uuid.UUID(report_id)) for report_id in report_ids]
+    except ValueError:
+        return None
+
+def dashboard_query(request):
+    """
+    Parse the dashboard query string.
+    Returns the filter form and the keyword arguments for list_reports().
+    """
+    filter_form = ReportFilterForm(request.GET)
+    try:
+        page_size = int(request.GET.get('page_size', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        page_size = DEFAULT_PAGE_SIZE
+    
+    params = {
+        'page_size': page_size,
+        'cursor': request.GET.get('cursor') or None,
+        **filter_form.filters(),
+    }
+    if filter_form.archived():
+        params['archived'] = True
+    return filter_form, params
+
+def stats_context(stats):
+    """
+    Template context for the statistics panel; stats may be None if they could not be loaded
+    """
+    if not stats:
+        return {'stats': None}
+    
+    # Scale the per-day bars against the busiest day
+    busiest = max((day['count'] for day in stats['by_day']), default=0)
+    by_day = [
+        dict(day, percent=round(100 * day['count'] / busiest) if busiest else 0)
+        for day in stats['by_day']
+    ]
+    by_category = sorted(stats['by_category'].items(), key=lambda item: item[1], reverse=True)
+    return {'stats': dict(stats, by_day=by_day, by_category=by_category)}
+
+def dashboard_context(request, filter_form, params, page, stats=None):
+    """
+    Build the dashboard template context for one page of reports
+    """
+    # Query string without the cursor, shared by the navigation and export links
+    query = request.GET.copy()
+    query.pop('cursor', None)
+    filters = filter_form.filters()
+    
+    return {
+        **stats_context(stats),
+        'search_text': filter_form.search_text(),
+        'supabase_unavailable': get_breaker().is_open(),
+        'reports': page['reports'],
+        'total_count': page['total_count'],
+        'next_cursor': page['next_cursor'],
+        'is_first_page': params['cursor'] is None,
+        'filter_form': filter_form,
+        'query_string': query.urlencode(),
+        'fragment_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+        'archived': params.get('archived', False),
+        # Change events are about current reports, so the archive is not updated live
+        'live_updates': None if params.get('archived') or not settings.REPORT_LIVE_UPDATES else {
+            # A stream would hold a WSGI worker, so sync deployments poll instead
+            'stream': settings.ASYNC_VIEWS,
+            'url': reverse('report_events' if settings.ASYNC_VIEWS else 'report_events_poll'),
+            'poll_interval': settings.REPORT_EVENTS_BROWSER_POLL_INTERVAL,
+            'after': events.last_id(),
+            # New reports belong at the top of the first page unless searching or capped by date
+            'insert_new': params['cursor'] is None and not filter_form.search_text() and not filters.get('date_to'),
+            'status': filters.get('status'),
+            'category': filters.get('category'),
+        },
+    }
+
+@lru_cache(maxsize=None)
+def template_version(template_name):
+    """
+    Modification time of a template, so that deploying a new version changes every ETag
+    """
+    return os.stat(get_template(template_name).origin.name).st_mtime_ns
+
+def page_validators(request, template_name, data, reports, cache):
+    """
+    Return (etag, last_modified) for a page rendered from `data`.
+    The ETag covers the data plus the user and CSRF cookie, which are also rendered
+    into the page. Last-Modified is the newest report's created_at or the last write
+    made through the app, whichever is later.
+    """
+    payload = json.dumps(
+        [template_version(template_name), request.user.pk, request.COOKIES.get(settings.CSRF_COOKIE_NAME), data],
+        sort_keys=True, default=str,
+    )
+    etag = f'W/"{hashlib.sha256(payload.encode()).hexdigest()[:32]}"'
+    
+    last_modified = cache.last_modified()
+    for report in reports:
+        created_at = parse_datetime(report.get('created_at') or '')
+        if created_at:
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            last_modified = max(last_modified, created_at.timestamp())
+    return etag, int(last_modified)
+
+def set_validators(response, etag, last_modified):
+    """
+    Add ETag and Last-Modified to a response; browsers must revalidate before reusing it
+    """
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+def not_modified(request, etag, last_modified):
+    """
+    Return a 304 response if the client's copy matches If-None-Match or If-Modified-Since, else None
+    """
+    response = set_validators(HttpResponse(), etag, last_modified)
+    conditional = get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
+    return conditional if conditional is not response else None
+
 @admin_required
 @require_http_methods(["GET"])
 def admin_dashboard(request):
     """
-    Display all reports in a table
+    Display one page of reports in a table, filtered or searched by the query string.
+    With archive=1, the archived reports are listed instead, without statistics.
+    Answers 304 Not Modified when the browser's copy is still current.
     """
     try:
-        supabase = get_supabase_client()
-        reports = supabase.get_all_reports()
+        filter_form, params = dashboard_query(request)
         
-        # If reports is empty list, that's fine - just means no data yet
-        # If reports is None or there's an error, it would have been caught
+        if params.get('archived'):
+            # The archive is only kept in Supabase, not in the replica or search index
+            supabase = get_supabase_client()
+            stats = None
+        else:
+            supabase = get_report_reader()
+            # Statistics are counted server-side while the page is fetched
+            stats = get_io_executor().submit(supabase.get_report_stats)
+        search_text = filter_form.search_text()
+        if search_text:
+            page = supabase.search_reports(search_text, params['page_size'], **filter_form.filters())
+        else:
+            page = supabase.list_reports(**params)
         
-        context = {
-            'reports': reports if reports else [],
-            'total_count': len(reports) if reports else 0,
-        }
-        return render(request, 'admin_dashboard.html', context)
+        context = dashboard_context(request, filter_form, params, page, stats and stats.result())
+        etag, last_modified = page_validators(
+            request, 'admin_dashboard.html',
+            [page, context['stats'], context['supabase_unavailable'], context['query_string'],
+             context['live_updates']],
+            page['reports'], supabase.cache,
+        )
+        response = not_modified(request, etag, last_modified)
+        if response:
+            return response
+        return set_validators(render(request, 'admin_dashboard.html', context), etag, last_modified)
     except ValueError as e:
         # Configuration error (missing credentials)
-        logger.error(f"Configuration error: {e}")
+        logger.error("Configuration error: %s", e)
         return render(request, 'supabase_error.html')
     except Exception as e:
         # Connection or other errors
-        logger.error(f"Dashboard error: {e}", exc_info=True)
+        logger.error("Dashboard error: %s", e, exc_info=True)
         return render(request, 'supabase_error.html')
 
 @admin_required
 @require_http_methods(["GET"])
 def report_detail(request, report_id):
     """
-    Display details of a single report
+    Display details of a single report, looking in the archive if it is not current.
+    Answers 304 Not Modified when the browser's copy is still current.
     """
-    supabase = get_supabase_client()
+    supabase = get_report_reader()
     report = supabase.get_report(report_id)
+    archived = False
+    if not report:
+        report = get_supabase_client().get_archived_report(report_id)
+        archived = report is not None
     
     if not report:
         return render(request, '404.html', {'message': 'Report not found'}, status=404)
     
-    # Debug logging
-    logger.info(f"Report {report_id} - image_url: {report.get('image_url')}")
+    logger.debug("Report %s - image_url: %s", report_id, report.get('image_url'))
+    
+    etag, last_modified = page_validators(request, 'report_detail.html', report, [report], supabase.cache)
+    response = not_modified(request, etag, last_modified)
+    if response:
+        return response
     
     context = {
         'report': report,
+        'archived': archived,
     }
-    return render(request, 'report_detail.html', context)
+    return set_validators(render(request, 'report_detail.html', context), etag, last_modified)
 
 @admin_required
 @require_http_methods(["POST"])
@@ -108,18 +288,18 @@ def update_report_status(request, report_id):
     """
     status = request.POST.get('status', '').strip()
     
-    if status not in ['new', 'reviewed', 'archived']:
-        logger.warning(f"Invalid status update attempt: {status}")
+    if status not in VALID_STATUSES:
+        logger.warning("Invalid status update attempt: %s", status)
         return HttpResponse('Invalid status', status=400)
     
     supabase = get_supabase_client()
     updated = supabase.update_report_status(report_id, status)
     
     if updated:
-        logger.info(f"Report {report_id} status updated to {status} by {request.user.username}")
+        logger.info("Report %s status updated to %s by %s", report_id, status, request.user.username)
         return HttpResponse('OK', status=200)
     else:
-        logger.error(f"Failed to update report {report_id} status")
+        logger.error("Failed to update report %s status", report_id)
         return HttpResponse('Failed to update', status=500)
 
 @admin_required
@@ -132,38 +312,199 @@ def delete_report(request, report_id):
     deleted = supabase.delete_report(report_id)
     
     if deleted:
-        logger.info(f"Report {report_id} deleted by {request.user.username}")
+        logger.info("Report %s deleted by %s", report_id, request.user.username)
         return HttpResponse('OK', status=200)
     else:
-        logger.error(f"Failed to delete report {report_id}")
+        logger.error("Failed to delete report %s", report_id)
         return HttpResponse('Failed to delete', status=500)
 
+@admin_required
+@require_http_methods(["POST"])
+def bulk_update_status(request):
+    """
+    Update the status of the selected reports (AJAX endpoint)
+    """
+    status = request.POST.get('status', '').strip()
+    
+    if status not in VALID_STATUSES:
+        logger.warning("Invalid bulk status update attempt: %s", status)
+        return HttpResponse('Invalid status', status=400)
+    
+    report_ids = bulk_report_ids(request)
+    if report_ids is None:
+        return HttpResponse(f'Select between 1 and {MAX_BULK_IDS} reports', status=400)
+    
+    supabase = get_supabase_client()
+    updated = supabase.update_reports_status(report_ids, status)
+    
+    if updated is None:
+        logger.error("Failed to update status of %s reports", len(report_ids))
+        return HttpResponse('Failed to update', status=500)
+    
+    logger.info("%s reports status updated to %s by %s", updated, status, request.user.username)
+    return JsonResponse({'updated': updated})
+
+@admin_required
+@require_http_methods(["POST"])
+def bulk_delete(request):
+    """
+    Delete the selected reports (AJAX endpoint)
+    """
+    report_ids = bulk_report_ids(request)
+    if report_ids is None:
+        return HttpResponse(f'Select between 1 and {MAX_BULK_IDS} reports', status=400)
+    
+    supabase = get_supabase_client()
+    deleted = supabase.delete_reports(report_ids)
+    
+    if deleted is None:
+        logger.error("Failed to delete %s reports", len(report_ids))
+        return HttpResponse('Failed to delete', status=500)
+    
+    logger.info("%s reports deleted by %s", deleted, request.user.username)
+    return JsonResponse({'deleted': deleted})
+
+@admin_required
+@require_http_methods(["POST"])
+def bulk_restore(request):
+    """
+    Move the selected reports from the archive back to current reports (AJAX endpoint)
+    """
+    report_ids = bulk_report_ids(request)
+    if report_ids is None:
+        return HttpResponse(f'Select between 1 and {MAX_BULK_IDS} reports', status=400)
+    
+    supabase = get_supabase_client()
+    restored = supabase.restore_reports(report_ids)
+    
+    if restored is None:
+        logger.error("Failed to restore %s reports", len(report_ids))
+        return HttpResponse('Failed to restore', status=500)
+    
+    logger.info("%s reports restored by %s", restored, request.user.username)
+    return JsonResponse({'restored': restored})
+
 @admin_required
 @require_http_methods(["GET"])
-def export_reports_csv(request):
+def cache_stats(request):
     """
-    Export all reports as CSV
+    Report cache hit/miss counters for this worker process (JSON)
     """
     supabase = get_supabase_client()
-    reports = supabase.get_all_reports()
+    return JsonResponse(supabase.cache.stats())
+
+@metrics_access_required
+@require_http_methods(["GET"])
+def metrics(request):
+    """
+    Request latency histograms and counters for this worker process,
+    in the Prometheus text format
+    """
+    return HttpResponse(core_metrics.REGISTRY.render(), content_type=core_metrics.CONTENT_TYPE)
+
+def events_start(request):
+    """
+    The event ID a stream starts after: Last-Event-ID when the browser reconnects,
+    else the ID rendered into the dashboard
+    """
+    value = request.headers.get('Last-Event-ID') or request.GET.get('after')
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return events.last_id()
+
+def event_data(event):
+    """
+    A change event as sent to the dashboard; created and updated reports carry their rendered table row
+    """
+    data = dict(event)
+    if 'report' in data:
+        data['html'] = render_to_string('dashboard_row.html', {'report': data['report']})
+    return data
+
+def sse_message(event):
+    """
+    Format a change event for the dashboard as a server-sent event
+    """
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event_data(event), default=str)}\n\n"
+
+def events_stream_response(stream):
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+SSE_RETRY_MS = 2000
+# Comment line sent on idle streams, so proxies do not time the connection out
+SSE_KEEPALIVE = ': keepalive\n\n'
+SSE_KEEPALIVE_INTERVAL = 15
+
+@admin_required
+@require_http_methods(["GET"])
+def report_events_poll(request):
+    """
+    Report changes after the given event ID as JSON, for dashboards served under
+    WSGI; returns straight away rather than holding the worker like a stream
+    """
+    new_events, after = events.read(events_start(request))
+    return JsonResponse({'events': [event_data(event) for event in new_events], 'after': after})
+
+class Echo:
+    """
+    Pseudo-buffer whose write() returns the value instead of storing it,
+    so csv.writer can produce rows for a streaming response.
+    """
+    def write(self, value):
+        return value
+
+CSV_HEADER = ['ID', 'Category', 'Location', 'Status', 'Created At', 'Description', 'Image URL']
+CSV_COLUMNS = ('id', 'category', 'location', 'status', 'created_at', 'description', 'image_url')
+
+# Cells starting with these are evaluated as formulas by spreadsheet applications
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+def _csv_cell(value):
+    """
+    Text of a CSV cell, quoted with a leading ' if a spreadsheet would run it as a formula
+    """
+    text = '' if value is None else str(value)
+    return "'" + text if text.startswith(FORMULA_PREFIXES) else text
+
+def _csv_rows(reports):
+    """
+    Yield the CSV header and one row per report. The response status has already
+    been sent when a batch fails, so the failure is written as a last row instead.
+    """
+    yield CSV_HEADER
+    exported = 0
+    try:
+        for report in reports:
+            yield [_csv_cell(report.get(column)) for column in CSV_COLUMNS]
+            exported += 1
+    except Exception as e:
+        logger.error("CSV export failed after %s reports: %s", exported, e, exc_info=True)
+        yield [f'# export incomplete: fetching reports failed after {exported} rows']
+
+@admin_required
+@require_http_methods(["GET"])
+def export_reports_csv(request):
+    """
+    Export reports matching the dashboard filters as a streamed CSV
+    """
+    filter_form = ReportFilterForm(request.GET)
+    if not filter_form.is_valid():
+        return HttpResponse('Invalid filters', status=400)
     
-    # Create CSV response
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="reports.csv"'
+    supabase = get_report_reader()
+    reports = supabase.iter_reports(**filter_form.filters())
     
-    writer = csv.writer(response)
-    writer.writerow(['ID', 'Category', 'Location', 'Status', 'Created At', 'Description', 'Image URL'])
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in _csv_rows(reports)),
+        content_type='text/csv',
+    )
+    response['Content-Disposition'] = 'attachment; filename="reports.csv"'
     
-    for report in reports:
-        writer.writerow([
-            escape(str(report.get('id', ''))),
-            escape(str(report.get('category', ''))),
-            escape(str(report.get('location', ''))),
-            escape(str(report.get('status', ''))),
-            escape(str(report.get('created_at', ''))),
-            escape(str(report.get('description', ''))),
-            escape(str(report.get('image_url', ''))),
-        ])
-    
-    logger.info(f"CSV export performed by {request.user.username}")
+    logger.info("CSV export performed by %s", request.user.username)
     return response
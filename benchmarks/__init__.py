@@ -0,0 +1,3 @@
+"""
+Offline benchmarks against a local stand-in for the Supabase HTTP APIs
+"""
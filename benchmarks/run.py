@@ -0,0 +1,257 @@
+"""
+Benchmark the report views against the local Supabase stand-in
+
+Starts benchmarks.fake_supabase in a child process, points the Django project
+at it, and drives each scenario through the Django test client from a pool of
+threads. Reports throughput and latency percentiles per scenario, then peak
+Python memory from a shorter second pass (tracemalloc slows everything down,
+so it is kept out of the timed pass). Uses a throwaway test database, never
+the development one.
+
+    python -m benchmarks.run --scenario all --requests 500 --concurrency 8 --latency 20
+    python -m benchmarks.run --scenario dashboard --error-rate 0.2 --json results.json
+
+Scenarios: submit (direct to Supabase unless --outbox), dashboard,
+detail and export (from Supabase unless --replica).
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+import threading
+import tracemalloc
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_supabase import FAKE_KEY, start_process
+
+SCENARIOS = ('submit', 'dashboard', 'detail', 'export')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def make_image(width=1600, height=1200):
+    from PIL import Image
+
+    image = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=85)
+    return buffer.getvalue()
+
+
+class Scenario:
+    """One kind of request, made by any number of threads"""
+
+    def __init__(self, name, report_ids, args):
+        self.name = name
+        self.report_ids = report_ids
+        self.args = args
+        self.image = make_image() if name == 'submit' and args.image else None
+        self.local = threading.local()
+        self.staff_cookies = None
+        self.failures = Counter()
+
+    def client(self):
+        from django.test import Client
+
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = Client()
+            if self.staff_cookies:
+                client.cookies.update(self.staff_cookies)
+        return client
+
+    def request(self):
+        """Make one request; returns True on success, else the reason it failed"""
+        client = self.client()
+        if self.name == 'submit':
+            from django.core.files.uploadedfile import SimpleUploadedFile
+
+            data = {
+                'description': 'Benchmark report about a broken street light',
+                'category': 'infrastructure',
+                'location': 'Main Street',
+            }
+            if self.image:
+                data['image'] = SimpleUploadedFile('photo.jpg', self.image, content_type='image/jpeg')
+            response = client.post('/reports/submit/', data)
+            # The form is shown again, with an error, when the submission fails
+            return response.status_code == 302 or f'HTTP {response.status_code}'
+        if self.name == 'dashboard':
+            response = client.get('/admin/dashboard/', {'status': random.choice(['', 'new', 'reviewed'])})
+            return response.status_code == 200 or f'HTTP {response.status_code}'
+        if self.name == 'detail':
+            report_id = random.choice(self.report_ids)
+            response = client.get(f'/admin/report/{report_id}/')
+            if response.templates and response.templates[0].name == 'supabase_error.html':
+                return 'Supabase error page'
+            return response.status_code == 200 or f'HTTP {response.status_code}'
+        if self.name == 'export':
+            response = client.get('/admin/export/csv/', {'status': 'new'})
+            if response.status_code != 200:
+                return f'HTTP {response.status_code}'
+            # Errors mid-stream end the CSV early rather than changing the status
+            return b''.join(response.streaming_content).count(b'\n') > 1 or 'Empty export'
+        raise ValueError(f'Unknown scenario {self.name}')
+
+    def timed_request(self):
+        start = time.perf_counter()
+        try:
+            outcome = self.request()
+        except Exception as e:
+            outcome = type(e).__name__
+        finally:
+            from django.db import connection
+            connection.close()
+        if outcome is not True:
+            self.failures[outcome] += 1
+        return time.perf_counter() - start, outcome is True
+
+    def run(self):
+        """
+        Warm up, then make args.requests timed requests from args.concurrency threads,
+        then args.memory_requests more under tracemalloc.
+        """
+        def make_requests(count):
+            return list(executor.map(lambda _: self.timed_request(), range(count)))
+
+        with ThreadPoolExecutor(self.args.concurrency) as executor:
+            make_requests(self.args.warmup)
+            self.failures.clear()
+
+            start = time.perf_counter()
+            results = make_requests(self.args.requests)
+            elapsed = time.perf_counter() - start
+            failures = dict(self.failures)
+
+            tracemalloc.start()
+            make_requests(self.args.memory_requests)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        latencies = sorted(latency for latency, _ in results)
+        errors = sum(1 for _, ok in results if not ok)
+        return {
+            'scenario': self.name,
+            'requests': len(results),
+            'errors': errors,
+            'concurrency': self.args.concurrency,
+            'throughput': round(len(results) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+            'p90_ms': round(percentile(latencies, 0.90) * 1000, 1),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+            'max_ms': round(latencies[-1] * 1000, 1) if latencies else 0.0,
+            'peak_memory_mb': round(peak / 1024 / 1024, 2),
+            'failures': failures,
+        }
+
+
+def setup_django(url, args):
+    os.environ['SUPABASE_URL'] = url
+    os.environ['SUPABASE_KEY'] = FAKE_KEY
+    os.environ['REPORT_OUTBOX_ENABLED'] = 'True' if args.outbox else 'False'
+    os.environ['REPORT_READ_REPLICA'] = 'True' if args.replica else 'False'
+    # Every benchmark request comes from one address
+    os.environ['RATE_LIMIT_ENABLED'] = 'False'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+    import django
+    from django.conf import settings
+
+    django.setup()
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+    settings.MEDIA_ROOT = tempfile.mkdtemp(prefix='benchmark-media-')
+    # Database sessions would serialize the threads on SQLite writes
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+    if args.no_cache:
+        settings.CACHES['reports'] = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+    if not args.verbose:
+        # Keep log I/O from dominating the numbers; WARNING and above still pass
+        logging.disable(logging.INFO)
+
+    from django.db import connection
+    connection.creation.create_test_db(verbosity=0)
+    if args.replica:
+        from reports import replica
+        replica.sync(full=True)
+
+    # Log in once up front; concurrent logins would race on the last_login update
+    from django.contrib.auth.models import User
+    from django.test import Client
+    client = Client()
+    client.force_login(User.objects.create_user('benchmark', password='benchmark', is_staff=True))
+    return client.cookies
+
+
+def print_results(results, served):
+    columns = ('scenario', 'requests', 'errors', 'throughput', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms',
+               'peak_memory_mb')
+    widths = [max(len(column), *(len(str(result[column])) for result in results)) for column in columns]
+    print('  '.join(column.ljust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print('  '.join(str(result[column]).ljust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        if result['failures']:
+            print(f"{result['scenario']} failures: {result['failures']}")
+    print(f"\nFake Supabase served {sum(served.values())} requests: {served}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the report views against a local Supabase stand-in')
+    parser.add_argument('--scenario', choices=SCENARIOS + ('all',), default='all')
+    parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--memory-requests', type=int, default=50,
+                        help='Requests per scenario in the memory pass')
+    parser.add_argument('--latency', type=float, default=10.0, help='Milliseconds added to every Supabase request')
+    parser.add_argument('--jitter', type=float, default=5.0, help='Up to this many more random milliseconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of Supabase requests failing with 503')
+    parser.add_argument('--seed-reports', type=int, default=2000)
+    parser.add_argument('--image', action='store_true', help='Attach a 1600x1200 JPEG to submissions')
+    parser.add_argument('--outbox', action='store_true', help='Submit through the local outbox')
+    parser.add_argument('--replica', action='store_true',
+                        help='Serve admin reads from the local read replica, synced before the run')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the report cache')
+    parser.add_argument('--json', help='Also write the results to this file')
+    parser.add_argument('--verbose', action='store_true', help='Keep INFO logging enabled')
+    args = parser.parse_args()
+
+    process, url = start_process(latency=args.latency / 1000, jitter=args.jitter / 1000,
+                                 error_rate=args.error_rate, seed_reports=args.seed_reports)
+    try:
+        # Read the IDs before any errors are injected into the benchmark's own requests
+        seeded = httpx.get(f'{url}/rest/v1/reports', params={'select': 'id', 'limit': 1000}, timeout=30)
+        report_ids = [row['id'] for row in seeded.json()] if seeded.status_code == 200 else []
+
+        staff_cookies = setup_django(url, args)
+        results = []
+        for name in (SCENARIOS if args.scenario == 'all' else (args.scenario,)):
+            scenario = Scenario(name, report_ids, args)
+            scenario.staff_cookies = staff_cookies
+            results.append(scenario.run())
+        print_results(results, httpx.get(f'{url}/_fake/requests').json())
+        if args.json:
+            with open(args.json, 'w') as output:
+                json.dump({'options': vars(args), 'results': results}, output, indent=2)
+    finally:
+        process.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Logging pipeline
+
+Loggers only put records on an in-memory queue; one background thread (a
+QueueListener) formats them and writes them to the console and a size-rotated
+log file, so neither formatting nor disk I/O happens on the request path.
+
+Records are written as one JSON object per line. Call sites should pass
+arguments lazily (logger.info("Deleted %s reports", count)) rather than
+formatting the message themselves: records that are filtered out are then
+never formatted, and sampling can group records by their message template.
+"""
+import json
+import queue
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from . import metrics
+
+DROPPED = metrics.counter(
+    'log_records_dropped_total',
+    'Log records discarded before being written, by reason',
+    ('reason',),
+)
+
+# Attributes every LogRecord has; anything else was passed in `extra`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as single-line JSON objects"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class SampleFilter(logging.Filter):
+    """
+    Thin out repetitive INFO and DEBUG records.
+    The first `burst` records with the same logger and message template in
+    each `window` seconds pass; after that only one in every `rate` does, and
+    it carries a sample_rate attribute so counts can be scaled back up.
+    WARNING and above always pass.
+    """
+    # Bound on tracked templates, in case a caller formats its own messages
+    MAX_TEMPLATES = 1000
+
+    def __init__(self, burst=20, rate=10, window=1.0):
+        super().__init__()
+        self.burst = burst
+        self.rate = rate
+        self.window = window
+        self._lock = threading.Lock()
+        self._seen = {}  # (logger, template) -> (window start, records seen)
+
+    def filter(self, record):
+        if record.levelno > logging.INFO or self.rate <= 1:
+            return True
+
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            start, seen = self._seen.get(key, (now, 0))
+            if now - start >= self.window:
+                start, seen = now, 0
+            elif len(self._seen) >= self.MAX_TEMPLATES and key not in self._seen:
+                self._seen.clear()
+            seen += 1
+            self._seen[key] = (start, seen)
+
+        if seen <= self.burst:
+            return True
+        if (seen - self.burst) % self.rate == 0:
+            record.sample_rate = self.rate
+            return True
+        DROPPED.inc(reason='sampled')
+        return False
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    QueueHandler that writes through its own QueueListener thread.
+
+    Records are queued as they are, so formatting happens on the listener
+    thread; arguments passed to a logging call must not be mutated afterwards.
+    When the queue is full, records are dropped rather than blocking the caller.
+    """
+
+    def __init__(self, filename=None, max_bytes=0, backup_count=0, console=True, json_format=True,
+                 queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        formatter = JSONFormatter() if json_format else logging.Formatter(
+            '{levelname} {asctime} {module} {message}', style='{')
+
+        handlers = []
+        if console:
+            handlers.append(logging.StreamHandler())
+        if filename:
+            handlers.append(RotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count,
+                                                encoding='utf-8', delay=True))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        self._listening = True
+        # Flush what is still queued when the process exits
+        atexit.register(self.close)
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DROPPED.inc(reason='queue_full')
+
+    def close(self):
+        if self._listening:
+            self._listening = False
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+        super().close()
@@ -0,0 +1,54 @@
+"""
+Middleware shared by the apps
+"""
+
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from . import metrics
+
+REQUEST_DURATION = metrics.histogram(
+    'http_request_duration_seconds',
+    'Time to produce a response, by view',
+    ('view', 'method'),
+)
+REQUESTS = metrics.counter(
+    'http_requests_total',
+    'Responses by view and status code',
+    ('view', 'method', 'status'),
+)
+
+
+class RequestMetricsMiddleware:
+    """
+    Time every request and count responses per view.
+    Streaming responses are timed until their first byte is ready.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def observe(request, response, duration):
+        # Label by URL pattern name, not path, to keep the number of series bounded
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unmatched'
+        REQUEST_DURATION.observe(duration, view=view, method=request.method)
+        REQUESTS.inc(view=view, method=request.method, status=response.status_code)
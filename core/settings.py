@@ -32,7 +32,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Serves STATIC_ROOT when DEBUG is off, on hosts without a static files mapping
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'reports.middleware.SubmissionThrottleMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -63,6 +67,12 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'core.wsgi.application'
+ASGI_APPLICATION = 'core.asgi.application'
+
+# Serve the Supabase-bound views as coroutines. Enable when running under an
+# ASGI server (e.g. uvicorn core.asgi:application); under WSGI each async view
+# would run in its own short-lived event loop.
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False').lower() == 'true'
 
 DATABASE_URL = os.environ.get('DATABASE_URL')
 if DATABASE_URL:
@@ -96,6 +106,11 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / 'static'] if (BASE_DIR / 'static').exists() else []
+# collectstatic also writes gzip copies, which WhiteNoise serves to clients that accept them
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedStaticFilesStorage'},
+}
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -103,6 +118,154 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 SUPABASE_URL = os.environ.get('SUPABASE_URL')
 SUPABASE_KEY = os.environ.get('SUPABASE_KEY')
 SUPABASE_BUCKET = os.environ.get('SUPABASE_BUCKET', 'report_uploads')
+# Service role key for the report archive (ADD_REPORTS_ARCHIVE.sql), which the anon
+# key can neither read nor change; server-side only, never send it to browsers.
+# Defaults to SUPABASE_KEY, for projects where that already is the service key.
+SUPABASE_SERVICE_KEY = os.environ.get('SUPABASE_SERVICE_KEY') or SUPABASE_KEY
+
+# Supabase HTTP transport, shared by the table and storage clients (see reports/transport.py)
+# Size the pool above the number of threads making requests per process
+SUPABASE_HTTP2 = os.environ.get('SUPABASE_HTTP2', 'True').lower() == 'true'
+SUPABASE_POOL_MAX_CONNECTIONS = int(os.environ.get('SUPABASE_POOL_MAX_CONNECTIONS', 20))
+SUPABASE_POOL_MAX_KEEPALIVE = int(os.environ.get('SUPABASE_POOL_MAX_KEEPALIVE', 10))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.environ.get('SUPABASE_KEEPALIVE_EXPIRY', 60))  # seconds
+SUPABASE_CONNECT_TIMEOUT = float(os.environ.get('SUPABASE_CONNECT_TIMEOUT', 5))
+SUPABASE_READ_TIMEOUT = float(os.environ.get('SUPABASE_READ_TIMEOUT', 30))
+SUPABASE_POOL_TIMEOUT = float(os.environ.get('SUPABASE_POOL_TIMEOUT', 10))  # waiting for a free connection
+SUPABASE_CONNECT_RETRIES = int(os.environ.get('SUPABASE_CONNECT_RETRIES', 1))
+# Read/write timeouts by kind of request, in seconds
+SUPABASE_OPERATION_TIMEOUTS = {
+    'select': float(os.environ.get('SUPABASE_SELECT_TIMEOUT', 10)),
+    'write': float(os.environ.get('SUPABASE_WRITE_TIMEOUT', 15)),
+    'storage': float(os.environ.get('SUPABASE_STORAGE_TIMEOUT', 60)),
+}
+
+# Circuit breaker: fail fast while Supabase is failing (see reports/circuit.py)
+CIRCUIT_FAILURE_RATE = float(os.environ.get('CIRCUIT_FAILURE_RATE', 0.5))
+CIRCUIT_MIN_REQUESTS = int(os.environ.get('CIRCUIT_MIN_REQUESTS', 10))
+CIRCUIT_WINDOW = float(os.environ.get('CIRCUIT_WINDOW', 30))  # seconds of requests considered
+CIRCUIT_RESET_TIMEOUT = float(os.environ.get('CIRCUIT_RESET_TIMEOUT', 30))  # seconds before a probe request
+
+# Metrics at /admin/metrics/: staff sessions, or scrapers sending "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Caching
+# The report cache defaults to a per-process LRU (LocMemCache culls the least
+# recently used entries once MAX_ENTRIES is reached). Set REDIS_URL to share it
+# between workers (needs the redis package, listed in requirements.txt).
+REPORT_CACHE_ALIAS = 'reports'
+REPORT_CACHE_TIMEOUT = int(os.environ.get('REPORT_CACHE_TIMEOUT', 300))  # single reports
+REPORT_CACHE_LIST_TIMEOUT = int(os.environ.get('REPORT_CACHE_LIST_TIMEOUT', 30))  # dashboard pages
+REPORT_CACHE_STATS_TIMEOUT = int(os.environ.get('REPORT_CACHE_STATS_TIMEOUT', 60))  # dashboard statistics
+REPORT_CACHE_IMAGE_TIMEOUT = int(os.environ.get('REPORT_CACHE_IMAGE_TIMEOUT', 86400))  # images known to be in storage
+# Rendered dashboard rows, keyed on their content; kept in process memory since
+# a page looks up one fragment per row
+FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('FRAGMENT_CACHE_TIMEOUT', 600))
+
+REDIS_URL = os.environ.get('REDIS_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'default',
+    },
+    REPORT_CACHE_ALIAS: {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache' if REDIS_URL
+                   else 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': REDIS_URL or 'reports',
+        'TIMEOUT': REPORT_CACHE_TIMEOUT,
+        'OPTIONS': {} if REDIS_URL else {'MAX_ENTRIES': 2000},
+    },
+    'ratelimit': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache' if REDIS_URL
+                   else 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': REDIS_URL or 'ratelimit',
+        'OPTIONS': {} if REDIS_URL else {'MAX_ENTRIES': 10000},
+    },
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'template_fragments',
+        'TIMEOUT': FRAGMENT_CACHE_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
+# Submission outbox
+# When enabled, submissions are stored locally and delivered to Supabase by
+# the drain_outbox management command, which must be running. Off by default:
+# submissions then go to Supabase from the request, and are only queued while
+# the circuit breaker is open.
+REPORT_OUTBOX_ENABLED = os.environ.get('REPORT_OUTBOX_ENABLED', 'False').lower() == 'true'
+OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 20))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 10))
+OUTBOX_POLL_INTERVAL = float(os.environ.get('OUTBOX_POLL_INTERVAL', 2))
+OUTBOX_RETRY_BASE_DELAY = 5  # seconds, doubled after every failed attempt
+OUTBOX_RETRY_MAX_DELAY = 3600  # seconds
+OUTBOX_CLAIM_TIMEOUT = 300  # seconds a claimed report is hidden from other workers
+
+# Live dashboard updates (see reports/events.py)
+# The event log is kept in the report cache, so it needs REDIS_URL: with the
+# per-process cache, dashboards miss changes made by other workers and by
+# drain_outbox. Only force it on without Redis for a single-process server.
+REPORT_LIVE_UPDATES = os.environ.get('REPORT_LIVE_UPDATES', str(bool(REDIS_URL))).lower() == 'true'
+# With ASYNC_VIEWS, dashboards get one server-sent events connection that polls the
+# event log every REPORT_EVENTS_POLL_INTERVAL seconds and is reopened every
+# REPORT_EVENTS_STREAM_TIMEOUT seconds. Under WSGI a stream would hold a worker, so
+# dashboards ask for new events every REPORT_EVENTS_BROWSER_POLL_INTERVAL seconds instead.
+REPORT_EVENTS_BROWSER_POLL_INTERVAL = float(os.environ.get('REPORT_EVENTS_BROWSER_POLL_INTERVAL', 5))
+REPORT_EVENTS_POLL_INTERVAL = float(os.environ.get('REPORT_EVENTS_POLL_INTERVAL', 1))
+REPORT_EVENTS_STREAM_TIMEOUT = int(os.environ.get('REPORT_EVENTS_STREAM_TIMEOUT', 30))
+REPORT_EVENTS_RETENTION = 600  # seconds events stay in the log
+
+# Local read replica of the reports table (see reports/replica.py)
+# When enabled, the admin dashboard, report pages, search and export read from
+# the Django database, kept in sync by the sync_replica management command.
+REPORT_READ_REPLICA = os.environ.get('REPORT_READ_REPLICA', 'False').lower() == 'true'
+REPORT_REPLICA_SYNC_INTERVAL = float(os.environ.get('REPORT_REPLICA_SYNC_INTERVAL', 30))
+REPORT_REPLICA_SYNC_OVERLAP = 60  # seconds of changes fetched again on every sync
+REPORT_REPLICA_BATCH_SIZE = 500  # rows per request, below PostgREST's max-rows
+
+# Archival (ADD_REPORTS_ARCHIVE.sql): the archive_reports management command moves
+# reports with one of these statuses, created more than REPORT_ARCHIVE_AFTER_DAYS
+# days ago, out of the reports table into reports_archive. With --to-storage it
+# also uploads them as compressed JSON Lines to REPORT_ARCHIVE_BUCKET, which must
+# be a private bucket.
+REPORT_ARCHIVE_STATUSES = [
+    status.strip() for status in os.environ.get('REPORT_ARCHIVE_STATUSES', 'archived').split(',') if status.strip()
+]
+REPORT_ARCHIVE_AFTER_DAYS = int(os.environ.get('REPORT_ARCHIVE_AFTER_DAYS', 30))
+REPORT_ARCHIVE_BUCKET = os.environ.get('REPORT_ARCHIVE_BUCKET', 'report_archive')
+
+# Submission rate limits (token buckets, see reports/throttle.py)
+# Each client may submit SUBMIT_RATE_IP_BURST reports at once, then
+# SUBMIT_RATE_IP_PER_MINUTE per minute; the global bucket caps everyone together.
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+# Set to e.g. 'HTTP_X_REAL_IP' only behind a proxy that sets it
+RATE_LIMIT_IP_HEADER = os.environ.get('RATE_LIMIT_IP_HEADER') or None
+# Proxies in front of the app that append to RATE_LIMIT_IP_HEADER; the client is
+# taken that many entries from the right, since entries further left are whatever
+# the client sent
+RATE_LIMIT_TRUSTED_PROXIES = max(1, int(os.environ.get('RATE_LIMIT_TRUSTED_PROXIES', 1)))
+# Behind a proxy, REMOTE_ADDR is the proxy's for every client, so the per-client
+# buckets are on by default only once RATE_LIMIT_IP_HEADER is set. Set
+# RATE_LIMIT_PER_CLIENT=True for a server clients reach directly.
+RATE_LIMIT_PER_CLIENT = os.environ.get('RATE_LIMIT_PER_CLIENT', str(bool(RATE_LIMIT_IP_HEADER))).lower() == 'true'
+RATE_LIMIT_CACHE_ALIAS = 'ratelimit'
+SUBMIT_RATE_IP_BURST = int(os.environ.get('SUBMIT_RATE_IP_BURST', 5))
+SUBMIT_RATE_IP_PER_MINUTE = float(os.environ.get('SUBMIT_RATE_IP_PER_MINUTE', 2))
+SUBMIT_RATE_GLOBAL_BURST = int(os.environ.get('SUBMIT_RATE_GLOBAL_BURST', 60))
+SUBMIT_RATE_GLOBAL_PER_MINUTE = float(os.environ.get('SUBMIT_RATE_GLOBAL_PER_MINUTE', 300))
+# Larger submissions are refused from the Content-Length header alone:
+# a 5MB image plus the text fields and multipart overhead
+SUBMIT_MAX_CONTENT_LENGTH = 5242880 + 65536
+
+# Bulk ingestion at /reports/api/bulk/ for partner systems and migrations,
+# authenticated with "Authorization: Bearer <token>" (comma-separated tokens)
+INGEST_API_TOKENS = [token.strip() for token in os.environ.get('INGEST_API_TOKENS', '').split(',') if token.strip()]
+INGEST_BATCH_SIZE = int(os.environ.get('INGEST_BATCH_SIZE', 500))  # rows per insert request
+INGEST_MAX_REPORTS = int(os.environ.get('INGEST_MAX_REPORTS', 10000))  # per request
+INGEST_MAX_CONTENT_LENGTH = int(os.environ.get('INGEST_MAX_CONTENT_LENGTH', 20971520))  # bytes of JSON
+
+MEDIA_ROOT = BASE_DIR / 'media'
 
 # Session configuration
 SESSION_COOKIE_AGE = 86400 * 7  # 7 days
@@ -123,48 +286,80 @@ if not DEBUG:
     SECURE_CONTENT_TYPE_NOSNIFF = True
     X_FRAME_OPTIONS = 'DENY'
 
+# Image uploads are validated from their headers (reports/validation.py)
+IMAGE_MAX_UPLOAD_SIZE = 5242880  # 5MB
+IMAGE_MAX_PIXELS = 50_000_000  # larger images are refused before being decoded
+
+# Image processing: uploads are re-encoded as WebP without metadata
+IMAGE_MAX_DIMENSION = 1920  # pixels, longest side
+IMAGE_THUMBNAIL_SIZE = 320  # pixels, longest side
+IMAGE_WEBP_QUALITY = 80
+# Key of the HMAC naming stored images and recorded as image_hash; a plain hash
+# would let anyone holding a photo check the public bucket for it. Changing it
+# only stops new uploads from sharing objects with earlier ones.
+IMAGE_HASH_KEY = os.environ.get('IMAGE_HASH_KEY') or SECRET_KEY
+
 # File upload
-FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
+# Uploads above this size are spooled to a temporary file instead of RAM;
+# they are then streamed to Supabase Storage in small chunks.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 262144  # 256KB
+# The default handlers, also hashing each file as it arrives (for content-addressed storage)
+FILE_UPLOAD_HANDLERS = [
+    'reports.uploads.HashingMemoryFileUploadHandler',
+    'reports.uploads.HashingTemporaryFileUploadHandler',
+]
 DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
 
 # Logging configuration
+# Records are queued and written by a background thread (see core/log.py):
+# JSON lines to the console and to a log file rotated by size. Repetitive
+# INFO/DEBUG messages are sampled once they exceed LOG_SAMPLE_BURST per second.
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')  # 'json' or 'text'
+LOG_FILE = os.environ.get('LOG_FILE', str(BASE_DIR / 'django.log'))
+LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', 5))
+LOG_QUEUE_SIZE = 10000  # records waiting to be written; further records are dropped
+LOG_SAMPLE_BURST = int(os.environ.get('LOG_SAMPLE_BURST', 20))
+LOG_SAMPLE_RATE = int(os.environ.get('LOG_SAMPLE_RATE', 10))  # keep 1 in N beyond the burst
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
-    'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {message}',
-            'style': '{',
+    'filters': {
+        'sample': {
+            '()': 'core.log.SampleFilter',
+            'burst': LOG_SAMPLE_BURST,
+            'rate': LOG_SAMPLE_RATE,
         },
     },
     'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
-        },
-        'file': {
-            'class': 'logging.FileHandler',
-            'filename': BASE_DIR / 'django.log',
-            'formatter': 'verbose',
+        'queue': {
+            '()': 'core.log.QueueListenerHandler',
+            'filename': LOG_FILE,
+            'max_bytes': LOG_MAX_BYTES,
+            'backup_count': LOG_BACKUP_COUNT,
+            'json_format': LOG_FORMAT == 'json',
+            'queue_size': LOG_QUEUE_SIZE,
+            'filters': ['sample'],
         },
     },
     'root': {
-        'handlers': ['console'],
+        'handlers': ['queue'],
         'level': 'INFO',
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
         'reports': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
         'adminpanel': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
@@ -0,0 +1,667 @@
+"""
+Async Supabase client for reports app
+
+Mirrors SupabaseClient method for method on top of the async supabase/httpx
+stack, for use from async views served by an ASGI server.
+"""
+import asyncio
+import logging
+import weakref
+from asgiref.sync import sync_to_async
+from supabase import AsyncClient
+from . import events, replica, search
+from .transport import acreate_client
+from .uploads import ObjectExists, aupload_stream
+from .supabase_client import (
+    ARCHIVE_BATCH_SIZE,
+    ARCHIVE_TABLE,
+    BULK_NOT_ATTEMPTED,
+    BaseSupabaseClient,
+    DEFAULT_PAGE_SIZE,
+    EXPORT_BATCH_SIZE,
+    LIST_COLUMNS,
+    MAX_PAGE_SIZE,
+    STATS_DAYS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _offload(func):
+    """
+    Run a report cache or event log call in a worker thread: with REDIS_URL each
+    is a network round trip, which would block the event loop
+    """
+    return sync_to_async(func, thread_sensitive=False)
+
+
+class AsyncSupabaseClient(BaseSupabaseClient):
+    """
+    Use `await AsyncSupabaseClient.create()`; the underlying client is
+    created asynchronously and bound to the running event loop.
+    """
+
+    @classmethod
+    async def create(cls):
+        """Initialize async Supabase client with credentials from Django settings"""
+        self = cls()
+
+        logger.info("Initializing async Supabase client with URL: %s", self.url)
+
+        try:
+            self.client: AsyncClient = await acreate_client(self.url, self.key)
+            # The archive is only open to the service role
+            self.archive_client: AsyncClient = (
+                self.client if self.service_key == self.key else await acreate_client(self.url, self.service_key)
+            )
+            logger.info("Async Supabase client initialized successfully")
+        except Exception as e:
+            logger.error("Failed to create async Supabase client: %s", e)
+            raise
+        return self
+
+    async def _upload_object(self, filename, file_obj, content_type=None):
+        """
+        Upload a file to Supabase Storage under the given object name.
+        Errors are raised to the caller.
+        """
+        content_type = content_type or getattr(file_obj, 'content_type', None)
+
+        logger.info("Uploading file: %s to bucket: %s", filename, self.bucket)
+
+        # Streamed from the file in small chunks rather than read into memory
+        await aupload_stream(self.client.storage.session, self.bucket, filename, file_obj, content_type)
+
+    async def upload_file(self, file_obj, content_type=None):
+        """
+        Upload a file to Supabase Storage, named by its content hash.
+        content_type defaults to the uploaded file's content_type attribute.
+        Returns the public URL of the uploaded file.
+        """
+        try:
+            filename = await sync_to_async(self._upload_filename, thread_sensitive=False)(file_obj)
+            try:
+                await self._upload_object(filename, file_obj, content_type)
+            except ObjectExists:
+                logger.info("File %s is already stored", filename)
+            public_url = await self.client.storage.from_(self.bucket).get_public_url(filename)
+
+            logger.info("File uploaded successfully: %s", public_url)
+            return public_url
+
+        except Exception as e:
+            logger.error("File upload error: %s", e, exc_info=True)
+            return None
+
+    async def _try_upload(self, filename, file_obj):
+        """
+        Upload an object, returning whether it is now stored.
+        file_obj is None for objects known to be stored already.
+        """
+        if file_obj is None:
+            return True
+        try:
+            await self._upload_object(filename, file_obj)
+            return True
+        except ObjectExists:
+            logger.info("File %s is already stored", filename)
+            return True
+        except Exception as e:
+            logger.error("File upload error for %s: %s", filename, e, exc_info=True)
+            return False
+
+    async def _public_urls(self, uploads):
+        bucket = self.client.storage.from_(self.bucket)
+        return {field: await bucket.get_public_url(filename) for field, (filename, _) in uploads.items()}
+
+    async def upload_image(self, file_obj, content_type=None):
+        """
+        Process an image (see reports.images) and upload it with its thumbnail,
+        unless an identical image is already stored.
+        Returns a dict with image_url, image_hash and, when generated, thumbnail_url; None on failure.
+        Objects that did upload are kept on failure: they are reused when the image is retried.
+        """
+        if content_type and not getattr(file_obj, 'content_type', None):
+            file_obj.content_type = content_type
+
+        digest, uploads = await sync_to_async(self._image_uploads, thread_sensitive=False)(file_obj)
+        results = await asyncio.gather(*(self._try_upload(*upload) for upload in uploads.values()))
+
+        if all(results):
+            await _offload(self._remember_image)(digest, uploads)
+            urls = await self._public_urls(uploads)
+            logger.info("Image uploaded successfully: %s", urls['image_url'])
+            return {**urls, 'image_hash': digest}
+        return None
+
+    async def remove_file(self, filename):
+        """
+        Delete an object from Supabase Storage.
+        """
+        try:
+            logger.info("Removing file: %s from bucket: %s", filename, self.bucket)
+            await self.client.storage.from_(self.bucket).remove([filename])
+            return True
+
+        except Exception as e:
+            logger.error("File removal error for %s: %s", filename, e, exc_info=True)
+            return False
+
+    async def submit_report(self, image_file=None, **fields):
+        """
+        Create a report, uploading its image and thumbnail concurrently with the insert.
+        Images already in storage (by content hash) are not processed or uploaded again.
+        If an upload fails the report is deleted. Uploaded objects are kept if the
+        insert fails: they may be shared with other reports, and a retry reuses them.
+        Returns the created report, or None.
+        """
+        if not image_file:
+            return await self.create_report(**fields)
+
+        # Hashing and Pillow work run in a thread so they do not block the event loop
+        digest, uploads = await sync_to_async(self._image_uploads, thread_sensitive=False)(image_file)
+        urls = await self._public_urls(uploads)
+
+        report, *results = await asyncio.gather(
+            self.create_report(**urls, image_hash=digest, **fields),
+            *(self._try_upload(*upload) for upload in uploads.values()),
+        )
+
+        if all(results):
+            await _offload(self._remember_image)(digest, uploads)
+            if report:
+                logger.info("File uploaded successfully: %s", urls['image_url'])
+                return report
+            logger.warning("Report insert failed")
+        elif report:
+            logger.warning("Image upload failed, removing report %s", report['id'])
+            await self.delete_report(report['id'])
+        return None
+
+    async def create_report(self, description, category=None, location=None, image_url=None, username=None,
+                            report_id=None, created_at=None, thumbnail_url=None, image_hash=None):
+        """
+        Insert a report into the Supabase database.
+        report_id and created_at are generated when not given.
+        """
+        try:
+            report_data = self._new_report_data(
+                description, category, location, image_url, username, report_id, created_at, thumbnail_url,
+                image_hash,
+            )
+
+            logger.info("Creating report with category: %s", category)
+
+            response = await self.client.table('reports').insert(report_data).execute()
+
+            if response.data:
+                logger.info("Report created successfully with ID: %s", response.data[0].get('id'))
+                await _offload(self.cache.set_report)(response.data[0])
+                await _offload(self.cache.invalidate_lists)()
+                await sync_to_async(search.index_reports)(response.data)
+                await sync_to_async(replica.apply_reports)(response.data)
+                await _offload(events.reports_created)(response.data)
+                return response.data[0]
+            else:
+                logger.warning("Report creation returned no data")
+                return None
+
+        except Exception as e:
+            logger.error("Database insert error: %s", e, exc_info=True)
+            return None
+
+    async def _insert_batch(self, batch, errors, start=0, restore=False):
+        """
+        Insert (index, report_data) pairs in one request, setting errors[start:] to
+        None or an error message per pair. If the data in a row is at fault, the
+        batch is split in halves until the offending rows are isolated. Other errors
+        are raised, leaving the entries of pairs not inserted yet unchanged.
+        """
+        try:
+            await self._bulk_insert_query(batch, restore).execute()
+            errors[start:start + len(batch)] = [None] * len(batch)
+            return
+        except Exception as e:
+            if not self._is_row_error(e):
+                raise
+            if len(batch) == 1:
+                errors[start] = e.message
+                return
+
+        middle = len(batch) // 2
+        await self._insert_batch(batch[:middle], errors, start, restore)
+        await self._insert_batch(batch[middle:], errors, start + middle, restore)
+
+    async def create_reports_bulk(self, reports, batch_size=None, restore=False):
+        """
+        Validate report dicts with the ReportForm rules and insert the valid ones,
+        batch_size rows per request (INGEST_BATCH_SIZE by default). Rows rejected by
+        the database are reported without failing the rest of their batch; if a
+        batch fails for any other reason, its rows not inserted yet and all later
+        rows are not attempted.
+        restore keeps the status and image columns of exported reports and replaces
+        reports that already exist.
+        Returns the created/invalid/failed counts and a result per report, in order.
+        """
+        from django.conf import settings
+
+        # Form validation of thousands of rows would hold up the event loop
+        valid, results = await sync_to_async(self._validate_bulk, thread_sensitive=False)(reports, restore)
+        created = []
+        stopped = False
+
+        for batch in self._batches(valid, batch_size or settings.INGEST_BATCH_SIZE):
+            # Halves of a split batch inserted before a failure still count as created
+            errors = [BULK_NOT_ATTEMPTED] * len(batch)
+            if not stopped:
+                try:
+                    await self._insert_batch(batch, errors, restore=restore)
+                except Exception as e:
+                    logger.error("Bulk insert error after %s reports: %s", len(created), e, exc_info=True)
+                    stopped = True
+
+            for (index, report_data), error in zip(batch, errors):
+                if error:
+                    results[index] = {'status': 'failed', 'error': error}
+                else:
+                    results[index] = {'status': 'created', 'id': report_data['id']}
+                    created.append(report_data)
+
+        if created:
+            if restore:
+                await _offload(self.cache.delete_reports)([report_data['id'] for report_data in created])
+            await _offload(self.cache.invalidate_lists)()
+            await sync_to_async(search.index_reports)(created)
+            await sync_to_async(replica.apply_reports)(created)
+            await _offload(events.reports_imported)(len(created))
+
+        summary = self._bulk_summary(results)
+        logger.info("Bulk insert: %s created, %s invalid, %s failed",
+                    summary['created'], summary['invalid'], summary['failed'])
+        return summary
+
+    async def get_all_reports(self):
+        """
+        Fetch all reports from the database.
+        """
+        try:
+            logger.info("Fetching all reports")
+            response = await self.client.table('reports').select('*').order('created_at', desc=True).execute()
+
+            logger.info("Retrieved %s reports", len(response.data))
+            return response.data
+
+        except Exception as e:
+            logger.error("Database fetch error: %s", e, exc_info=True)
+            return []
+
+    async def _fetch_page(self, page_size, cursor=None, columns=LIST_COLUMNS, count=None, table='reports',
+                          **filters):
+        """
+        Fetch one keyset page of reports, newest first.
+        Returns (rows, next_cursor, count). Errors are raised to the caller.
+        """
+        response = await self._page_query(page_size, cursor, columns, count, table, **filters).execute()
+        rows, next_cursor = self._split_page(response.data, page_size)
+        return rows, next_cursor, response.count
+
+    async def list_reports(self, page_size=DEFAULT_PAGE_SIZE, cursor=None, status=None, category=None,
+                           date_from=None, date_to=None, columns=LIST_COLUMNS, archived=False):
+        """
+        Fetch one page of reports, newest first, using keyset pagination on (created_at, id).
+        Returns the same dict as SupabaseClient.list_reports().
+        """
+        page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+        cache_params = self._page_cache_params(
+            page_size, cursor, columns, archived=archived,
+            status=status, category=category, date_from=date_from, date_to=date_to,
+        )
+        cached = await _offload(self.cache.get_page)(cache_params)
+        if cached is not None:
+            return cached
+
+        try:
+            logger.info("Fetching reports page (size=%s, status=%s, category=%s, archived=%s)",
+                        page_size, status, category, archived)
+            rows, next_cursor, total_count = await self._fetch_page(
+                page_size, cursor, columns, count='estimated', table=ARCHIVE_TABLE if archived else 'reports',
+                status=status, category=category, date_from=date_from, date_to=date_to,
+            )
+
+            logger.info("Retrieved %s reports", len(rows))
+            page = {
+                'reports': rows,
+                'next_cursor': next_cursor,
+                'total_count': total_count,
+            }
+            await _offload(self.cache.set_page)(cache_params, page)
+            return page
+
+        except Exception as e:
+            logger.error("Database fetch error: %s", e, exc_info=True)
+            return {'reports': [], 'next_cursor': None, 'total_count': None}
+
+    async def search_reports(self, text, limit=DEFAULT_PAGE_SIZE, status=None, category=None,
+                             date_from=None, date_to=None, columns=LIST_COLUMNS):
+        """
+        Full-text search over report descriptions and locations, best match first.
+        Returns the same dict as SupabaseClient.search_reports().
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        filters = {'status': status, 'category': category, 'date_from': date_from, 'date_to': date_to}
+        cache_params = self._page_cache_params(limit, None, columns, search=text, **filters)
+        cached = await _offload(self.cache.get_page)(cache_params)
+        if cached is not None:
+            return cached
+
+        try:
+            logger.info("Searching reports for: %s", text)
+            try:
+                rows = (await self._search_query(text, limit, columns, **filters).execute()).data
+            except Exception as e:
+                if not await sync_to_async(search.local_index_available)():
+                    raise
+                logger.warning("search_reports() unavailable, using the local index: %s", e)
+                report_ids = await sync_to_async(search.search_ids)(text, MAX_PAGE_SIZE)
+                responses = await asyncio.gather(
+                    *(query.execute() for query in self._local_search_queries(report_ids, columns, **filters))
+                )
+                rows = self._ranked([row for response in responses for row in response.data], report_ids, limit)
+
+            logger.info("Search matched %s reports", len(rows))
+            page = {
+                'reports': rows,
+                'next_cursor': None,
+                'total_count': len(rows),
+            }
+            await _offload(self.cache.set_page)(cache_params, page)
+            return page
+
+        except Exception as e:
+            logger.error("Database search error: %s", e, exc_info=True)
+            return {'reports': [], 'next_cursor': None, 'total_count': None}
+
+    async def iter_reports(self, batch_size=EXPORT_BATCH_SIZE, columns=('*',), status=None, category=None,
+                           date_from=None, date_to=None):
+        """
+        Asynchronously yield every report matching the filters, newest first,
+        one batch per request. Errors are raised to the caller.
+        """
+        cursor = None
+        fetched = 0
+        while True:
+            try:
+                rows, cursor, _ = await self._fetch_page(
+                    batch_size, cursor, columns,
+                    status=status, category=category, date_from=date_from, date_to=date_to,
+                )
+            except Exception as e:
+                logger.error("Database fetch error after %s reports: %s", fetched, e, exc_info=True)
+                raise
+
+            fetched += len(rows)
+            for row in rows:
+                yield row
+
+            if cursor is None:
+                break
+
+        logger.info("Iterated over %s reports", fetched)
+
+    async def iter_changes(self, column, since=None, batch_size=EXPORT_BATCH_SIZE):
+        """
+        Asynchronously yield every report changed at or after since, oldest first.
+        See SupabaseClient.iter_changes(). Errors are raised to the caller.
+        """
+        after_id = None
+        while True:
+            rows = (await self._changes_query(column, batch_size, since, after_id).execute()).data
+            for row in rows:
+                yield row
+            if len(rows) < batch_size:
+                break
+            since, after_id = rows[-1][column], rows[-1]['id']
+
+    async def get_report_stats(self, days=STATS_DAYS):
+        """
+        Count reports per status, per category and per day.
+        Returns the same dict as SupabaseClient.get_report_stats().
+        """
+        cached = await _offload(self.cache.get_stats)(days)
+        if cached is not None:
+            return cached
+
+        try:
+            logger.info("Fetching report statistics")
+            response = await self.client.rpc('report_stats', {'days_back': days}).execute()
+            stats = self._normalize_stats(response.data, days)
+        except Exception as e:
+            logger.warning("report_stats() unavailable, counting per group instead: %s", e)
+            try:
+                queries = self._stats_count_queries()
+                responses = await asyncio.gather(*(query.execute() for query in queries.values()))
+                counts = {group: response.count for group, response in zip(queries, responses)}
+                stats = self._normalize_stats(self._stats_from_counts(counts), days)
+            except Exception as e:
+                logger.error("Database stats error: %s", e, exc_info=True)
+                return None
+
+        await _offload(self.cache.set_stats)(days, stats)
+        return stats
+
+    async def get_report(self, report_id):
+        """
+        Fetch a single report by ID.
+        """
+        cached = await _offload(self.cache.get_report)(report_id)
+        if cached is not None:
+            return cached
+
+        try:
+            logger.info("Fetching report with ID: %s", report_id)
+            response = await self.client.table('reports').select('*').eq('id', report_id).execute()
+
+            if response.data:
+                logger.info("Report found: %s", report_id)
+                await _offload(self.cache.set_report)(response.data[0])
+                return response.data[0]
+            else:
+                logger.warning("Report not found: %s", report_id)
+                return None
+
+        except Exception as e:
+            logger.error("Database fetch error for report %s: %s", report_id, e, exc_info=True)
+            return None
+
+    async def get_archived_report(self, report_id):
+        """
+        Fetch a single report from the archive by ID (not cached).
+        """
+        try:
+            logger.info("Fetching archived report with ID: %s", report_id)
+            response = await self.archive_client.table(ARCHIVE_TABLE).select('*').eq('id', report_id).execute()
+            return response.data[0] if response.data else None
+
+        except Exception as e:
+            logger.error("Archive fetch error for report %s: %s", report_id, e, exc_info=True)
+            return None
+
+    async def update_report_status(self, report_id, status):
+        """
+        Update the status of a report.
+        """
+        try:
+            logger.info("Updating report %s status to: %s", report_id, status)
+            response = await self.client.table('reports').update({'status': status}).eq('id', report_id).execute()
+
+            if response.data:
+                logger.info("Report %s status updated successfully", report_id)
+                await _offload(self.cache.set_report)(response.data[0])
+                await _offload(self.cache.invalidate_lists)()
+                await sync_to_async(replica.apply_reports)(response.data)
+                await _offload(events.reports_updated)(response.data)
+                return response.data[0]
+            else:
+                logger.warning("Report %s status update returned no data", report_id)
+                return None
+
+        except Exception as e:
+            logger.error("Database update error for report %s: %s", report_id, e, exc_info=True)
+            return None
+
+    async def delete_report(self, report_id):
+        """
+        Delete a report by ID.
+        """
+        try:
+            logger.info("Deleting report with ID: %s", report_id)
+            await self.client.table('reports').delete().eq('id', report_id).execute()
+            await _offload(self.cache.delete_report)(report_id)
+            await _offload(self.cache.invalidate_lists)()
+            await sync_to_async(search.remove_reports)([report_id])
+            await sync_to_async(replica.apply_deletes)([report_id])
+            await _offload(events.reports_deleted)([report_id])
+
+            logger.info("Report %s deleted successfully", report_id)
+            return True
+
+        except Exception as e:
+            logger.error("Database delete error for report %s: %s", report_id, e, exc_info=True)
+            return False
+
+
+    async def update_reports_status(self, report_ids, status):
+        """
+        Update the status of many reports, one request per batch of IDs.
+        Returns the number of reports updated, or None if any batch failed.
+        """
+        updated = 0
+        try:
+            for batch in self._batches(report_ids):
+                logger.info("Updating %s reports status to: %s", len(batch), status)
+                query = self.client.table('reports').update({'status': status}).in_('id', batch)
+                response = await self._ids_only(query).execute()
+                updated += len(response.data)
+                await _offload(self.cache.delete_reports)(batch)
+                await sync_to_async(replica.apply_status)(batch, status)
+                await _offload(events.status_changed)([row['id'] for row in response.data], status)
+
+            logger.info("Updated status of %s reports to %s", updated, status)
+            return updated
+
+        except Exception as e:
+            logger.error("Bulk update error after %s reports: %s", updated, e, exc_info=True)
+            return None
+        finally:
+            await _offload(self.cache.invalidate_lists)()
+
+    async def delete_reports(self, report_ids):
+        """
+        Delete many reports, one request per batch of IDs.
+        Returns the number of reports deleted, or None if any batch failed.
+        """
+        deleted = 0
+        try:
+            for batch in self._batches(report_ids):
+                logger.info("Deleting %s reports", len(batch))
+                query = self.client.table('reports').delete().in_('id', batch)
+                response = await self._ids_only(query).execute()
+                deleted += len(response.data)
+                await _offload(self.cache.delete_reports)(batch)
+                await sync_to_async(search.remove_reports)(batch)
+                await sync_to_async(replica.apply_deletes)(batch)
+                await _offload(events.reports_deleted)([row['id'] for row in response.data])
+
+            logger.info("Deleted %s reports", deleted)
+            return deleted
+
+        except Exception as e:
+            logger.error("Bulk delete error after %s reports: %s", deleted, e, exc_info=True)
+            return None
+        finally:
+            await _offload(self.cache.invalidate_lists)()
+
+    async def archive_batch(self, statuses, created_before, limit=ARCHIVE_BATCH_SIZE):
+        """
+        Move up to limit matching reports into the archive table, oldest first.
+        Returns the archived rows; errors are raised to the caller.
+        """
+        response = await self.archive_client.rpc('archive_reports', {
+            'statuses': list(statuses) if statuses else None,
+            'created_before': created_before.isoformat(),
+            'max_rows': limit,
+        }).execute()
+
+        report_ids = [row['id'] for row in response.data]
+        if report_ids:
+            logger.info("Archived %s reports", len(report_ids))
+            await _offload(self.cache.delete_reports)(report_ids)
+            await _offload(self.cache.invalidate_lists)()
+            await sync_to_async(search.remove_reports)(report_ids)
+            await sync_to_async(replica.apply_deletes)(report_ids)
+            await _offload(events.reports_deleted)(report_ids)
+        return response.data
+
+    async def restore_reports(self, report_ids):
+        """
+        Move archived reports back into the reports table, one request per batch of IDs.
+        Returns the number of reports restored, or None if any batch failed.
+        """
+        restored = []
+        try:
+            for batch in self._batches(report_ids):
+                logger.info("Restoring %s archived reports", len(batch))
+                response = await self.archive_client.rpc('restore_archived_reports',
+                                                         {'report_ids': batch}).execute()
+                restored.extend(response.data)
+
+            logger.info("Restored %s reports", len(restored))
+            return len(restored)
+
+        except Exception as e:
+            logger.error("Restore error after %s reports: %s", len(restored), e, exc_info=True)
+            return None
+        finally:
+            if restored:
+                await _offload(self.cache.invalidate_lists)()
+                await sync_to_async(search.index_reports)(restored)
+                await sync_to_async(replica.apply_reports)(restored)
+                await _offload(events.reports_imported)(len(restored))
+
+    async def upload_archive(self, filename, file_obj):
+        """
+        Upload an archive file to the private REPORT_ARCHIVE_BUCKET.
+        Errors are raised to the caller.
+        """
+        from django.conf import settings
+
+        logger.info("Uploading archive: %s to bucket: %s", filename, settings.REPORT_ARCHIVE_BUCKET)
+        await aupload_stream(self.archive_client.storage.session, settings.REPORT_ARCHIVE_BUCKET, filename, file_obj,
+                             'application/gzip')
+
+
+# One instance per event loop: httpx async connections cannot be shared across loops
+_async_instances = weakref.WeakKeyDictionary()
+_async_lock = weakref.WeakKeyDictionary()
+
+async def aget_supabase_client():
+    """
+    Get or create the async Supabase client for the running event loop.
+    Resets the instance if URL changes (for hot reloading during development).
+    """
+    from django.conf import settings
+
+    loop = asyncio.get_running_loop()
+    lock = _async_lock.setdefault(loop, asyncio.Lock())
+
+    async with lock:
+        instance = _async_instances.get(loop)
+        if instance is not None and instance.url != settings.SUPABASE_URL:
+            logger.info("Supabase URL changed from %s to %s, resetting client", instance.url, settings.SUPABASE_URL)
+            instance = None
+
+        if instance is None:
+            instance = await AsyncSupabaseClient.create()
+            _async_instances[loop] = instance
+
+    return instance
@@ -0,0 +1,84 @@
+"""
+Async views for reports app
+
+Used instead of the views in views.py when ASYNC_VIEWS is enabled.
+"""
+
+import logging
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import render, redirect
+from core.decorators import api_token_required, async_require_http_methods
+from .async_supabase_client import aget_supabase_client
+from .circuit import get_breaker
+from .forms import ReportForm
+from .outbox import enqueue_report
+from .views import add_submission_error, ingest_unavailable, read_bulk_reports
+
+logger = logging.getLogger(__name__)
+
+@async_require_http_methods(["GET", "POST"])
+async def submit_report(request):
+    """
+    Handle anonymous report submission
+    """
+    if request.method == 'POST':
+        form = ReportForm(request.POST, request.FILES)
+        
+        if form.is_valid():
+            fields = form.report_fields()
+            image_file = request.FILES.get('image')
+            
+            try:
+                # Acknowledge immediately; drain_outbox delivers it to Supabase.
+                # Direct submissions also go to the outbox while Supabase is failing.
+                if settings.REPORT_OUTBOX_ENABLED or get_breaker().is_open():
+                    await sync_to_async(enqueue_report)(image=image_file, **fields)
+                    return redirect('report_submitted')
+                
+                # Upload the image and insert the report concurrently
+                supabase = await aget_supabase_client()
+                report = await supabase.submit_report(image_file=image_file, **fields)
+                
+                if report:
+                    return redirect('report_submitted')
+                elif get_breaker().is_open():
+                    # Supabase went down during the submission; keep the report locally
+                    await sync_to_async(enqueue_report)(image=image_file, **fields)
+                    return redirect('report_submitted')
+                else:
+                    form.add_error(None, 'Failed to submit report. Please try again.')
+            
+            except Exception as e:
+                add_submission_error(form, e)
+    else:
+        form = ReportForm()
+    
+    context = {
+        'form': form,
+    }
+    return render(request, 'report_form.html', context)
+
+
+@api_token_required
+@async_require_http_methods(["POST"])
+async def bulk_ingest(request):
+    """
+    Create many reports from JSON, for partner systems and migrations.
+    Responds with the created/invalid/failed counts and a result per report.
+    """
+    reports, error = read_bulk_reports(request)
+    if error:
+        return error
+    if get_breaker().is_open():
+        return ingest_unavailable()
+    
+    try:
+        supabase = await aget_supabase_client()
+    except ValueError as e:
+        return ingest_unavailable(e)
+    
+    result = await supabase.create_reports_bulk(reports)
+    logger.info("Bulk ingestion of %s reports: %s created", len(reports), result['created'])
+    return JsonResponse(result)
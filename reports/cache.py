@@ -0,0 +1,126 @@
+"""
+Read-through cache for reports fetched from Supabase
+"""
+import hashlib
+import logging
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+LIST_VERSION_KEY = 'reports:list-version'
+MODIFIED_KEY = 'reports:modified-at'
+
+
+class ReportCache:
+    """
+    Caches single reports, dashboard pages and statistics in the Django cache named by
+    settings.REPORT_CACHE_ALIAS.
+
+    Listing pages are keyed on a version number stored in the cache itself;
+    any write bumps the version, which orphans every cached page at once.
+    The time of that write is kept too, for Last-Modified headers.
+    """
+
+    def __init__(self):
+        self.cache = caches[settings.REPORT_CACHE_ALIAS]
+        self.detail_timeout = settings.REPORT_CACHE_TIMEOUT
+        self.list_timeout = settings.REPORT_CACHE_LIST_TIMEOUT
+        self.stats_timeout = settings.REPORT_CACHE_STATS_TIMEOUT
+        self.image_timeout = settings.REPORT_CACHE_IMAGE_TIMEOUT
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        """Return hit/miss counters for this process"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            }
+
+    @staticmethod
+    def _report_key(report_id):
+        return f'reports:detail:{report_id}'
+
+    def _list_version(self):
+        version = self.cache.get(LIST_VERSION_KEY)
+        if version is None:
+            # Seed from the clock so a lost version key never revives old pages
+            self.cache.add(LIST_VERSION_KEY, time.time_ns(), timeout=None)
+            version = self.cache.get(LIST_VERSION_KEY)
+        return version
+
+    def _list_key(self, params):
+        digest = hashlib.sha256(repr(sorted(params.items())).encode()).hexdigest()
+        return f'reports:list:{self._list_version()}:{digest}'
+
+    def get_report(self, report_id):
+        report = self.cache.get(self._report_key(report_id))
+        self._record(report is not None)
+        return report
+
+    def set_report(self, report):
+        if report and report.get('id'):
+            self.cache.set(self._report_key(report['id']), report, self.detail_timeout)
+
+    def delete_report(self, report_id):
+        self.cache.delete(self._report_key(report_id))
+
+    def delete_reports(self, report_ids):
+        self.cache.delete_many([self._report_key(report_id) for report_id in report_ids])
+
+    def get_page(self, params):
+        page = self.cache.get(self._list_key(params))
+        self._record(page is not None)
+        return page
+
+    def set_page(self, params, page):
+        self.cache.set(self._list_key(params), page, self.list_timeout)
+
+    def get_stats(self, days):
+        stats = self.cache.get(self._list_key({'stats': days}))
+        self._record(stats is not None)
+        return stats
+
+    def set_stats(self, days, stats):
+        self.cache.set(self._list_key({'stats': days}), stats, self.stats_timeout)
+
+    def get_stored_image(self, digest):
+        """Object names already stored for an image with this content hash, or None"""
+        return self.cache.get(f'reports:image:{digest}')
+
+    def set_stored_image(self, digest, objects):
+        """Remember the object names (report URL field -> name) stored for an image"""
+        self.cache.set(f'reports:image:{digest}', objects, self.image_timeout)
+
+    def last_modified(self):
+        """Unix time of the last write made through the app"""
+        modified = self.cache.get(MODIFIED_KEY)
+        if modified is None:
+            # Unknown (evicted or never written); assume it was just now
+            self.cache.add(MODIFIED_KEY, time.time(), timeout=None)
+            modified = self.cache.get(MODIFIED_KEY, time.time())
+        return modified
+
+    def invalidate_lists(self):
+        """Orphan every cached listing page"""
+        try:
+            self.cache.incr(LIST_VERSION_KEY)
+        except ValueError:
+            # Version key was evicted; start a new sequence
+            self.cache.set(LIST_VERSION_KEY, time.time_ns(), timeout=None)
+        self.cache.set(MODIFIED_KEY, time.time(), timeout=None)
+        logger.debug("Invalidated cached report listings")
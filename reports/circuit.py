@@ -0,0 +1,145 @@
+"""
+Circuit breaker for Supabase requests
+
+Every request to Supabase passes through the breaker (see transport.py).
+Connection errors, timeouts and 5xx responses count as failures. Once at
+least CIRCUIT_MIN_REQUESTS requests were made in the last CIRCUIT_WINDOW
+seconds and CIRCUIT_FAILURE_RATE of them failed, the circuit opens: requests
+fail immediately with CircuitOpenError instead of waiting on a struggling
+upstream. After CIRCUIT_RESET_TIMEOUT seconds a single probe request is let
+through (half-open); its outcome closes or reopens the circuit.
+
+State is per process.
+"""
+import time
+import logging
+import threading
+from collections import deque
+import httpx
+from django.conf import settings
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of sending a request while the circuit is open"""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_rate, min_requests, window, reset_timeout):
+        self.failure_rate = failure_rate
+        self.min_requests = min_requests
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._results = deque()  # (timestamp, succeeded)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            failure_rate=settings.CIRCUIT_FAILURE_RATE,
+            min_requests=settings.CIRCUIT_MIN_REQUESTS,
+            window=settings.CIRCUIT_WINDOW,
+            reset_timeout=settings.CIRCUIT_RESET_TIMEOUT,
+        )
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def is_open(self):
+        """Whether requests are currently being refused"""
+        return self.state == OPEN
+
+    def before_request(self):
+        """
+        Raise CircuitOpenError if the request must not be sent.
+        When the reset timeout has passed, lets exactly one probe request through.
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+        raise CircuitOpenError('Supabase circuit is open; not sending request')
+
+    def record(self, succeeded):
+        """Record the outcome of a request that was sent"""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == HALF_OPEN:
+                self._probing = False
+                if succeeded:
+                    logger.info("Supabase circuit closed")
+                    self._state = CLOSED
+                    self._results.clear()
+                else:
+                    self._trip(now)
+                return
+            if self._state == OPEN:
+                # A request sent before the circuit opened
+                return
+
+            self._results.append((now, succeeded))
+            while self._results and self._results[0][0] < now - self.window:
+                self._results.popleft()
+
+            failures = sum(1 for _, ok in self._results if not ok)
+            if len(self._results) >= self.min_requests and failures / len(self._results) >= self.failure_rate:
+                self._trip(now)
+
+    def _trip(self, now):
+        logger.error("Supabase circuit opened for %ss after repeated failures", self.reset_timeout)
+        self._state = OPEN
+        self._opened_at = now
+        self._results.clear()
+
+    def snapshot(self):
+        """Current state and window counts, for monitoring"""
+        state = self.state
+        with self._lock:
+            failures = sum(1 for _, ok in self._results if not ok)
+            return {'state': state, 'requests': len(self._results), 'failures': failures}
+
+
+def is_failure(response):
+    # Client errors (bad request, missing table, conflict) say nothing about upstream health
+    return response.status_code >= 500
+
+
+# Singleton instance
+_breaker = None
+_breaker_lock = threading.Lock()
+
+def get_breaker():
+    """
+    Get or create the process-wide circuit breaker for Supabase requests.
+    """
+    global _breaker
+
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker.from_settings()
+    return _breaker
+
+
+metrics.gauge(
+    'supabase_circuit_open',
+    '1 while the Supabase circuit breaker is refusing requests',
+    lambda: int(get_breaker().is_open()),
+)
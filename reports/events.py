@@ -0,0 +1,107 @@
+"""
+Change events for live dashboards
+
+Writes made through SupabaseClient append a small event (a report's list
+columns, or just IDs and a status) to a log kept in the report cache: a
+sequence number plus one cache entry per event, expiring after
+REPORT_EVENTS_RETENTION seconds. The dashboard's event stream polls the log
+and forwards new events to the browser.
+
+The log is only shared between processes when the report cache is (REDIS_URL),
+so nothing is published unless REPORT_LIVE_UPDATES is on, which it is by default
+only with REDIS_URL. Events are best effort: an evicted or expired event is
+skipped, and a reader that falls too far behind is told to reload.
+"""
+import logging
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+SEQUENCE_KEY = 'reports:events:last-id'
+
+CREATED = 'created'
+UPDATED = 'updated'
+STATUS = 'status'
+DELETED = 'deleted'
+RELOAD = 'reload'
+
+# Events returned by one read; a reader further behind than this reloads instead
+MAX_BACKLOG = 200
+
+
+def _cache():
+    return caches[settings.REPORT_CACHE_ALIAS]
+
+
+def _event_key(event_id):
+    return f'reports:events:{event_id}'
+
+
+def _list_row(report):
+    from .supabase_client import LIST_COLUMNS
+
+    return {column: report.get(column) for column in LIST_COLUMNS}
+
+
+def publish(event_type, **data):
+    """Append an event to the log; errors are logged, never raised"""
+    if not settings.REPORT_LIVE_UPDATES:
+        return None
+    try:
+        cache = _cache()
+        cache.add(SEQUENCE_KEY, 0, timeout=None)
+        event_id = cache.incr(SEQUENCE_KEY)
+        cache.set(_event_key(event_id), {'id': event_id, 'type': event_type, **data},
+                  timeout=settings.REPORT_EVENTS_RETENTION)
+        return event_id
+    except Exception as e:
+        logger.warning("Could not publish %s event: %s", event_type, e)
+        return None
+
+
+def reports_created(reports):
+    for report in reports:
+        publish(CREATED, report=_list_row(report))
+
+
+def reports_imported(count):
+    """Many reports were inserted at once: dashboards offer a reload instead of a row each"""
+    if count:
+        publish(RELOAD, count=count)
+
+
+def reports_updated(reports):
+    for report in reports:
+        publish(UPDATED, report=_list_row(report))
+
+
+def status_changed(report_ids, status):
+    if report_ids:
+        publish(STATUS, ids=[str(report_id) for report_id in report_ids], status=status)
+
+
+def reports_deleted(report_ids):
+    if report_ids:
+        publish(DELETED, ids=[str(report_id) for report_id in report_ids])
+
+
+def last_id():
+    """ID of the newest event, or 0"""
+    return _cache().get(SEQUENCE_KEY) or 0
+
+
+def read(after):
+    """
+    Return the events after the given event ID, oldest first, and the ID to
+    read after next time. A reader more than MAX_BACKLOG events behind (or
+    ahead, after the cache was cleared) gets a single RELOAD event instead.
+    """
+    newest = last_id()
+    if newest == after:
+        return [], after
+    if after > newest or newest - after > MAX_BACKLOG:
+        return [{'id': newest, 'type': RELOAD}], newest
+
+    found = _cache().get_many([_event_key(event_id) for event_id in range(after + 1, newest + 1)])
+    return [found[key] for key in sorted(found, key=lambda key: found[key]['id'])], newest
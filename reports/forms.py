@@ -4,6 +4,7 @@ Forms for reports app
 
 from django import forms
 from django.core.exceptions import ValidationError
+from .validation import CONTENT_TYPES, validate_image
 
 
 class ReportForm(forms.Form):
@@ -56,27 +57,23 @@ class ReportForm(forms.Form):
         max_length=255
     )
     
-    image = forms.ImageField(
+    # A plain FileField: ImageField would open the whole upload with Pillow
+    image = forms.FileField(
         label='Upload Image (Optional)',
         required=False,
         widget=forms.FileInput(attrs={
-            'accept': 'image/*',
+            'accept': ','.join(CONTENT_TYPES.values()),
             'class': 'form-control'
         })
     )
     
     def clean_image(self):
-        """Validate image file size and type"""
+        """Validate image file size, type and dimensions from its headers"""
         image = self.cleaned_data.get('image')
         if image:
-            # Check file size (5MB max)
-            if image.size > 5242880:
-                raise ValidationError('Image file size must be under 5MB')
-            
-            # Check file type
-            valid_types = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
-            if image.content_type not in valid_types:
-                raise ValidationError('Only JPEG, PNG, GIF, and WebP images are allowed')
+            info = validate_image(image)
+            # Trust the sniffed type, not the one the browser sent
+            image.content_type = info.content_type
         
         return image
     
@@ -92,3 +89,22 @@ class ReportForm(forms.Form):
                 raise ValidationError('Description must be at least 10 characters long')
         
         return description
+    
+    def rebind(self, data):
+        """
+        Validate other data with this form instance (bulk ingestion), skipping
+        the copy of every field that creating a form makes
+        """
+        self.data = data
+        self.is_bound = True
+        self._errors = None
+        return self
+    
+    def report_fields(self):
+        """Return the cleaned text fields as create_report() keyword arguments"""
+        return {
+            'description': self.cleaned_data['description'],
+            'category': self.cleaned_data.get('category') or None,
+            'location': self.cleaned_data.get('location') or None,
+            'username': self.cleaned_data.get('username') or None,
+        }
@@ -0,0 +1,78 @@
+"""
+Image processing for uploaded report images
+
+Uploads are re-encoded before storage: orientation is applied, EXIF and other
+metadata are dropped, the image is downsized to IMAGE_MAX_DIMENSION and saved
+as WebP, and a small WebP thumbnail is generated alongside it. Animated images
+keep their frames and size but are re-encoded as animated WebP all the same,
+so the uploaded bytes, and any location data in them, are never published.
+"""
+import io
+import logging
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+WEBP_CONTENT_TYPE = 'image/webp'
+
+
+class ImageProcessingError(Exception):
+    """Raised when an uploaded image cannot be re-encoded; it must not be stored"""
+
+
+def _encode_webp(image, name, quality, **options):
+    buffer = io.BytesIO()
+    # Metadata is emptied explicitly rather than left to the encoder's defaults
+    image.save(buffer, format='WEBP', quality=quality, method=4, exif=b'', xmp=b'', icc_profile=None, **options)
+    content = ContentFile(buffer.getvalue(), name=name)
+    content.content_type = WEBP_CONTENT_TYPE
+    return content
+
+
+def _to_rgb(image):
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        return image.convert('RGBA')
+    return image.convert('RGB')
+
+
+def process_image(file_obj):
+    """
+    Re-encode an uploaded image.
+    Returns (image, thumbnail) as WebP ContentFiles with a content_type attribute.
+    Raises ImageProcessingError if the file cannot be processed.
+    """
+    max_dimension = settings.IMAGE_MAX_DIMENSION
+    thumbnail_size = settings.IMAGE_THUMBNAIL_SIZE
+    quality = settings.IMAGE_WEBP_QUALITY
+
+    try:
+        file_obj.seek(0)
+        with Image.open(file_obj) as original:
+            if getattr(original, 'is_animated', False):
+                # Every frame is re-encoded; only the timing is carried over
+                processed = _encode_webp(original, 'image.webp', quality, save_all=True)
+            else:
+                processed = None
+                # JPEG can decode straight to a reduced scale, skipping most of the work
+                original.draft('RGB', (max_dimension, max_dimension))
+            original.seek(0)
+            image = _to_rgb(ImageOps.exif_transpose(original))
+
+        if processed is None:
+            resized = image.copy()
+            resized.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+            processed = _encode_webp(resized, 'image.webp', quality)
+
+        image.thumbnail((thumbnail_size, thumbnail_size), Image.LANCZOS)
+        thumbnail = _encode_webp(image, 'thumbnail.webp', quality)
+    except Exception as e:
+        logger.warning("Image processing failed: %s", e)
+        raise ImageProcessingError(str(e)) from e
+    finally:
+        file_obj.seek(0)
+
+    logger.info("Processed image: %s -> %s bytes, thumbnail %s bytes",
+                getattr(file_obj, 'size', '?'), processed.size, thumbnail.size)
+    return processed, thumbnail
@@ -0,0 +1,85 @@
+"""
+Command to move archived and aged reports out of the reports table into reports_archive
+"""
+
+import os
+import tempfile
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from reports import transfer
+from reports.supabase_client import ARCHIVE_BATCH_SIZE, REPORT_STATUSES, get_supabase_client
+
+class Command(BaseCommand):
+    help = 'Move archived reports older than REPORT_ARCHIVE_AFTER_DAYS into the reports_archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--status', action='append', choices=REPORT_STATUSES,
+                            help='Status to archive, repeatable; default: REPORT_ARCHIVE_STATUSES')
+        parser.add_argument('--all-statuses', action='store_true',
+                            help='Archive reports of any status that are old enough')
+        parser.add_argument('--older-than', type=int, default=settings.REPORT_ARCHIVE_AFTER_DAYS, metavar='DAYS',
+                            help='Only reports submitted more than this many days ago')
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, help='Reports moved per request')
+        parser.add_argument('--to-storage', action='store_true',
+                            help='Also upload the moved reports as a gzipped JSON Lines file to REPORT_ARCHIVE_BUCKET')
+
+    def handle(self, *args, **options):
+        if options['older_than'] < 0 or options['batch_size'] < 1:
+            raise CommandError('--older-than must not be negative and --batch-size must be positive')
+        statuses = None if options['all_statuses'] else options['status'] or settings.REPORT_ARCHIVE_STATUSES
+        created_before = timezone.now() - timedelta(days=options['older_than'])
+
+        supabase = get_supabase_client()
+        archived = 0
+        path = None
+        try:
+            if options['to_storage']:
+                fd, path = tempfile.mkstemp(prefix='reports-archive-', suffix='.jsonl.gz')
+                os.close(fd)
+                with transfer.open_writer(path, transfer.JSONL, transfer.GZIP) as writer:
+                    archived = self._archive(supabase, statuses, created_before, options['batch_size'], writer)
+            else:
+                archived = self._archive(supabase, statuses, created_before, options['batch_size'])
+        except Exception as e:
+            if path and not archived:
+                os.unlink(path)
+                path = None
+            kept = f'; the moved reports are in {path}' if path else ''
+            raise CommandError(f'Archiving failed after {archived} reports: {e}{kept}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} reports submitted before {created_before:%Y-%m-%d}"
+            f"{'' if statuses is None else ' with status ' + ', '.join(statuses)}"
+        ))
+        if path:
+            self._upload(supabase, path, archived)
+
+    def _archive(self, supabase, statuses, created_before, batch_size, writer=None):
+        """Move batches until one comes back short; the moved rows are also written to writer"""
+        archived = 0
+        while True:
+            rows = supabase.archive_batch(statuses, created_before, batch_size)
+            if writer:
+                for row in rows:
+                    writer.write(row)
+            archived += len(rows)
+            if len(rows) < batch_size:
+                return archived
+            self.stdout.write(f'Archived {archived} reports so far')
+
+    def _upload(self, supabase, path, archived):
+        """Upload the file of moved reports; it is kept locally if that fails"""
+        if not archived:
+            os.unlink(path)
+            return
+        filename = f"reports-archive-{timezone.now():%Y%m%dT%H%M%SZ}.jsonl.gz"
+        try:
+            with open(path, 'rb') as file_obj:
+                supabase.upload_archive(filename, file_obj)
+        except Exception as e:
+            raise CommandError(f'Upload to {settings.REPORT_ARCHIVE_BUCKET} failed: {e}; '
+                               f'the archived reports are in {path}')
+        os.unlink(path)
+        self.stdout.write(f'Uploaded {filename} to {settings.REPORT_ARCHIVE_BUCKET}')
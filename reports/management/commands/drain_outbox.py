@@ -0,0 +1,64 @@
+"""
+Command to deliver queued report submissions to Supabase
+"""
+
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from reports import outbox
+from reports.models import PendingReport
+
+class Command(BaseCommand):
+    help = 'Deliver queued report submissions from the local outbox to Supabase'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Process the due reports once and exit instead of polling')
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument('--max-attempts', type=int, default=settings.OUTBOX_MAX_ATTEMPTS)
+        parser.add_argument('--interval', type=float, default=settings.OUTBOX_POLL_INTERVAL,
+                            help='Seconds to sleep when the outbox is empty')
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Requeue reports that exhausted their attempts before starting')
+        parser.add_argument('--purge-days', type=int, default=7,
+                            help='Delete delivered outbox rows older than this many days')
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            requeued = PendingReport.objects.filter(status=PendingReport.STATUS_FAILED).update(
+                status=PendingReport.STATUS_PENDING, attempts=0
+            )
+            self.stdout.write(f'Requeued {requeued} failed reports')
+
+        purged = outbox.purge_sent(options['purge_days'])
+        if purged:
+            self.stdout.write(f'Purged {purged} delivered reports')
+
+        try:
+            while True:
+                try:
+                    counts = outbox.drain(options['batch_size'], options['max_attempts'])
+                except Exception as e:
+                    # Configuration or local database errors; keep the worker alive
+                    if options['once']:
+                        raise
+                    self.stderr.write(f'Outbox drain failed: {e}')
+                    time.sleep(options['interval'])
+                    continue
+
+                if any(counts.values()):
+                    self.stdout.write(
+                        f"Sent {counts['sent']}, retrying {counts['retried']}, failed {counts['failed']}, "
+                        f"deferred {counts['deferred']}"
+                    )
+
+                if options['once']:
+                    break
+                # Keep draining while there is work; otherwise wait for new submissions
+                if not any(counts.values()) or counts['deferred']:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping outbox worker')
+            return
+
+        self.stdout.write(self.style.SUCCESS('Outbox drained'))
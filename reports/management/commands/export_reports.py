@@ -0,0 +1,62 @@
+"""
+Command to export reports from Supabase to a JSON Lines or Parquet file
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from reports import replica, transfer
+from reports.supabase_client import EXPORT_BATCH_SIZE, REPORT_STATUSES, get_supabase_client
+
+class Command(BaseCommand):
+    help = 'Export reports from Supabase to a JSON Lines or Parquet file, optionally compressed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Output file, e.g. reports.jsonl.zst or reports.parquet; '-' for stdout")
+        parser.add_argument('--format', choices=transfer.FORMATS,
+                            help='Default: from the file name, else jsonl')
+        parser.add_argument('--compression', choices=transfer.COMPRESSIONS,
+                            help='Default: from the file name (.gz, .zst); zstd for Parquet')
+        parser.add_argument('--since',
+                            help='Only reports changed at or after this ISO timestamp, e.g. the one '
+                                 'printed by the previous export')
+        parser.add_argument('--status', choices=REPORT_STATUSES)
+        parser.add_argument('--category')
+        parser.add_argument('--batch-size', type=int, default=EXPORT_BATCH_SIZE, help='Reports per Supabase request')
+
+    def handle(self, *args, **options):
+        path, since = options['path'], options['since']
+        if since and parse_datetime(since) is None:
+            raise CommandError(f'--since must be an ISO 8601 timestamp, not {since!r}')
+        # Keep stdout for the data when exporting to it
+        messages = self.stderr if path == '-' else self.stdout
+
+        supabase = get_supabase_client()
+        if since:
+            # Oldest change first, by updated_at where the table has it
+            column, reports = replica.changes_since(supabase, since, options['batch_size'])
+            messages.write(f'Exporting reports changed since {since} (by {column})')
+        else:
+            reports = supabase.iter_reports(options['batch_size'], status=options['status'],
+                                            category=options['category'])
+
+        exported = 0
+        latest = None
+        try:
+            with transfer.open_writer(path, options['format'], options['compression']) as writer:
+                for report in reports:
+                    # iter_changes() cannot filter, so these apply here for --since
+                    if since and options['status'] and report.get('status') != options['status']:
+                        continue
+                    if since and options['category'] and report.get('category') != options['category']:
+                        continue
+                    writer.write(report)
+                    exported += 1
+                    changed_at = transfer.changed_at(report)
+                    if changed_at and (latest is None or changed_at > latest):
+                        latest = changed_at
+        except (ImportError, ValueError) as e:
+            raise CommandError(str(e))
+
+        messages.write(self.style.SUCCESS(f'Exported {exported} reports'))
+        if latest:
+            messages.write(f'Export later changes with --since {latest.isoformat()}')
@@ -0,0 +1,70 @@
+"""
+Command to import reports into Supabase from a JSON Lines or Parquet file
+"""
+
+from itertools import islice
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from reports import transfer
+from reports.supabase_client import BULK_NOT_ATTEMPTED, get_supabase_client
+
+# Insert batches per create_reports_bulk() call; each call refreshes the
+# search index and replica and notifies dashboards once
+CHUNK_BATCHES = 10
+
+# Rejected reports listed individually before only counting them
+MAX_LISTED_ERRORS = 100
+
+class Command(BaseCommand):
+    help = 'Import reports from a JSON Lines or Parquet file (e.g. made by export_reports) into Supabase'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file, e.g. reports.jsonl.gz or reports.parquet; '-' for stdin")
+        parser.add_argument('--format', choices=transfer.FORMATS,
+                            help='Default: from the file name, else jsonl')
+        parser.add_argument('--compression', choices=transfer.COMPRESSIONS,
+                            help='Default: detected from the file contents')
+        parser.add_argument('--batch-size', type=int, default=settings.INGEST_BATCH_SIZE,
+                            help='Reports per insert request')
+        parser.add_argument('--skip', type=int, default=0,
+                            help='Skip this many reports, to resume an interrupted import')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        supabase = get_supabase_client()
+        totals = {'created': 0, 'invalid': 0, 'failed': 0}
+        position = options['skip']
+        listed = 0
+
+        try:
+            with transfer.open_reader(options['path'], options['format'], options['compression']) as reports:
+                reports = islice(reports, options['skip'], None)
+                while True:
+                    chunk = list(islice(reports, batch_size * CHUNK_BATCHES))
+                    if not chunk:
+                        break
+
+                    # Reports with an existing ID are replaced, so an import can be rerun
+                    summary = supabase.create_reports_bulk(chunk, batch_size, restore=True)
+                    for offset, result in enumerate(summary['results']):
+                        if result.get('error') == BULK_NOT_ATTEMPTED:
+                            raise CommandError(
+                                f"Supabase request failed after {totals['created'] + summary['created']} "
+                                f"reports were imported; resume with --skip {position + offset}"
+                            )
+                        if result['status'] != 'created':
+                            if listed < MAX_LISTED_ERRORS:
+                                self.stderr.write(f"Report {position + offset + 1}: "
+                                                  f"{result.get('errors') or result.get('error')}")
+                            listed += 1
+                    for key in totals:
+                        totals[key] += summary[key]
+                    position += len(chunk)
+        except (ImportError, ValueError) as e:
+            raise CommandError(f"{e} ({totals['created']} reports imported)")
+
+        if listed > MAX_LISTED_ERRORS:
+            self.stderr.write(f'... and {listed - MAX_LISTED_ERRORS} more rejected reports')
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {totals['created']} reports ({totals['invalid']} invalid, {totals['failed']} failed)"
+        ))
@@ -0,0 +1,35 @@
+"""
+Command to rebuild the local full-text search index from Supabase
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from reports import search
+from reports.supabase_client import get_supabase_client, EXPORT_BATCH_SIZE
+
+class Command(BaseCommand):
+    help = 'Rebuild the local SQLite full-text index of report descriptions and locations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=EXPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if not search.local_index_available():
+            raise CommandError('The local search index needs SQLite with FTS5; run migrate first')
+
+        supabase = get_supabase_client()
+        batch = []
+        indexed = 0
+        # One transaction, so searches see the old index until the new one is complete
+        with transaction.atomic():
+            search.clear_index()
+            for report in supabase.iter_reports(options['batch_size'], columns=('id', 'description', 'location')):
+                batch.append(report)
+                if len(batch) >= options['batch_size']:
+                    search.index_reports(batch)
+                    indexed += len(batch)
+                    batch = []
+            search.index_reports(batch)
+            indexed += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} reports'))
@@ -0,0 +1,47 @@
+"""
+Command to mirror the Supabase reports table into the local read replica
+"""
+
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from reports import replica
+
+class Command(BaseCommand):
+    help = 'Copy reports changed in Supabase into the local read replica'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Sync once and exit instead of polling')
+        parser.add_argument('--full', action='store_true',
+                            help='Copy every report and remove ones deleted from Supabase')
+        parser.add_argument('--batch-size', type=int, default=settings.REPORT_REPLICA_BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=settings.REPORT_REPLICA_SYNC_INTERVAL,
+                            help='Seconds to sleep between syncs')
+
+    def handle(self, *args, **options):
+        full = options['full']
+        try:
+            while True:
+                try:
+                    counts = replica.sync(options['batch_size'], full=full)
+                except Exception as e:
+                    # Supabase or local database errors; keep the worker alive
+                    if options['once']:
+                        raise
+                    self.stderr.write(f'Replica sync failed: {e}')
+                    time.sleep(options['interval'])
+                    continue
+
+                full = False
+                if any(counts.values()):
+                    self.stdout.write(f"Stored {counts['stored']}, removed {counts['removed']}")
+
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping replica sync')
+            return
+
+        self.stdout.write(self.style.SUCCESS('Replica synced'))
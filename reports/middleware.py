@@ -0,0 +1,78 @@
+"""
+Middleware protecting the public submission endpoint
+"""
+
+import math
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.urls import reverse
+from core import metrics
+from .throttle import check_submission
+
+REJECTED = metrics.counter(
+    'submissions_rejected_total',
+    'Report submissions refused before the form was read, by reason',
+    ('reason',),
+)
+
+
+class SubmissionThrottleMiddleware:
+    """
+    Shed abusive submission traffic before the request body is read.
+    Oversized POSTs (by Content-Length) get 413 and, with RATE_LIMIT_ENABLED, POSTs
+    beyond the rate limits get 429, so neither reaches form parsing, CSRF checks or Supabase. Must come
+    before CsrfViewMiddleware, which reads the body.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if self.applies_to(request):
+            response = self.reject_too_large(request)
+            if not response and settings.RATE_LIMIT_ENABLED:
+                response = self.throttle(request)
+            if response:
+                return response
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if self.applies_to(request):
+            response = self.reject_too_large(request)
+            if not response and settings.RATE_LIMIT_ENABLED:
+                response = await sync_to_async(self.throttle)(request)
+            if response:
+                return response
+        return await self.get_response(request)
+
+    @staticmethod
+    def applies_to(request):
+        return request.method == 'POST' and request.path == reverse('submit_report')
+
+    @staticmethod
+    def reject_too_large(request):
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > settings.SUBMIT_MAX_CONTENT_LENGTH:
+            REJECTED.inc(reason='too_large')
+            return HttpResponse('Submission too large', status=413)
+        return None
+
+    @staticmethod
+    def throttle(request):
+        wait = check_submission(request)
+        if not wait:
+            return None
+        REJECTED.inc(reason='rate_limited')
+        response = HttpResponse('Too many submissions. Please try again later.', status=429)
+        response.headers['Retry-After'] = str(math.ceil(wait))
+        return response
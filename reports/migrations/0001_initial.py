@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:43
+
+from django.db import migrations, models
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingReport',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('description', models.TextField()),
+                ('category', models.CharField(blank=True, max_length=50, null=True)),
+                ('location', models.CharField(blank=True, max_length=255, null=True)),
+                ('username', models.CharField(blank=True, max_length=100, null=True)),
+                ('image', models.FileField(blank=True, null=True, upload_to='outbox/')),
+                ('image_content_type', models.CharField(blank=True, max_length=100)),
+                ('image_url', models.URLField(blank=True, max_length=500, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='reports_pen_status_4c2cf6_idx')],
+            },
+        ),
+    ]
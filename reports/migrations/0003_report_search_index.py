@@ -0,0 +1,33 @@
+from django.db import migrations
+
+INDEX_TABLE = 'reports_search_index'
+
+
+def create_search_index(apps, schema_editor):
+    # The local full-text index is only used with SQLite builds that include FTS5
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if not cursor.fetchone()[0]:
+            return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} "
+        f"USING fts5(report_id UNINDEXED, description, location, tokenize='porter unicode61')"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {INDEX_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_pendingreport_thumbnail_url'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
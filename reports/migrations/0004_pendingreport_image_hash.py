@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_report_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pendingreport',
+            name='image_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
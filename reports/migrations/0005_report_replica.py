@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_pendingreport_image_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReplicaCheckpoint',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('column', models.CharField(max_length=20)),
+                ('high_water_mark', models.DateTimeField(blank=True, null=True)),
+                ('synced_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReplicaReport',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, serialize=False)),
+                ('description', models.TextField()),
+                ('category', models.CharField(blank=True, max_length=50, null=True)),
+                ('location', models.CharField(blank=True, max_length=255, null=True)),
+                ('username', models.CharField(blank=True, max_length=100, null=True)),
+                ('image_url', models.TextField(blank=True, null=True)),
+                ('thumbnail_url', models.TextField(blank=True, null=True)),
+                ('image_hash', models.CharField(blank=True, max_length=64, null=True)),
+                ('status', models.CharField(default='new', max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['-created_at', '-id'], name='reports_rep_created_9f76d3_idx'), models.Index(fields=['status', '-created_at'], name='reports_rep_status_08bd6f_idx'), models.Index(fields=['category', '-created_at'], name='reports_rep_categor_61f4af_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,97 @@
+"""
+Models for reports app
+
+Reports themselves live in Supabase; the local database holds the submission
+outbox, optionally a read replica of the reports table (see replica.py) and,
+on SQLite, a full-text search index (see search.py).
+"""
+
+import uuid
+from django.db import models
+from django.utils import timezone
+
+
+class PendingReport(models.Model):
+    """
+    A submitted report waiting to be delivered to Supabase.
+    The primary key becomes the Supabase report ID, so redelivery is idempotent.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    description = models.TextField()
+    category = models.CharField(max_length=50, null=True, blank=True)
+    location = models.CharField(max_length=255, null=True, blank=True)
+    username = models.CharField(max_length=100, null=True, blank=True)
+    image = models.FileField(upload_to='outbox/', null=True, blank=True)
+    image_content_type = models.CharField(max_length=100, blank=True)
+    image_url = models.URLField(max_length=500, null=True, blank=True)
+    thumbnail_url = models.URLField(max_length=500, null=True, blank=True)
+    image_hash = models.CharField(max_length=64, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.id} ({self.status})"
+
+
+class ReplicaReport(models.Model):
+    """
+    Local copy of a row of the Supabase reports table, kept up to date by the
+    sync_replica management command. Never written to Supabase.
+    """
+    id = models.UUIDField(primary_key=True)
+    description = models.TextField()
+    category = models.CharField(max_length=50, null=True, blank=True)
+    location = models.CharField(max_length=255, null=True, blank=True)
+    username = models.CharField(max_length=100, null=True, blank=True)
+    image_url = models.TextField(null=True, blank=True)
+    thumbnail_url = models.TextField(null=True, blank=True)
+    image_hash = models.CharField(max_length=64, null=True, blank=True)
+    status = models.CharField(max_length=20, default='new')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # Mirror the dashboard's keyset pagination on (created_at, id), newest first
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['status', '-created_at']),
+            models.Index(fields=['category', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.id} ({self.status})"
+
+
+class ReplicaCheckpoint(models.Model):
+    """
+    How far the replica has been synced: the newest change timestamp seen,
+    and the Supabase column it was read from.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    column = models.CharField(max_length=20)
+    high_water_mark = models.DateTimeField(null=True, blank=True)
+    synced_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.column} {self.high_water_mark})"
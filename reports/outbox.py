@@ -0,0 +1,174 @@
+"""
+Durable local outbox for report submissions
+
+Submissions are stored in the Django database and acknowledged immediately;
+the drain_outbox management command delivers them to Supabase with retries.
+"""
+import random
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .circuit import get_breaker
+from .images import ImageProcessingError
+from .models import PendingReport
+from .supabase_client import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryError(Exception):
+    """Raised when a pending report could not be delivered to Supabase"""
+
+
+def enqueue_report(description, category=None, location=None, username=None, image=None):
+    """
+    Store a submission in the outbox.
+    image is an optional uploaded file; it is kept on local storage until delivery.
+    """
+    pending = PendingReport.objects.create(
+        description=description,
+        category=category,
+        location=location,
+        username=username,
+        image=image,
+        image_content_type=getattr(image, 'content_type', '') or '',
+    )
+    logger.info("Queued report %s for delivery", pending.id)
+    return pending
+
+
+def deliver(pending, supabase):
+    """
+    Deliver one pending report to Supabase.
+    The image is uploaded at most once; the insert is skipped if an earlier
+    attempt already created the report.
+    """
+    if pending.attempts and supabase.get_report(str(pending.id)):
+        logger.info("Report %s was already delivered", pending.id)
+        return
+
+    if pending.image and not pending.image_url:
+        with pending.image.open('rb') as image_file:
+            urls = supabase.upload_image(image_file, content_type=pending.image_content_type)
+        if not urls:
+            raise DeliveryError('Image upload failed')
+        pending.image_url = urls['image_url']
+        pending.thumbnail_url = urls.get('thumbnail_url')
+        pending.image_hash = urls['image_hash']
+        pending.save(update_fields=['image_url', 'thumbnail_url', 'image_hash'])
+
+    report = supabase.create_report(
+        description=pending.description,
+        category=pending.category,
+        location=pending.location,
+        image_url=pending.image_url,
+        thumbnail_url=pending.thumbnail_url,
+        image_hash=pending.image_hash or None,
+        username=pending.username,
+        report_id=pending.id,
+        created_at=pending.created_at,
+    )
+    if not report:
+        raise DeliveryError('Database insert failed')
+
+
+def retry_delay(attempts):
+    """
+    Exponential backoff with full jitter, capped at OUTBOX_RETRY_MAX_DELAY seconds
+    """
+    ceiling = min(settings.OUTBOX_RETRY_BASE_DELAY * 2 ** (attempts - 1), settings.OUTBOX_RETRY_MAX_DELAY)
+    return timedelta(seconds=random.uniform(ceiling / 2, ceiling))
+
+
+def _claim_batch(batch_size):
+    """
+    Return the IDs of up to batch_size pending reports that are due,
+    skipping rows locked by other workers where the database supports it.
+    """
+    with transaction.atomic():
+        due = (
+            PendingReport.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=PendingReport.STATUS_PENDING, next_attempt_at__lte=timezone.now())
+            .order_by('next_attempt_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        ids = list(due)
+        # Push claimed rows into the future so concurrent workers leave them alone
+        PendingReport.objects.filter(id__in=ids).update(
+            next_attempt_at=timezone.now() + timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT)
+        )
+    return ids
+
+
+def drain(batch_size=None, max_attempts=None):
+    """
+    Deliver one batch of due pending reports.
+    Returns a dict with the number of reports sent, retried, failed and deferred.
+    Nothing is claimed while the Supabase circuit is open; if it opens during the
+    batch, the rest of the batch is deferred without counting an attempt.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    max_attempts = max_attempts or settings.OUTBOX_MAX_ATTEMPTS
+    counts = {'sent': 0, 'retried': 0, 'failed': 0, 'deferred': 0}
+
+    breaker = get_breaker()
+    if breaker.is_open():
+        return counts
+
+    ids = _claim_batch(batch_size)
+    if not ids:
+        return counts
+
+    supabase = get_supabase_client()
+    batch = list(PendingReport.objects.filter(id__in=ids).order_by('created_at'))
+    for position, pending in enumerate(batch):
+        try:
+            deliver(pending, supabase)
+        except Exception as e:
+            if breaker.is_open():
+                # Supabase as a whole is failing, not this report
+                deferred = [report.id for report in batch[position:]]
+                PendingReport.objects.filter(id__in=deferred).update(
+                    next_attempt_at=timezone.now() + timedelta(seconds=breaker.reset_timeout)
+                )
+                counts['deferred'] += len(deferred)
+                logger.warning("Supabase circuit open, deferring %s reports: %s", len(deferred), e)
+                break
+            pending.attempts += 1
+            pending.last_error = str(e)[:1000]
+            # An image that cannot be re-encoded never will be
+            if pending.attempts >= max_attempts or isinstance(e, ImageProcessingError):
+                pending.status = PendingReport.STATUS_FAILED
+                counts['failed'] += 1
+                logger.error("Giving up on report %s after %s attempts: %s", pending.id, pending.attempts, e)
+            else:
+                pending.next_attempt_at = timezone.now() + retry_delay(pending.attempts)
+                counts['retried'] += 1
+                logger.warning("Delivery of report %s failed (attempt %s): %s", pending.id, pending.attempts, e)
+            pending.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+            continue
+
+        pending.status = PendingReport.STATUS_SENT
+        pending.sent_at = timezone.now()
+        pending.attempts += 1
+        if pending.image:
+            pending.image.delete(save=False)
+        pending.save(update_fields=['status', 'sent_at', 'attempts', 'image'])
+        counts['sent'] += 1
+        logger.info("Delivered report %s", pending.id)
+
+    return counts
+
+
+def purge_sent(older_than_days):
+    """
+    Delete delivered outbox rows older than the given number of days
+    """
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    deleted, _ = PendingReport.objects.filter(
+        status=PendingReport.STATUS_SENT, sent_at__lt=cutoff
+    ).delete()
+    return deleted
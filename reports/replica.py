@@ -0,0 +1,380 @@
+"""
+Local read replica of the Supabase reports table
+
+When REPORT_READ_REPLICA is enabled, the admin dashboard, report detail,
+search and CSV export read from the ReplicaReport table in the Django
+database instead of Supabase, so each read is a local index lookup. Writes
+still go to Supabase; writes made through this app are applied to the replica
+as well, and the sync_replica management command pulls in everything else.
+
+Each sync fetches only the rows changed since the checkpoint's high-water
+mark, read from the updated_at column (ADD_UPDATED_AT_COLUMN.sql) or, without
+it, from created_at, which only picks up new reports. The last
+REPORT_REPLICA_SYNC_OVERLAP seconds are fetched again every time, since rows
+can become visible after rows with later timestamps. Deletes made outside the
+app are only noticed by a full sync.
+"""
+import logging
+from itertools import chain
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from . import search, supabase_client
+from .cache import ReportCache
+from .models import ReplicaCheckpoint, ReplicaReport
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = 'reports'
+
+COLUMNS = ('id', 'description', 'category', 'location', 'username', 'image_url', 'thumbnail_url',
+           'image_hash', 'status', 'created_at', 'updated_at')
+_UPDATE_FIELDS = [column for column in COLUMNS if column != 'id']
+
+
+def enabled():
+    return settings.REPORT_READ_REPLICA
+
+
+def _parse_timestamp(value):
+    """Parse a Supabase timestamp; naive values are UTC"""
+    if not value:
+        return None
+    parsed = parse_datetime(value) if isinstance(value, str) else value
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    return parsed
+
+
+def _from_row(row):
+    return ReplicaReport(
+        id=row['id'],
+        description=row.get('description') or '',
+        category=row.get('category'),
+        location=row.get('location'),
+        username=row.get('username'),
+        image_url=row.get('image_url'),
+        thumbnail_url=row.get('thumbnail_url'),
+        image_hash=row.get('image_hash'),
+        status=row.get('status') or 'new',
+        created_at=_parse_timestamp(row.get('created_at')) or timezone.now(),
+        updated_at=_parse_timestamp(row.get('updated_at')),
+    )
+
+
+def _rows(reports, columns=('*',), chunk_size=None):
+    """
+    Yield the replica rows of a queryset as the dicts Supabase would return,
+    read as plain values rather than model instances.
+    """
+    values = reports.values(*(COLUMNS if '*' in columns else columns))
+    for row in (values.iterator(chunk_size=chunk_size) if chunk_size else values):
+        for name, value in row.items():
+            if name == 'id':
+                row[name] = str(value)
+            elif isinstance(value, datetime):
+                row[name] = value.isoformat()
+        yield row
+
+
+def store_reports(rows):
+    """Insert or replace reports in the replica"""
+    reports = [_from_row(row) for row in rows if row and row.get('id')]
+    if reports:
+        ReplicaReport.objects.bulk_create(
+            reports, update_conflicts=True, unique_fields=['id'], update_fields=_UPDATE_FIELDS,
+        )
+    return len(reports)
+
+
+def _changed():
+    """
+    Orphan the cached replica counts again once the replica itself has changed;
+    the write bumped the listing version before it was applied here
+    """
+    ReportCache().invalidate_lists()
+
+
+def apply_reports(rows):
+    """Apply reports created or updated through this app; a no-op unless the replica is enabled"""
+    if not enabled():
+        return
+    try:
+        store_reports(rows)
+    except DatabaseError as e:
+        logger.warning("Could not update read replica: %s", e)
+    else:
+        _changed()
+
+
+def apply_status(report_ids, status):
+    """Apply a status change made through this app; a no-op unless the replica is enabled"""
+    if not enabled() or not report_ids:
+        return
+    try:
+        ReplicaReport.objects.filter(id__in=report_ids).update(status=status)
+    except DatabaseError as e:
+        logger.warning("Could not update read replica: %s", e)
+    else:
+        _changed()
+
+
+def apply_deletes(report_ids):
+    """Apply deletes made through this app; a no-op unless the replica is enabled"""
+    if not enabled() or not report_ids:
+        return
+    try:
+        ReplicaReport.objects.filter(id__in=report_ids).delete()
+    except DatabaseError as e:
+        logger.warning("Could not update read replica: %s", e)
+    else:
+        _changed()
+
+
+def changes_since(supabase, since=None, batch_size=None, use_updated_at=True):
+    """
+    Iterate over the reports changed at or after since (an ISO timestamp), oldest
+    first, by updated_at where the table has it and otherwise by created_at,
+    which only picks up new reports. Returns (column used, iterator).
+    """
+    batch_size = batch_size or settings.REPORT_REPLICA_BATCH_SIZE
+    if use_updated_at:
+        changes = supabase.iter_changes('updated_at', since, batch_size)
+        try:
+            first = next(changes, None)
+        except Exception as e:
+            logger.warning("reports.updated_at unavailable, reading new reports by created_at only: %s", e)
+        else:
+            return 'updated_at', chain([first], changes) if first else iter(())
+
+    return 'created_at', supabase.iter_changes('created_at', since, batch_size)
+
+
+def _changes(supabase, checkpoint, batch_size):
+    """
+    Iterate over the reports changed since the checkpoint, preferring updated_at.
+    Sets checkpoint.column to the column actually used.
+    """
+    since = None
+    if checkpoint.high_water_mark:
+        since = (checkpoint.high_water_mark - timedelta(seconds=settings.REPORT_REPLICA_SYNC_OVERLAP)).isoformat()
+
+    checkpoint.column, changes = changes_since(supabase, since, batch_size, checkpoint.column != 'created_at')
+    return changes
+
+
+def sync(batch_size=None, full=False):
+    """
+    Copy reports changed since the last sync from Supabase into the replica.
+    A full sync copies every report and removes replica rows no longer in Supabase.
+    Returns a dict with the number of reports stored and removed.
+    Errors are raised to the caller; the checkpoint only advances once a sync completes.
+    """
+    batch_size = batch_size or settings.REPORT_REPLICA_BATCH_SIZE
+    supabase = supabase_client.get_supabase_client()
+    checkpoint, _ = ReplicaCheckpoint.objects.get_or_create(name=CHECKPOINT_NAME, defaults={'column': ''})
+    if full:
+        checkpoint.high_water_mark = None
+        checkpoint.column = ''
+
+    counts = {'stored': 0, 'removed': 0}
+    seen = set()
+    previous_mark = high_water_mark = checkpoint.high_water_mark
+    batch = []
+
+    def flush():
+        counts['stored'] += store_reports(batch)
+        search.index_reports(batch)
+        batch.clear()
+
+    for row in _changes(supabase, checkpoint, batch_size):
+        batch.append(row)
+        if full:
+            seen.add(str(row['id']))
+        changed_at = _parse_timestamp(row.get(checkpoint.column))
+        if changed_at and (high_water_mark is None or changed_at > high_water_mark):
+            high_water_mark = changed_at
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
+    if full:
+        with transaction.atomic():
+            stale = [report_id for report_id in ReplicaReport.objects.values_list('id', flat=True)
+                     if str(report_id) not in seen]
+            for start in range(0, len(stale), batch_size):
+                ReplicaReport.objects.filter(id__in=stale[start:start + batch_size]).delete()
+        search.remove_reports(stale)
+        counts['removed'] = len(stale)
+
+    checkpoint.high_water_mark = high_water_mark
+    checkpoint.synced_at = timezone.now()
+    checkpoint.save()
+
+    if high_water_mark != previous_mark or counts['removed']:
+        # New data: drop cached Supabase pages and move Last-Modified forward
+        supabase.cache.invalidate_lists()
+    logger.info("Synced read replica: %s stored, %s removed", counts['stored'], counts['removed'])
+    return counts
+
+
+class ReplicaReader:
+    """
+    Serves the read methods of SupabaseClient used by the admin views from the
+    replica, returning the same shapes.
+    """
+
+    def __init__(self):
+        self.cache = ReportCache()
+
+    @staticmethod
+    def _filtered(status=None, category=None, date_from=None, date_to=None):
+        reports = ReplicaReport.objects.all()
+        if status:
+            reports = reports.filter(status=status)
+        if category:
+            reports = reports.filter(category=category)
+        if date_from:
+            reports = reports.filter(created_at__gte=datetime.combine(date_from, time.min, dt_timezone.utc))
+        if date_to:
+            reports = reports.filter(
+                created_at__lt=datetime.combine(date_to + timedelta(days=1), time.min, dt_timezone.utc)
+            )
+        return reports
+
+    def _count(self, reports, **filters):
+        """
+        Exact count of a filtered queryset, cached with the listing pages so it
+        is only recomputed after a write or a sync bumps their version
+        """
+        params = {'replica_count': True, **filters}
+        total_count = self.cache.get_page(params)
+        if total_count is None:
+            total_count = reports.count()
+            self.cache.set_page(params, total_count)
+        return total_count
+
+    def list_reports(self, page_size=None, cursor=None, status=None, category=None,
+                     date_from=None, date_to=None, columns=None):
+        """Like SupabaseClient.list_reports(), with an exact total count"""
+        page_size = max(1, min(int(page_size or supabase_client.DEFAULT_PAGE_SIZE), supabase_client.MAX_PAGE_SIZE))
+        columns = columns or supabase_client.LIST_COLUMNS
+        reports = self._filtered(status, category, date_from, date_to)
+        total_count = self._count(reports, status=status, category=category, date_from=date_from, date_to=date_to)
+
+        position = supabase_client.decode_cursor(cursor)
+        if position:
+            created_at, report_id = position
+            created_at = _parse_timestamp(created_at)
+            if created_at:
+                reports = reports.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=report_id))
+
+        rows = list(_rows(reports[:page_size + 1], columns))
+        rows, next_cursor = supabase_client.BaseSupabaseClient._split_page(rows, page_size)
+        return {'reports': rows, 'next_cursor': next_cursor, 'total_count': total_count}
+
+    def search_reports(self, text, limit=None, status=None, category=None, date_from=None, date_to=None,
+                       columns=None):
+        """
+        Like SupabaseClient.search_reports(): ranked by the local SQLite index
+        when there is one, otherwise every word must appear, newest first.
+        """
+        limit = max(1, min(int(limit or supabase_client.DEFAULT_PAGE_SIZE), supabase_client.MAX_PAGE_SIZE))
+        columns = columns or supabase_client.LIST_COLUMNS
+        reports = self._filtered(status, category, date_from, date_to)
+
+        if search.local_index_available():
+            report_ids = search.search_ids(text, supabase_client.MAX_PAGE_SIZE)
+            rows = list(_rows(reports.filter(id__in=report_ids), columns))
+            rows = supabase_client.BaseSupabaseClient._ranked(rows, report_ids, limit)
+        else:
+            words = search.fts_query(text).replace('"', '').replace('*', '').split()
+            if not words:
+                return {'reports': [], 'next_cursor': None, 'total_count': 0}
+            for word in words:
+                reports = reports.filter(Q(description__icontains=word) | Q(location__icontains=word))
+            rows = list(_rows(reports[:limit], columns))
+        return {'reports': rows, 'next_cursor': None, 'total_count': len(rows)}
+
+    def iter_reports(self, batch_size=500, columns=('*',), status=None, category=None, date_from=None,
+                     date_to=None):
+        """Like SupabaseClient.iter_reports(), reading batch_size rows at a time"""
+        reports = self._filtered(status, category, date_from, date_to)
+        yield from _rows(reports, columns, chunk_size=batch_size)
+
+    def get_report_stats(self, days=None):
+        """Like SupabaseClient.get_report_stats(), counted in the local database"""
+        days = days or supabase_client.STATS_DAYS
+        reports = ReplicaReport.objects.order_by()
+        since = datetime.combine(timezone.now().date() - timedelta(days=days - 1), time.min, dt_timezone.utc)
+        by_day = (
+            reports.filter(created_at__gte=since)
+            .annotate(day=TruncDate('created_at', tzinfo=dt_timezone.utc))
+            .values('day').annotate(count=Count('id'))
+        )
+        stats = {
+            'total': reports.count(),
+            'by_status': {row['status']: row['count']
+                          for row in reports.values('status').annotate(count=Count('id'))},
+            'by_category': {row['category'] or 'uncategorized': row['count']
+                            for row in reports.values('category').annotate(count=Count('id'))},
+            'by_day': [{'day': row['day'].isoformat(), 'count': row['count']} for row in by_day],
+        }
+        return supabase_client.BaseSupabaseClient._normalize_stats(stats, days)
+
+    def get_report(self, report_id):
+        """
+        Fetch a single report; reports not synced yet are read from Supabase
+        and added to the replica.
+        """
+        try:
+            report = next(_rows(ReplicaReport.objects.filter(id=report_id)), None)
+        except ValidationError:
+            report = None
+        if report:
+            return report
+        report = supabase_client.get_supabase_client().get_report(report_id)
+        if report:
+            apply_reports([report])
+        return report
+
+
+class AsyncReplicaReader:
+    """ReplicaReader for the async views; queries run in Django's sync thread"""
+
+    def __init__(self):
+        self.reader = ReplicaReader()
+        self.cache = self.reader.cache
+
+    async def list_reports(self, *args, **kwargs):
+        return await sync_to_async(self.reader.list_reports)(*args, **kwargs)
+
+    async def search_reports(self, *args, **kwargs):
+        return await sync_to_async(self.reader.search_reports)(*args, **kwargs)
+
+    async def get_report_stats(self, *args, **kwargs):
+        return await sync_to_async(self.reader.get_report_stats)(*args, **kwargs)
+
+    async def get_report(self, report_id):
+        return await sync_to_async(self.reader.get_report)(report_id)
+
+
+def get_report_reader():
+    """The replica reader when REPORT_READ_REPLICA is enabled, else the Supabase client"""
+    if enabled():
+        return ReplicaReader()
+    return supabase_client.get_supabase_client()
+
+
+async def aget_report_reader():
+    """Async counterpart of get_report_reader()"""
+    if enabled():
+        return AsyncReplicaReader()
+    from .async_supabase_client import aget_supabase_client
+    return await aget_supabase_client()
@@ -0,0 +1,140 @@
+"""
+Local full-text index of reports
+
+Reports are searched in Postgres through the search_reports() SQL function
+(ADD_REPORT_SEARCH.sql). When that is unavailable and the Django default
+database is SQLite, searches fall back to an FTS5 table kept alongside the
+outbox: it is updated as reports are created and deleted through this app,
+and filled from Supabase by the rebuild_search_index management command.
+
+SQLite allows one writer at a time, so an update that finds the database locked
+is retried a few times; one that still fails is kept in memory and retried
+before the next update or search made by the same process.
+"""
+import re
+import time
+import logging
+import threading
+from django.db import DatabaseError, OperationalError, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+INDEX_TABLE = 'reports_search_index'
+
+# bm25() weights per column: report_id (not indexed), description, location
+RANK_WEIGHTS = (0.0, 2.0, 1.0)
+
+# IDs per DELETE: report_id is not indexed, so each statement scans the table
+DELETE_BATCH_SIZE = 500
+
+# Attempts at an update while the database is locked, and the first pause (doubled each time)
+LOCK_ATTEMPTS = 5
+LOCK_RETRY_DELAY = 0.05
+
+# Updates that failed: report ID -> (description, location) to index, or None to remove
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def local_index_available():
+    """Whether the default database is SQLite with the FTS5 index table"""
+    if connection.vendor != 'sqlite':
+        return False
+    return INDEX_TABLE in connection.introspection.table_names()
+
+
+def fts_query(text):
+    """
+    Turn free text into an FTS5 query matching every word as a prefix.
+    Returns an empty string if the text has no words.
+    """
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _delete(cursor, report_ids):
+    for start in range(0, len(report_ids), DELETE_BATCH_SIZE):
+        batch = report_ids[start:start + DELETE_BATCH_SIZE]
+        cursor.execute(f"DELETE FROM {INDEX_TABLE} WHERE report_id IN ({', '.join(['%s'] * len(batch))})", batch)
+
+
+def _is_locked(error):
+    # "database is locked" (another writer) or "database table is locked" (shared cache)
+    return isinstance(error, OperationalError) and 'locked' in str(error)
+
+
+def _write(changes):
+    """Apply {report_id: (description, location) or None} in one transaction, retrying while locked"""
+    rows = [(report_id, *values) for report_id, values in changes.items() if values is not None]
+    delay = LOCK_RETRY_DELAY
+    for attempt in range(1, LOCK_ATTEMPTS + 1):
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                _delete(cursor, list(changes))
+                if rows:
+                    cursor.executemany(
+                        f'INSERT INTO {INDEX_TABLE} (report_id, description, location) VALUES (%s, %s, %s)', rows
+                    )
+            return
+        except OperationalError as e:
+            if attempt == LOCK_ATTEMPTS or not _is_locked(e):
+                raise
+            time.sleep(delay)
+            delay *= 2
+
+
+def _apply(changes):
+    """Write earlier failed updates plus these changes; what still fails is kept for the next call"""
+    with _pending_lock:
+        changes = {**_pending, **changes}
+        _pending.clear()
+    if not changes:
+        return
+    try:
+        if not local_index_available():
+            return
+        _write(changes)
+    except DatabaseError as e:
+        with _pending_lock:
+            # Updates made meanwhile are newer than these
+            for report_id, values in changes.items():
+                _pending.setdefault(report_id, values)
+        logger.warning("Could not update local search index, will retry %s reports: %s", len(changes), e)
+
+
+def index_reports(reports):
+    """Add or replace reports in the local index; a no-op without one"""
+    _apply({
+        str(report['id']): (report.get('description') or '', report.get('location') or '')
+        for report in reports if report and report.get('id')
+    })
+
+
+def remove_reports(report_ids):
+    """Remove reports from the local index; a no-op without one"""
+    _apply({str(report_id): None for report_id in report_ids or ()})
+
+
+def clear_index():
+    with _pending_lock:
+        _pending.clear()
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {INDEX_TABLE}')
+
+
+def search_ids(text, limit):
+    """
+    Return the IDs of up to limit reports matching text, best match first.
+    """
+    query = fts_query(text)
+    if not query:
+        return []
+    if _pending:
+        _apply({})
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT report_id FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s '
+            f'ORDER BY bm25({INDEX_TABLE}, {", ".join(map(str, RANK_WEIGHTS))}) LIMIT %s',
+            [query, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
@@ -2,20 +2,125 @@
 Supabase client for reports app
 """
 import uuid
+import base64
 import logging
-from datetime import datetime
-from supabase import create_client, Client
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from django.utils.dateparse import parse_datetime
+from postgrest.exceptions import APIError
+from supabase import Client
+from . import events, replica, search
+from .cache import ReportCache
+from .images import process_image
+from .transport import create_client
+from .uploads import ObjectExists, content_digest, upload_stream
+from .validation import sniff_image
 
 logger = logging.getLogger(__name__)
 
-class SupabaseClient:
+# Columns needed to render a row of the admin dashboard table
+LIST_COLUMNS = ('id', 'category', 'location', 'status', 'created_at', 'thumbnail_url')
+
+REPORT_STATUSES = ('new', 'reviewed', 'archived')
+
+# Reports moved out of the reports table by archive_batch() (ADD_REPORTS_ARCHIVE.sql)
+ARCHIVE_TABLE = 'reports_archive'
+
+# Reports moved per archive_reports() call
+ARCHIVE_BATCH_SIZE = 500
+
+# Days of per-day counts shown on the dashboard
+STATS_DAYS = 14
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# IDs per request for bulk updates and deletes, keeping the in.(...) filter
+# well under URL length limits
+BULK_BATCH_SIZE = 100
+
+# Rows per request when iterating over the whole table (e.g. CSV export).
+# Must stay below PostgREST's max-rows setting (1000 on Supabase), since each
+# request asks for one extra row to detect the next page.
+EXPORT_BATCH_SIZE = 500
+
+# SQLSTATE classes raised by the data in a row: 22 data exception, 23 integrity
+# constraint violation. Other errors fail every row, so a failed bulk insert
+# batch is only retried row by row for these.
+ROW_ERROR_SQLSTATE_CLASSES = ('22', '23')
+
+# Result error for bulk rows not attempted because an earlier batch failed
+BULK_NOT_ATTEMPTED = 'Not inserted: the database request failed'
+
+# Report columns kept as given when restoring exported reports
+RESTORED_COLUMNS = ('image_url', 'thumbnail_url', 'image_hash')
+
+
+_io_executor = None
+_io_executor_lock = threading.Lock()
+
+def get_io_executor():
+    """
+    Shared thread pool for running Supabase calls concurrently from sync code.
+    """
+    global _io_executor
+    with _io_executor_lock:
+        if _io_executor is None:
+            _io_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='supabase-io')
+    return _io_executor
+
+
+def encode_cursor(created_at, report_id):
+    """
+    Encode the (created_at, id) position of a report as an opaque cursor string.
+    """
+    raw = f"{created_at}|{report_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def keyset_position(timestamp, report_id):
+    """
+    Validate a (timestamp, id) keyset position before it is written into a
+    PostgREST filter, where quotes, commas or parentheses would add terms.
+    Returns the pair with the ID normalized, or None if either is malformed.
+    """
+    try:
+        if parse_datetime(str(timestamp)) is None:
+            return None
+        return str(timestamp), str(uuid.UUID(str(report_id)))
+    except ValueError:
+        return None
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor().
+    Returns a (created_at, id) tuple, or None if the cursor is malformed;
+    callers then start from the first page.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, report_id = base64.urlsafe_b64decode(padded).decode().split('|', 1)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return keyset_position(created_at, report_id)
+
+class BaseSupabaseClient:
+    """
+    Settings, caching and query building shared by the sync and async clients.
+    Subclasses create self.client and implement the network calls.
+    """
     def __init__(self):
-        """Initialize Supabase client with credentials from Django settings"""
+        """Load and validate Supabase credentials from Django settings"""
         from django.conf import settings
         
         self.url = settings.SUPABASE_URL
         self.key = settings.SUPABASE_KEY
         self.bucket = settings.SUPABASE_BUCKET
+        self.service_key = settings.SUPABASE_SERVICE_KEY or self.key
         
         # Validate credentials exist
         if not self.url or not self.key:
@@ -27,78 +132,552 @@ class SupabaseClient:
             logger.error("Supabase URL is still set to placeholder value")
             raise ValueError("Please configure your actual Supabase project URL")
         
-        logger.info(f"Initializing Supabase client with URL: {self.url}")
+        self.cache = ReportCache()
+    
+    @staticmethod
+    def _upload_filename(file_obj):
+        """
+        Storage object name from the file's content hash and sniffed format, so the
+        same bytes always get the same name whatever the client called the file
+        """
+        info = sniff_image(file_obj)
+        return f"{content_digest(file_obj)}.{info.format if info else 'bin'}"
+    
+    def _image_uploads(self, file_obj):
+        """
+        Work out the objects to store for an uploaded image, named by its content hash.
+        Returns (digest, uploads), uploads mapping each report URL field to (object name, file).
+        If the image is already known to be stored, file is None and nothing is processed.
+        The original is never stored: ImageProcessingError is raised if it cannot be re-encoded.
+        """
+        digest = content_digest(file_obj)
+        stored = self.cache.get_stored_image(digest)
+        if stored:
+            logger.info("Image %s is already stored", digest)
+            return digest, {field: (name, None) for field, name in stored.items()}
+        
+        image, thumbnail = process_image(file_obj)
+        return digest, {
+            'image_url': (f"{digest}.webp", image),
+            'thumbnail_url': (f"{digest}_thumb.webp", thumbnail),
+        }
+    
+    def _remember_image(self, digest, uploads):
+        """Record that all of an image's objects are now stored"""
+        self.cache.set_stored_image(digest, {field: name for field, (name, _) in uploads.items()})
+    
+    @staticmethod
+    def _new_report_data(description, category=None, location=None, image_url=None, username=None,
+                         report_id=None, created_at=None, thumbnail_url=None, image_hash=None):
+        """Build the row inserted for a new report"""
+        report_data = {
+            'id': str(report_id or uuid.uuid4()),
+            'description': description,
+            'category': category,
+            'location': location,
+            'image_url': image_url,
+            'username': username,
+            'status': 'new',
+            'created_at': (created_at or datetime.utcnow()).isoformat(),
+        }
+        if thumbnail_url:
+            report_data['thumbnail_url'] = thumbnail_url
+        if image_hash:
+            report_data['image_hash'] = image_hash
+        return report_data
+    
+    @classmethod
+    def _bulk_report_data(cls, report, form, restore=False):
+        """
+        Validate one report of a bulk insert with a ReportForm (no image).
+        id and created_at may also be given, e.g. when migrating existing reports,
+        and when restoring an export, status and the RESTORED_COLUMNS too.
+        Returns (report_data, None), or (None, errors by field).
+        """
+        if not isinstance(report, dict):
+            return None, {'__all__': ['Each report must be a JSON object']}
+        
+        form.rebind({field: report[field] for field in ('description', 'category', 'username', 'location')
+                     if report.get(field) is not None})
+        errors = {field: list(messages) for field, messages in form.errors.items()}
+        
+        report_id = report.get('id')
+        if report_id is not None:
+            try:
+                report_id = uuid.UUID(str(report_id))
+            except ValueError:
+                errors['id'] = ['Enter a valid UUID.']
+        created_at = report.get('created_at')
+        if created_at is not None:
+            try:
+                created_at = parse_datetime(str(created_at))
+            except ValueError:
+                created_at = None
+            if created_at is None:
+                errors['created_at'] = ['Enter a valid date/time.']
+        
+        restored = {}
+        if restore:
+            restored['status'] = report.get('status') or 'new'
+            if restored['status'] not in REPORT_STATUSES:
+                errors['status'] = [f"Select one of {', '.join(REPORT_STATUSES)}."]
+            for column in RESTORED_COLUMNS:
+                if report.get(column) is not None:
+                    restored[column] = str(report[column])
+        
+        if errors:
+            return None, errors
+        report_data = cls._new_report_data(**form.report_fields(), report_id=report_id, created_at=created_at)
+        report_data.update(restored)
+        return report_data, None
+    
+    def _validate_bulk(self, reports, restore=False):
+        """
+        Validate the reports of a bulk insert.
+        Returns (valid, results): valid lists (index, report_data) pairs, and results
+        has one entry per report, filled in for the invalid ones and None otherwise.
+        """
+        from .forms import ReportForm
+        
+        form = ReportForm(data={})
+        valid = []
+        results = [None] * len(reports)
+        for index, report in enumerate(reports):
+            report_data, errors = self._bulk_report_data(report, form, restore)
+            if errors:
+                results[index] = {'status': 'invalid', 'errors': errors}
+            else:
+                valid.append((index, report_data))
+        return valid, results
+    
+    def _bulk_insert_query(self, batch, restore=False):
+        """
+        Build the insert for a batch of (index, report_data) pairs; when restoring,
+        reports with an existing ID are replaced. PostgREST takes the columns of a
+        multi-row insert from the first row, so every row gets the same keys.
+        """
+        columns = set().union(*(report_data for _, report_data in batch))
+        rows = [{column: report_data.get(column) for column in columns} for _, report_data in batch]
+        if restore:
+            return self._ids_only(self.client.table('reports').upsert(rows, on_conflict='id'))
+        return self._ids_only(self.client.table('reports').insert(rows))
+    
+    @staticmethod
+    def _is_row_error(error):
+        """Whether a failed insert was caused by the data in a row rather than the request"""
+        return isinstance(error, APIError) and (error.code or '')[:2] in ROW_ERROR_SQLSTATE_CLASSES
+    
+    @staticmethod
+    def _bulk_summary(results):
+        """Count the outcomes of a bulk insert"""
+        summary = {'created': 0, 'invalid': 0, 'failed': 0}
+        for result in results:
+            summary[result['status']] += 1
+        return {**summary, 'results': results}
+    
+    def _apply_filters(self, query, status=None, category=None, date_from=None, date_to=None):
+        """
+        Apply the dashboard filters to a PostgREST query.
+        date_from and date_to are inclusive dates.
+        """
+        if status:
+            query = query.eq('status', status)
+        if category:
+            query = query.eq('category', category)
+        if date_from:
+            query = query.gte('created_at', date_from.isoformat())
+        if date_to:
+            query = query.lt('created_at', (date_to + timedelta(days=1)).isoformat())
+        return query
+    
+    def _page_query(self, page_size, cursor=None, columns=LIST_COLUMNS, count=None, table='reports', **filters):
+        """
+        Build the query for one keyset page of reports, newest first.
+        One extra row is requested to find out whether there is a next page.
+        """
+        client = self.archive_client if table == ARCHIVE_TABLE else self.client
+        query = client.table(table).select(*columns, count=count)
+        query = self._apply_filters(query, **filters)
+        
+        position = decode_cursor(cursor)
+        if position:
+            created_at, report_id = position
+            query = query.or_(
+                f'created_at.lt."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.lt."{report_id}")'
+            )
+        
+        return (
+            query.order('created_at', desc=True)
+            .order('id', desc=True)
+            .limit(page_size + 1)
+        )
+    
+    def _changes_query(self, column, batch_size, since=None, after_id=None):
+        """
+        Build the query for the next batch of reports changed since a timestamp,
+        oldest first, using keyset pagination on (column, id).
+        Raises ValueError for a malformed timestamp or ID.
+        """
+        query = self.client.table('reports').select('*')
+        if since and after_id:
+            position = keyset_position(since, after_id)
+            if position is None:
+                raise ValueError(f'Invalid change position {since!r}, {after_id!r}')
+            since, after_id = position
+            query = query.or_(f'{column}.gt."{since}",and({column}.eq."{since}",id.gt."{after_id}")')
+        elif since:
+            if parse_datetime(str(since)) is None:
+                raise ValueError(f'Invalid timestamp {since!r}')
+            query = query.gte(column, since)
+        return query.order(column).order('id').limit(batch_size)
+    
+    @staticmethod
+    def _split_page(rows, page_size):
+        """
+        Trim the look-ahead row from a page.
+        Returns (rows, next_cursor).
+        """
+        rows = rows or []
+        if len(rows) <= page_size:
+            return rows, None
+        rows = rows[:page_size]
+        last = rows[-1]
+        return rows, encode_cursor(last.get('created_at'), last.get('id'))
+    
+    def _stats_count_queries(self):
+        """
+        Count-only queries used when the report_stats() SQL function is missing.
+        Returns a dict mapping (group, key) to a query whose count is wanted.
+        """
+        from .forms import ReportForm
+        
+        def count_query():
+            # limit(1) rather than a HEAD request: postgrest-py drops the count on empty bodies
+            return self.client.table('reports').select('id', count='estimated').limit(1)
+        
+        queries = {('total', None): count_query()}
+        for status in REPORT_STATUSES:
+            queries[('by_status', status)] = count_query().eq('status', status)
+        for category, _ in ReportForm.base_fields['category'].choices:
+            if category:
+                queries[('by_category', category)] = count_query().eq('category', category)
+        queries[('by_category', 'uncategorized')] = count_query().is_('category', 'null')
+        return queries
+    
+    @staticmethod
+    def _stats_from_counts(counts):
+        """Assemble _stats_count_queries() results into the report_stats() shape"""
+        stats = {'total': 0, 'by_status': {}, 'by_category': {}, 'by_day': None}
+        for (group, key), count in counts.items():
+            if group == 'total':
+                stats['total'] = count or 0
+            elif count:
+                stats[group][key] = count
+        return stats
+    
+    @staticmethod
+    def _normalize_stats(stats, days):
+        """Fill in every day of the period, so days without reports show as zero"""
+        if stats.get('by_day') is None:
+            # Per-day counts are only available from report_stats()
+            stats['by_day'] = []
+            return stats
+        per_day = {str(row['day']): row['count'] for row in stats.get('by_day') or []}
+        today = date.today()
+        stats['by_day'] = [
+            {'day': day.isoformat(), 'count': per_day.get(day.isoformat(), 0)}
+            for day in (today - timedelta(days=offset) for offset in range(days - 1, -1, -1))
+        ]
+        return stats
+    
+    @staticmethod
+    def _ids_only(query):
+        """
+        Make a write query return only the affected IDs.
+        postgrest-py has no select() on writes, and with return=minimal it drops
+        the affected-row count, so the select parameter is set directly.
+        """
+        query.params = query.params.set('select', 'id')
+        return query
+    
+    @staticmethod
+    def _batches(items, size=BULK_BATCH_SIZE):
+        """Split a list into consecutive lists of at most size items"""
+        items = list(items)
+        return [items[i:i + size] for i in range(0, len(items), size)]
+    
+    def _search_query(self, text, limit, columns=LIST_COLUMNS, **filters):
+        """Build the query ranking reports with the search_reports() SQL function"""
+        query = self.client.rpc('search_reports', {'search_query': text}).select(*columns)
+        return self._apply_filters(query, **filters).limit(limit)
+    
+    def _local_search_queries(self, report_ids, columns=LIST_COLUMNS, **filters):
+        """Build the queries fetching locally matched reports, one per batch of IDs"""
+        return [
+            self._apply_filters(self.client.table('reports').select(*columns).in_('id', batch), **filters)
+            for batch in self._batches(report_ids)
+        ]
+    
+    @staticmethod
+    def _ranked(rows, report_ids, limit):
+        """Order rows fetched by ID in the order of report_ids"""
+        rank = {report_id: position for position, report_id in enumerate(report_ids)}
+        return sorted(rows, key=lambda row: rank.get(str(row.get('id')), len(rank)))[:limit]
+    
+    @staticmethod
+    def _page_cache_params(page_size, cursor, columns, **filters):
+        return {'page_size': page_size, 'cursor': cursor, 'columns': tuple(columns), **filters}
+
+
+class SupabaseClient(BaseSupabaseClient):
+    def __init__(self):
+        """Initialize Supabase client with credentials from Django settings"""
+        super().__init__()
+        
+        logger.info("Initializing Supabase client with URL: %s", self.url)
         
         try:
             self.client: Client = create_client(self.url, self.key)
+            # The archive is only open to the service role
+            self.archive_client: Client = (
+                self.client if self.service_key == self.key else create_client(self.url, self.service_key)
+            )
             logger.info("Supabase client initialized successfully")
         except Exception as e:
-            logger.error(f"Failed to create Supabase client: {e}")
+            logger.error("Failed to create Supabase client: %s", e)
             raise
     
-    def upload_file(self, file_obj):
+    def _upload_object(self, filename, file_obj, content_type=None):
+        """
+        Upload a file to Supabase Storage under the given object name.
+        Errors are raised to the caller.
         """
-        Upload a file to Supabase Storage.
+        content_type = content_type or getattr(file_obj, 'content_type', None)
+        
+        logger.info("Uploading file: %s to bucket: %s", filename, self.bucket)
+        
+        # Streamed from the file in small chunks rather than read into memory
+        upload_stream(self.client.storage.session, self.bucket, filename, file_obj, content_type)
+    
+    def upload_file(self, file_obj, content_type=None):
+        """
+        Upload a file to Supabase Storage, named by its content hash.
+        content_type defaults to the uploaded file's content_type attribute.
         Returns the public URL of the uploaded file.
         """
         try:
-            # Generate unique filename
-            ext = file_obj.name.split('.')[-1] if '.' in file_obj.name else 'jpg'
-            filename = f"{uuid.uuid4()}.{ext}"
+            filename = self._upload_filename(file_obj)
             
-            # Read file content
-            file_content = file_obj.read()
-            
-            logger.info(f"Uploading file: {filename} to bucket: {self.bucket}")
-            
-            # Upload to Supabase Storage
-            self.client.storage.from_(self.bucket).upload(
-                path=filename,
-                file=file_content,
-                file_options={"content-type": file_obj.content_type}
-            )
+            try:
+                self._upload_object(filename, file_obj, content_type)
+            except ObjectExists:
+                logger.info("File %s is already stored", filename)
             
             # Get public URL
             public_url = self.client.storage.from_(self.bucket).get_public_url(filename)
             
-            logger.info(f"File uploaded successfully: {public_url}")
+            logger.info("File uploaded successfully: %s", public_url)
             return public_url
             
         except Exception as e:
-            logger.error(f"File upload error: {e}", exc_info=True)
+            logger.error("File upload error: %s", e, exc_info=True)
             return None
     
-    def create_report(self, description, category=None, location=None, image_url=None, username=None):
+    def _try_upload(self, filename, file_obj):
+        """
+        Upload an object, returning whether it is now stored.
+        file_obj is None for objects known to be stored already.
+        """
+        if file_obj is None:
+            return True
+        try:
+            self._upload_object(filename, file_obj)
+            return True
+        except ObjectExists:
+            logger.info("File %s is already stored", filename)
+            return True
+        except Exception as e:
+            logger.error("File upload error for %s: %s", filename, e, exc_info=True)
+            return False
+    
+    def _start_uploads(self, uploads):
+        """
+        Start uploading the objects from _image_uploads() on the I/O pool.
+        Returns a dict mapping object name to a future of _try_upload().
+        """
+        return {
+            filename: get_io_executor().submit(self._try_upload, filename, file_obj)
+            for filename, file_obj in uploads.values()
+        }
+    
+    def _public_urls(self, uploads):
+        bucket = self.client.storage.from_(self.bucket)
+        return {field: bucket.get_public_url(filename) for field, (filename, _) in uploads.items()}
+    
+    def upload_image(self, file_obj, content_type=None):
+        """
+        Process an image (see reports.images) and upload it with its thumbnail,
+        unless an identical image is already stored.
+        Returns a dict with image_url, image_hash and, when generated, thumbnail_url; None on failure.
+        Objects that did upload are kept on failure: they are reused when the image is retried.
+        """
+        if content_type and not getattr(file_obj, 'content_type', None):
+            file_obj.content_type = content_type
+        
+        digest, uploads = self._image_uploads(file_obj)
+        uploaded = {name: future.result() for name, future in self._start_uploads(uploads).items()}
+        
+        if all(uploaded.values()):
+            self._remember_image(digest, uploads)
+            urls = self._public_urls(uploads)
+            logger.info("Image uploaded successfully: %s", urls['image_url'])
+            return {**urls, 'image_hash': digest}
+        return None
+    
+    def remove_file(self, filename):
+        """
+        Delete an object from Supabase Storage.
+        """
+        try:
+            logger.info("Removing file: %s from bucket: %s", filename, self.bucket)
+            self.client.storage.from_(self.bucket).remove([filename])
+            return True
+        
+        except Exception as e:
+            logger.error("File removal error for %s: %s", filename, e, exc_info=True)
+            return False
+    
+    def submit_report(self, image_file=None, **fields):
+        """
+        Create a report, uploading its image and thumbnail concurrently with the insert.
+        Images already in storage (by content hash) are not processed or uploaded again.
+        If an upload fails the report is deleted. Uploaded objects are kept if the
+        insert fails: they may be shared with other reports, and a retry reuses them.
+        Returns the created report, or None.
+        """
+        if not image_file:
+            return self.create_report(**fields)
+        
+        digest, uploads = self._image_uploads(image_file)
+        urls = self._public_urls(uploads)
+        
+        upload_futures = self._start_uploads(uploads)
+        report = self.create_report(**urls, image_hash=digest, **fields)
+        uploaded = {filename: future.result() for filename, future in upload_futures.items()}
+        
+        if all(uploaded.values()):
+            self._remember_image(digest, uploads)
+            if report:
+                logger.info("File uploaded successfully: %s", urls['image_url'])
+                return report
+            logger.warning("Report insert failed")
+        elif report:
+            logger.warning("Image upload failed, removing report %s", report['id'])
+            self.delete_report(report['id'])
+        return None
+    
+    def create_report(self, description, category=None, location=None, image_url=None, username=None,
+                      report_id=None, created_at=None, thumbnail_url=None, image_hash=None):
         """
         Insert a report into the Supabase database.
+        report_id and created_at are generated when not given.
         """
         try:
-            report_data = {
-                'id': str(uuid.uuid4()),
-                'description': description,
-                'category': category,
-                'location': location,
-                'image_url': image_url,
-                'username': username,
-                'status': 'new',
-                'created_at': datetime.utcnow().isoformat(),
-            }
+            report_data = self._new_report_data(
+                description, category, location, image_url, username, report_id, created_at, thumbnail_url,
+                image_hash,
+            )
             
-            logger.info(f"Creating report with category: {category}")
+            logger.info("Creating report with category: %s", category)
             
             response = self.client.table('reports').insert(report_data).execute()
             
             if response.data:
-                logger.info(f"Report created successfully with ID: {response.data[0].get('id')}")
+                logger.info("Report created successfully with ID: %s", response.data[0].get('id'))
+                self.cache.set_report(response.data[0])
+                self.cache.invalidate_lists()
+                search.index_reports(response.data)
+                replica.apply_reports(response.data)
+                events.reports_created(response.data)
                 return response.data[0]
             else:
                 logger.warning("Report creation returned no data")
                 return None
                 
         except Exception as e:
-            logger.error(f"Database insert error: {e}", exc_info=True)
+            logger.error("Database insert error: %s", e, exc_info=True)
             return None
     
+    def _insert_batch(self, batch, errors, start=0, restore=False):
+        """
+        Insert (index, report_data) pairs in one request, setting errors[start:] to
+        None or an error message per pair. If the data in a row is at fault, the
+        batch is split in halves until the offending rows are isolated. Other errors
+        are raised, leaving the entries of pairs not inserted yet unchanged.
+        """
+        try:
+            self._bulk_insert_query(batch, restore).execute()
+            errors[start:start + len(batch)] = [None] * len(batch)
+            return
+        except Exception as e:
+            if not self._is_row_error(e):
+                raise
+            if len(batch) == 1:
+                errors[start] = e.message
+                return
+        
+        middle = len(batch) // 2
+        self._insert_batch(batch[:middle], errors, start, restore)
+        self._insert_batch(batch[middle:], errors, start + middle, restore)
+    
+    def create_reports_bulk(self, reports, batch_size=None, restore=False):
+        """
+        Validate report dicts with the ReportForm rules and insert the valid ones,
+        batch_size rows per request (INGEST_BATCH_SIZE by default). Rows rejected by
+        the database are reported without failing the rest of their batch; if a
+        batch fails for any other reason, its rows not inserted yet and all later
+        rows are not attempted.
+        restore keeps the status and image columns of exported reports and replaces
+        reports that already exist.
+        Returns the created/invalid/failed counts and a result per report, in order.
+        """
+        from django.conf import settings
+        
+        valid, results = self._validate_bulk(reports, restore)
+        created = []
+        stopped = False
+        
+        for batch in self._batches(valid, batch_size or settings.INGEST_BATCH_SIZE):
+            # Halves of a split batch inserted before a failure still count as created
+            errors = [BULK_NOT_ATTEMPTED] * len(batch)
+            if not stopped:
+                try:
+                    self._insert_batch(batch, errors, restore=restore)
+                except Exception as e:
+                    logger.error("Bulk insert error after %s reports: %s", len(created), e, exc_info=True)
+                    stopped = True
+            
+            for (index, report_data), error in zip(batch, errors):
+                if error:
+                    results[index] = {'status': 'failed', 'error': error}
+                else:
+                    results[index] = {'status': 'created', 'id': report_data['id']}
+                    created.append(report_data)
+        
+        if created:
+            if restore:
+                self.cache.delete_reports([report_data['id'] for report_data in created])
+            self.cache.invalidate_lists()
+            search.index_reports(created)
+            replica.apply_reports(created)
+            events.reports_imported(len(created))
+        
+        summary = self._bulk_summary(results)
+        logger.info("Bulk insert: %s created, %s invalid, %s failed",
+                    summary['created'], summary['invalid'], summary['failed'])
+        return summary
+    
     def get_all_reports(self):
         """
         Fetch all reports from the database.
@@ -107,30 +686,211 @@ class SupabaseClient:
             logger.info("Fetching all reports")
             response = self.client.table('reports').select('*').order('created_at', desc=True).execute()
             
-            logger.info(f"Retrieved {len(response.data)} reports")
+            logger.info("Retrieved %s reports", len(response.data))
             return response.data
             
         except Exception as e:
-            logger.error(f"Database fetch error: {e}", exc_info=True)
+            logger.error("Database fetch error: %s", e, exc_info=True)
             return []
     
+    def _fetch_page(self, page_size, cursor=None, columns=LIST_COLUMNS, count=None, table='reports', **filters):
+        """
+        Fetch one keyset page of reports, newest first.
+        Returns (rows, next_cursor, count). Errors are raised to the caller.
+        """
+        response = self._page_query(page_size, cursor, columns, count, table, **filters).execute()
+        rows, next_cursor = self._split_page(response.data, page_size)
+        return rows, next_cursor, response.count
+    
+    def list_reports(self, page_size=DEFAULT_PAGE_SIZE, cursor=None, status=None, category=None,
+                     date_from=None, date_to=None, columns=LIST_COLUMNS, archived=False):
+        """
+        Fetch one page of reports, newest first, using keyset pagination on (created_at, id).
+        Returns a dict with the page's reports, the cursor of the next page (or None)
+        and an estimated total count of reports matching the filters.
+        archived pages through the reports_archive table instead.
+        """
+        page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+        cache_params = self._page_cache_params(
+            page_size, cursor, columns, archived=archived,
+            status=status, category=category, date_from=date_from, date_to=date_to,
+        )
+        cached = self.cache.get_page(cache_params)
+        if cached is not None:
+            return cached
+        
+        try:
+            logger.info("Fetching reports page (size=%s, status=%s, category=%s, archived=%s)",
+                        page_size, status, category, archived)
+            rows, next_cursor, total_count = self._fetch_page(
+                page_size, cursor, columns, count='estimated', table=ARCHIVE_TABLE if archived else 'reports',
+                status=status, category=category, date_from=date_from, date_to=date_to,
+            )
+            
+            logger.info("Retrieved %s reports", len(rows))
+            page = {
+                'reports': rows,
+                'next_cursor': next_cursor,
+                'total_count': total_count,
+            }
+            self.cache.set_page(cache_params, page)
+            return page
+            
+        except Exception as e:
+            logger.error("Database fetch error: %s", e, exc_info=True)
+            return {'reports': [], 'next_cursor': None, 'total_count': None}
+    
+    def search_reports(self, text, limit=DEFAULT_PAGE_SIZE, status=None, category=None,
+                       date_from=None, date_to=None, columns=LIST_COLUMNS):
+        """
+        Full-text search over report descriptions and locations, best match first.
+        Uses the search_reports() SQL function (ADD_REPORT_SEARCH.sql), falling back to
+        the local SQLite index when the function is unavailable.
+        Returns a page dict like list_reports(), without a next cursor.
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        filters = {'status': status, 'category': category, 'date_from': date_from, 'date_to': date_to}
+        cache_params = self._page_cache_params(limit, None, columns, search=text, **filters)
+        cached = self.cache.get_page(cache_params)
+        if cached is not None:
+            return cached
+        
+        try:
+            logger.info("Searching reports for: %s", text)
+            try:
+                rows = self._search_query(text, limit, columns, **filters).execute().data
+            except Exception as e:
+                if not search.local_index_available():
+                    raise
+                logger.warning("search_reports() unavailable, using the local index: %s", e)
+                report_ids = search.search_ids(text, MAX_PAGE_SIZE)
+                rows = []
+                for query in self._local_search_queries(report_ids, columns, **filters):
+                    rows.extend(query.execute().data)
+                rows = self._ranked(rows, report_ids, limit)
+            
+            logger.info("Search matched %s reports", len(rows))
+            page = {
+                'reports': rows,
+                'next_cursor': None,
+                'total_count': len(rows),
+            }
+            self.cache.set_page(cache_params, page)
+            return page
+            
+        except Exception as e:
+            logger.error("Database search error: %s", e, exc_info=True)
+            return {'reports': [], 'next_cursor': None, 'total_count': None}
+    
+    def iter_reports(self, batch_size=EXPORT_BATCH_SIZE, columns=('*',), status=None, category=None,
+                     date_from=None, date_to=None):
+        """
+        Yield every report matching the filters, newest first, fetching
+        batch_size rows per request so only one batch is held in memory.
+        Errors are raised so that a partial result is never mistaken for a complete one.
+        """
+        cursor = None
+        fetched = 0
+        while True:
+            try:
+                rows, cursor, _ = self._fetch_page(
+                    batch_size, cursor, columns,
+                    status=status, category=category, date_from=date_from, date_to=date_to,
+                )
+            except Exception as e:
+                logger.error("Database fetch error after %s reports: %s", fetched, e, exc_info=True)
+                raise
+            
+            fetched += len(rows)
+            yield from rows
+            
+            if cursor is None:
+                break
+        
+        logger.info("Iterated over %s reports", fetched)
+    
+    def iter_changes(self, column, since=None, batch_size=EXPORT_BATCH_SIZE):
+        """
+        Yield every report whose column (created_at, or updated_at where the
+        table has it) is at or after since, oldest first, one batch per request.
+        Errors are raised to the caller.
+        """
+        after_id = None
+        while True:
+            rows = self._changes_query(column, batch_size, since, after_id).execute().data
+            yield from rows
+            if len(rows) < batch_size:
+                break
+            since, after_id = rows[-1][column], rows[-1]['id']
+    
+    def get_report_stats(self, days=STATS_DAYS):
+        """
+        Count reports per status, per category and per day over the last days days,
+        without fetching any rows. Uses the report_stats() SQL function
+        (ADD_REPORT_STATS.sql) and falls back to concurrent count-only queries,
+        which cannot provide per-day counts.
+        Returns a dict with total, by_status, by_category and by_day, or None on error.
+        """
+        cached = self.cache.get_stats(days)
+        if cached is not None:
+            return cached
+        
+        try:
+            logger.info("Fetching report statistics")
+            response = self.client.rpc('report_stats', {'days_back': days}).execute()
+            stats = self._normalize_stats(response.data, days)
+        except Exception as e:
+            logger.warning("report_stats() unavailable, counting per group instead: %s", e)
+            try:
+                futures = {
+                    group: get_io_executor().submit(query.execute)
+                    for group, query in self._stats_count_queries().items()
+                }
+                counts = {group: future.result().count for group, future in futures.items()}
+                stats = self._normalize_stats(self._stats_from_counts(counts), days)
+            except Exception as e:
+                logger.error("Database stats error: %s", e, exc_info=True)
+                return None
+        
+        self.cache.set_stats(days, stats)
+        return stats
+    
     def get_report(self, report_id):
         """
         Fetch a single report by ID.
         """
+        cached = self.cache.get_report(report_id)
+        if cached is not None:
+            return cached
+        
         try:
-            logger.info(f"Fetching report with ID: {report_id}")
+            logger.info("Fetching report with ID: %s", report_id)
             response = self.client.table('reports').select('*').eq('id', report_id).execute()
             
             if response.data:
-                logger.info(f"Report found: {report_id}")
+                logger.info("Report found: %s", report_id)
+                self.cache.set_report(response.data[0])
                 return response.data[0]
             else:
-                logger.warning(f"Report not found: {report_id}")
+                logger.warning("Report not found: %s", report_id)
                 return None
                 
         except Exception as e:
-            logger.error(f"Database fetch error for report {report_id}: {e}", exc_info=True)
+            logger.error("Database fetch error for report %s: %s", report_id, e, exc_info=True)
+            return None
+    
+    def get_archived_report(self, report_id):
+        """
+        Fetch a single report from the archive by ID. Not cached: archived
+        reports are only looked at now and then.
+        """
+        try:
+            logger.info("Fetching archived report with ID: %s", report_id)
+            response = self.archive_client.table(ARCHIVE_TABLE).select('*').eq('id', report_id).execute()
+            return response.data[0] if response.data else None
+            
+        except Exception as e:
+            logger.error("Archive fetch error for report %s: %s", report_id, e, exc_info=True)
             return None
     
     def update_report_status(self, report_id, status):
@@ -138,18 +898,22 @@ class SupabaseClient:
         Update the status of a report.
         """
         try:
-            logger.info(f"Updating report {report_id} status to: {status}")
+            logger.info("Updating report %s status to: %s", report_id, status)
             response = self.client.table('reports').update({'status': status}).eq('id', report_id).execute()
             
             if response.data:
-                logger.info(f"Report {report_id} status updated successfully")
+                logger.info("Report %s status updated successfully", report_id)
+                self.cache.set_report(response.data[0])
+                self.cache.invalidate_lists()
+                replica.apply_reports(response.data)
+                events.reports_updated(response.data)
                 return response.data[0]
             else:
-                logger.warning(f"Report {report_id} status update returned no data")
+                logger.warning("Report %s status update returned no data", report_id)
                 return None
                 
         except Exception as e:
-            logger.error(f"Database update error for report {report_id}: {e}", exc_info=True)
+            logger.error("Database update error for report %s: %s", report_id, e, exc_info=True)
             return None
     
     def delete_report(self, report_id):
@@ -157,25 +921,142 @@ class SupabaseClient:
         Delete a report by ID.
         """
         try:
-            logger.info(f"Deleting report with ID: {report_id}")
+            logger.info("Deleting report with ID: %s", report_id)
             self.client.table('reports').delete().eq('id', report_id).execute()
+            self.cache.delete_report(report_id)
+            self.cache.invalidate_lists()
+            search.remove_reports([report_id])
+            replica.apply_deletes([report_id])
+            events.reports_deleted([report_id])
             
-            logger.info(f"Report {report_id} deleted successfully")
+            logger.info("Report %s deleted successfully", report_id)
             return True
             
         except Exception as e:
-            logger.error(f"Database delete error for report {report_id}: {e}", exc_info=True)
+            logger.error("Database delete error for report %s: %s", report_id, e, exc_info=True)
             return False
 
+    
+    def update_reports_status(self, report_ids, status):
+        """
+        Update the status of many reports, one request per batch of IDs.
+        Returns the number of reports updated, or None if any batch failed.
+        """
+        updated = 0
+        try:
+            for batch in self._batches(report_ids):
+                logger.info("Updating %s reports status to: %s", len(batch), status)
+                query = self.client.table('reports').update({'status': status}).in_('id', batch)
+                response = self._ids_only(query).execute()
+                updated += len(response.data)
+                self.cache.delete_reports(batch)
+                replica.apply_status(batch, status)
+                events.status_changed([row['id'] for row in response.data], status)
+            
+            logger.info("Updated status of %s reports to %s", updated, status)
+            return updated
+            
+        except Exception as e:
+            logger.error("Bulk update error after %s reports: %s", updated, e, exc_info=True)
+            return None
+        finally:
+            self.cache.invalidate_lists()
+    
+    def delete_reports(self, report_ids):
+        """
+        Delete many reports, one request per batch of IDs.
+        Returns the number of reports deleted, or None if any batch failed.
+        """
+        deleted = 0
+        try:
+            for batch in self._batches(report_ids):
+                logger.info("Deleting %s reports", len(batch))
+                query = self.client.table('reports').delete().in_('id', batch)
+                response = self._ids_only(query).execute()
+                deleted += len(response.data)
+                self.cache.delete_reports(batch)
+                search.remove_reports(batch)
+                replica.apply_deletes(batch)
+                events.reports_deleted([row['id'] for row in response.data])
+            
+            logger.info("Deleted %s reports", deleted)
+            return deleted
+            
+        except Exception as e:
+            logger.error("Bulk delete error after %s reports: %s", deleted, e, exc_info=True)
+            return None
+        finally:
+            self.cache.invalidate_lists()
+    
+    def archive_batch(self, statuses, created_before, limit=ARCHIVE_BATCH_SIZE):
+        """
+        Move up to limit reports created before created_before, with one of the
+        statuses (any status if None), into the archive table, oldest first.
+        Returns the archived rows; errors are raised to the caller.
+        """
+        response = self.archive_client.rpc('archive_reports', {
+            'statuses': list(statuses) if statuses else None,
+            'created_before': created_before.isoformat(),
+            'max_rows': limit,
+        }).execute()
+        
+        report_ids = [row['id'] for row in response.data]
+        if report_ids:
+            logger.info("Archived %s reports", len(report_ids))
+            self.cache.delete_reports(report_ids)
+            self.cache.invalidate_lists()
+            search.remove_reports(report_ids)
+            replica.apply_deletes(report_ids)
+            events.reports_deleted(report_ids)
+        return response.data
+    
+    def restore_reports(self, report_ids):
+        """
+        Move archived reports back into the reports table, one request per batch of IDs.
+        Returns the number of reports restored, or None if any batch failed.
+        """
+        restored = []
+        try:
+            for batch in self._batches(report_ids):
+                logger.info("Restoring %s archived reports", len(batch))
+                response = self.archive_client.rpc('restore_archived_reports', {'report_ids': batch}).execute()
+                restored.extend(response.data)
+            
+            logger.info("Restored %s reports", len(restored))
+            return len(restored)
+            
+        except Exception as e:
+            logger.error("Restore error after %s reports: %s", len(restored), e, exc_info=True)
+            return None
+        finally:
+            if restored:
+                self.cache.invalidate_lists()
+                search.index_reports(restored)
+                replica.apply_reports(restored)
+                events.reports_imported(len(restored))
+    
+    def upload_archive(self, filename, file_obj):
+        """
+        Upload an archive file to the private REPORT_ARCHIVE_BUCKET.
+        Errors are raised to the caller.
+        """
+        from django.conf import settings
+        
+        logger.info("Uploading archive: %s to bucket: %s", filename, settings.REPORT_ARCHIVE_BUCKET)
+        upload_stream(self.archive_client.storage.session, settings.REPORT_ARCHIVE_BUCKET, filename, file_obj,
+                      'application/gzip')
+
 
 # Singleton instance
 _supabase_instance = None
 _supabase_url = None
+_supabase_lock = threading.Lock()
 
 def get_supabase_client():
     """
     Get or create Supabase client singleton.
     Resets the instance if URL changes (for hot reloading during development).
+    Thread-safe: concurrent first requests share one client and connection pool.
     """
     global _supabase_instance, _supabase_url
     
@@ -183,14 +1064,20 @@ def get_supabase_client():
     from django.conf import settings
     current_url = settings.SUPABASE_URL
     
-    # Reset singleton if URL changed (e.g., after .env update)
-    if _supabase_instance is not None and _supabase_url != current_url:
-        logger.info(f"Supabase URL changed from {_supabase_url} to {current_url}, resetting client")
-        _supabase_instance = None
+    # Fast path without the lock once the client exists
+    instance = _supabase_instance
+    if instance is not None and _supabase_url == current_url:
+        return instance
     
-    # Create new instance if needed
-    if _supabase_instance is None:
-        _supabase_instance = SupabaseClient()
-        _supabase_url = current_url
-    
-    return _supabase_instance
+    with _supabase_lock:
+        # Reset singleton if URL changed (e.g., after .env update)
+        if _supabase_instance is not None and _supabase_url != current_url:
+            logger.info("Supabase URL changed from %s to %s, resetting client", _supabase_url, current_url)
+            _supabase_instance = None
+        
+        # Create new instance if needed
+        if _supabase_instance is None:
+            _supabase_instance = SupabaseClient()
+            _supabase_url = current_url
+        
+        return _supabase_instance
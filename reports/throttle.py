@@ -0,0 +1,82 @@
+"""
+Token-bucket rate limiting for anonymous submissions
+
+Each bucket holds up to `burst` tokens and refills at `rate` tokens per
+second; a submission takes one token and is refused when the bucket is empty.
+Buckets live in the Django cache named by settings.RATE_LIMIT_CACHE_ALIAS
+(per-process memory unless REDIS_URL is set), one shared by everyone plus,
+with RATE_LIMIT_PER_CLIENT, one per client. Clients are identified by a keyed hash of their IP address, so
+no address is ever stored.
+
+Updates are atomic within a process. With a shared cache, two workers can
+occasionally both take the last token; the limits are approximate, not exact.
+"""
+import hmac
+import hashlib
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+
+_lock = threading.Lock()
+
+
+class TokenBucket:
+    def __init__(self, cache, key, burst, rate):
+        self.cache = cache
+        self.key = key
+        self.burst = burst
+        self.rate = rate
+
+    def consume(self, tokens=1):
+        """
+        Take tokens from the bucket.
+        Returns 0 if they were available, else the seconds until they will be.
+        """
+        with _lock:
+            now = time.time()
+            available, updated = self.cache.get(self.key, (self.burst, now))
+            available = min(self.burst, available + (now - updated) * self.rate)
+            if available < tokens:
+                return (tokens - available) / self.rate
+            # Expire once the bucket would have refilled anyway
+            self.cache.set(self.key, (available - tokens, now), timeout=int(self.burst / self.rate) + 1)
+            return 0
+
+
+def client_ip(request):
+    """
+    The client's address, from RATE_LIMIT_IP_HEADER when behind a trusted proxy
+    """
+    header = settings.RATE_LIMIT_IP_HEADER
+    if header and request.META.get(header):
+        # Each proxy appends the address it received from, so only the entries
+        # added by our RATE_LIMIT_TRUSTED_PROXIES can be trusted; anything further
+        # left was sent by the client
+        addresses = [address.strip() for address in request.META[header].split(',')]
+        return addresses[max(0, len(addresses) - settings.RATE_LIMIT_TRUSTED_PROXIES)]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def client_key(request):
+    digest = hmac.new(settings.SECRET_KEY.encode(), client_ip(request).encode(), hashlib.sha256).hexdigest()
+    return f'ratelimit:submit:ip:{digest[:32]}'
+
+
+def check_submission(request):
+    """
+    Take a token from the client's (with RATE_LIMIT_PER_CLIENT) and the global
+    submission buckets.
+    Returns 0 if the submission may proceed, else the seconds to wait.
+    """
+    cache = caches[settings.RATE_LIMIT_CACHE_ALIAS]
+    if settings.RATE_LIMIT_PER_CLIENT:
+        per_client = TokenBucket(cache, client_key(request), settings.SUBMIT_RATE_IP_BURST,
+                                 settings.SUBMIT_RATE_IP_PER_MINUTE / 60)
+        wait = per_client.consume()
+        if wait:
+            return wait
+    # Checked second, so one noisy client cannot drain the shared bucket
+    everyone = TokenBucket(cache, 'ratelimit:submit:global', settings.SUBMIT_RATE_GLOBAL_BURST,
+                           settings.SUBMIT_RATE_GLOBAL_PER_MINUTE / 60)
+    return everyone.consume()
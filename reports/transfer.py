@@ -0,0 +1,235 @@
+"""
+Report import and export in JSON Lines and Parquet
+
+Used by the export_reports and import_reports management commands, which move
+report sets between Supabase and files without going through the web workers.
+Readers and writers stream: only one Parquet row group, or one line, is held
+in memory at a time. JSON Lines files may be gzip or zstd compressed; Parquet
+files compress their column chunks with the same codecs. zstd needs the
+zstandard package and Parquet needs pyarrow, both optional.
+
+Exported rows keep every report column as stored, so a file imports back
+unchanged (see create_reports_bulk(restore=True)).
+"""
+import os
+import io
+import sys
+import gzip
+import json
+import tempfile
+from contextlib import contextmanager
+from datetime import timezone as dt_timezone
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .replica import COLUMNS
+
+JSONL = 'jsonl'
+PARQUET = 'parquet'
+FORMATS = (JSONL, PARQUET)
+
+NONE = 'none'
+GZIP = 'gzip'
+ZSTD = 'zstd'
+COMPRESSIONS = (NONE, GZIP, ZSTD)
+
+TIMESTAMP_COLUMNS = ('created_at', 'updated_at')
+
+_SUFFIXES = {'.gz': GZIP, '.gzip': GZIP, '.zst': ZSTD, '.zstd': ZSTD}
+_MAGIC = {b'\x1f\x8b': GZIP, b'\x28\xb5\x2f\xfd': ZSTD}
+
+GZIP_LEVEL = 6  # level 9 is several times slower for a few percent
+ZSTD_LEVEL = 3
+PARQUET_ROW_GROUP_SIZE = 10000
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError('zstd compression needs the zstandard package (pip install zstandard)') from None
+    return zstandard
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('Parquet files need the pyarrow package (pip install pyarrow)') from None
+    return pyarrow, pyarrow.parquet
+
+
+def detect_format(path):
+    """File format from the file name, ignoring a compression suffix; JSON Lines by default"""
+    root, suffix = os.path.splitext(path.lower())
+    if suffix in _SUFFIXES:
+        suffix = os.path.splitext(root)[1]
+    return PARQUET if suffix == '.parquet' else JSONL
+
+
+def detect_compression(path):
+    """Compression from the file name's suffix"""
+    return _SUFFIXES.get(os.path.splitext(path.lower())[1], NONE)
+
+
+def _timestamp(value):
+    """Parse a Supabase timestamp for Parquet; naive values are UTC"""
+    parsed = parse_datetime(value) if isinstance(value, str) and value else None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    return parsed
+
+
+def changed_at(report):
+    """When a report last changed: updated_at where the table has it, else created_at"""
+    return _timestamp(report.get('updated_at')) or _timestamp(report.get('created_at'))
+
+
+class JsonLinesWriter:
+    """One report per line, with only the report COLUMNS"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, report):
+        row = {column: report.get(column) for column in COLUMNS}
+        self.stream.write(json.dumps(row, ensure_ascii=False, separators=(',', ':')).encode() + b'\n')
+
+
+class ParquetWriter:
+    """Reports in row groups of row_group_size, with timestamps typed"""
+
+    def __init__(self, stream, compression=ZSTD, row_group_size=PARQUET_ROW_GROUP_SIZE):
+        pyarrow, parquet = _pyarrow()
+        self.schema = pyarrow.schema([
+            (column, pyarrow.timestamp('us', tz='UTC') if column in TIMESTAMP_COLUMNS else pyarrow.string())
+            for column in COLUMNS
+        ])
+        self.table = pyarrow.Table
+        self.writer = parquet.ParquetWriter(stream, self.schema, compression=compression)
+        self.row_group_size = row_group_size
+        self.rows = []
+
+    def write(self, report):
+        self.rows.append(report)
+        if len(self.rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self.rows:
+            return
+        columns = {}
+        for column in COLUMNS:
+            values = [row.get(column) for row in self.rows]
+            if column in TIMESTAMP_COLUMNS:
+                values = [_timestamp(value) for value in values]
+            elif column == 'id':
+                values = [str(value) for value in values]
+            columns[column] = values
+        self.writer.write_table(self.table.from_pydict(columns, schema=self.schema))
+        self.rows = []
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+
+def read_jsonl(stream):
+    """Yield the reports of a JSON Lines stream; raises ValueError on a malformed line"""
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            raise ValueError(f'Line {line_number} is not valid JSON') from None
+
+
+def read_parquet(stream, batch_size):
+    """Yield the reports of a Parquet file, reading batch_size rows at a time"""
+    _, parquet = _pyarrow()
+    for batch in parquet.ParquetFile(stream).iter_batches(batch_size=batch_size):
+        for row in batch.to_pylist():
+            for column in TIMESTAMP_COLUMNS:
+                if row.get(column) is not None:
+                    row[column] = row[column].isoformat()
+            yield row
+
+
+@contextmanager
+def open_writer(path, file_format=None, compression=None):
+    """
+    Open a report writer on path, or standard output for '-'. Format and
+    compression default to what the file name suggests; Parquet defaults to zstd.
+    A file is written under a temporary name and only replaces path once complete.
+    """
+    file_format = file_format or detect_format(path)
+    if compression is None:
+        compression = ZSTD if file_format == PARQUET else detect_compression(path)
+    if path == '-' and file_format == PARQUET:
+        raise ValueError('Parquet files cannot be written to standard output')
+
+    if path == '-':
+        raw, temp_path = sys.stdout.buffer, None
+    else:
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.part')
+        raw = os.fdopen(fd, 'wb')
+
+    try:
+        if file_format == PARQUET:
+            writer = ParquetWriter(raw, compression=compression)
+            yield writer
+            writer.close()
+        else:
+            if compression == GZIP:
+                stream = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=GZIP_LEVEL)
+            elif compression == ZSTD:
+                stream = _zstandard().ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=False)
+            else:
+                stream = raw
+            yield JsonLinesWriter(stream)
+            if stream is not raw:
+                stream.close()
+        raw.flush()
+    except BaseException:
+        if temp_path:
+            raw.close()
+            os.unlink(temp_path)
+        raise
+
+    if temp_path:
+        raw.close()
+        os.replace(temp_path, path)
+
+
+@contextmanager
+def open_reader(path, file_format=None, compression=None, batch_size=PARQUET_ROW_GROUP_SIZE):
+    """
+    Open an iterator over the reports in path, or standard input for '-'.
+    The format defaults to what the file name suggests, and JSON Lines
+    compression to what the file starts with.
+    """
+    file_format = file_format or detect_format(path)
+    if path == '-' and file_format == PARQUET:
+        raise ValueError('Parquet files cannot be read from standard input')
+
+    raw = sys.stdin.buffer if path == '-' else open(path, 'rb')
+    try:
+        if file_format == PARQUET:
+            yield read_parquet(raw, batch_size)
+            return
+
+        if compression is None:
+            start = raw.peek(4)
+            compression = next((name for magic, name in _MAGIC.items() if start.startswith(magic)), NONE)
+        if compression == GZIP:
+            stream = gzip.GzipFile(fileobj=raw, mode='rb')
+        elif compression == ZSTD:
+            reader = _zstandard().ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=False)
+            stream = io.BufferedReader(reader)
+        else:
+            stream = raw
+        yield read_jsonl(stream)
+    finally:
+        if raw is not sys.stdin.buffer:
+            raw.close()
@@ -0,0 +1,254 @@
+"""
+Pooled HTTP transport for the Supabase clients
+
+supabase-py gives the table (PostgREST) and storage sub-clients their own
+httpx sessions with default limits, so each opens its own connections to the
+same host. The clients here give both sessions one transport, which owns the
+connection pool. Pool size, keep-alive, HTTP/2 and timeouts come from settings.
+
+The sync transport is shared by the whole process (httpx's pool is
+thread-safe). Async transports are bound to an event loop, so each async
+client gets its own, shared by its sub-clients. Either way requests go
+through the process-wide circuit breaker (circuit.py), get the timeout for
+their kind of operation and are timed per operation for /admin/metrics/.
+"""
+import time
+import threading
+import httpx
+from django.conf import settings
+from core import metrics
+from postgrest import AsyncPostgrestClient, SyncPostgrestClient
+from postgrest.utils import SyncClient as PostgrestSession
+from storage3 import AsyncStorageClient, SyncStorageClient
+from storage3.utils import SyncClient as StorageSession
+from supabase import AsyncClient, Client
+from .circuit import CircuitOpenError, get_breaker, is_failure
+
+
+def http_limits():
+    return httpx.Limits(
+        max_connections=settings.SUPABASE_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.SUPABASE_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY,
+    )
+
+
+def http_timeout():
+    return httpx.Timeout(
+        settings.SUPABASE_READ_TIMEOUT,
+        connect=settings.SUPABASE_CONNECT_TIMEOUT,
+        pool=settings.SUPABASE_POOL_TIMEOUT,
+    )
+
+
+def _transport_options():
+    # retries only covers failures to connect, never a request that was sent
+    return {
+        'http2': settings.SUPABASE_HTTP2,
+        'limits': http_limits(),
+        'retries': settings.SUPABASE_CONNECT_RETRIES,
+    }
+
+
+SUPABASE_DURATION = metrics.histogram(
+    'supabase_request_duration_seconds',
+    'Time until Supabase response headers arrive, by operation',
+    ('operation',),
+)
+SUPABASE_REQUESTS = metrics.counter(
+    'supabase_requests_total',
+    'Supabase requests by operation and outcome (status class, error or rejected by the circuit breaker)',
+    ('operation', 'outcome'),
+)
+
+# Operation -> key of SUPABASE_OPERATION_TIMEOUTS
+OPERATION_TIMEOUTS = {
+    'select': 'select',
+    'rpc': 'select',
+    'insert': 'write',
+    'update': 'write',
+    'delete': 'write',
+    'upload': 'storage',
+    'storage': 'storage',
+}
+
+REST_OPERATIONS = {'GET': 'select', 'HEAD': 'select', 'POST': 'insert', 'PATCH': 'update', 'DELETE': 'delete'}
+
+
+def request_operation(request):
+    """Name the operation a request performs, for timeouts and metrics"""
+    path = request.url.path
+    if '/storage/' in path:
+        return 'upload' if request.method in ('POST', 'PUT', 'PATCH') else 'storage'
+    if '/rest/v1/rpc/' in path:
+        return 'rpc'
+    if '/rest/' in path:
+        return REST_OPERATIONS.get(request.method, 'other')
+    return 'other'
+
+
+def operation_timeout(request, operation):
+    """
+    Timeouts for one request: SUPABASE_OPERATION_TIMEOUTS by kind of operation,
+    applied to reading and writing, with the client's connect and pool timeouts.
+    """
+    kind = OPERATION_TIMEOUTS.get(operation)
+    if kind is None:
+        return request.extensions.get('timeout')
+    seconds = settings.SUPABASE_OPERATION_TIMEOUTS[kind]
+    return {**request.extensions.get('timeout', {}), 'read': seconds, 'write': seconds}
+
+
+class GuardedTransportMixin:
+    """
+    Circuit breaking, per-operation timeouts and metrics around another transport
+    """
+
+    def __init__(self, transport, breaker):
+        self.transport = transport
+        self.breaker = breaker
+
+    def _start(self, request):
+        operation = request_operation(request)
+        try:
+            self.breaker.before_request()
+        except CircuitOpenError:
+            SUPABASE_REQUESTS.inc(operation=operation, outcome='rejected')
+            raise
+        request.extensions['timeout'] = operation_timeout(request, operation)
+        return operation, time.perf_counter()
+
+    def _finish(self, operation, start, response=None):
+        SUPABASE_DURATION.observe(time.perf_counter() - start, operation=operation)
+        if response is None:
+            self.breaker.record(False)
+            SUPABASE_REQUESTS.inc(operation=operation, outcome='error')
+        else:
+            self.breaker.record(not is_failure(response))
+            SUPABASE_REQUESTS.inc(operation=operation, outcome=f'{response.status_code // 100}xx')
+
+
+class CircuitBreakerTransport(GuardedTransportMixin, httpx.BaseTransport):
+    """Sends requests through another transport, guarded by the circuit breaker"""
+
+    def handle_request(self, request):
+        operation, start = self._start(request)
+        try:
+            response = self.transport.handle_request(request)
+        except Exception:
+            self._finish(operation, start)
+            raise
+        self._finish(operation, start, response)
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncCircuitBreakerTransport(GuardedTransportMixin, httpx.AsyncBaseTransport):
+    """Async counterpart of CircuitBreakerTransport"""
+
+    async def handle_async_request(self, request):
+        operation, start = self._start(request)
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception:
+            self._finish(operation, start)
+            raise
+        self._finish(operation, start, response)
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+def get_transport():
+    """
+    Get or create the process-wide transport shared by every sync Supabase session.
+    """
+    global _transport
+
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = CircuitBreakerTransport(httpx.HTTPTransport(**_transport_options()), get_breaker())
+    return _transport
+
+
+def _session_options(transport, base_url, headers):
+    return {
+        'base_url': base_url,
+        'headers': headers,
+        'timeout': http_timeout(),
+        'transport': transport,
+        'follow_redirects': True,
+    }
+
+
+class PooledPostgrestClient(SyncPostgrestClient):
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+        return PostgrestSession(**_session_options(get_transport(), base_url, headers))
+
+
+class PooledStorageClient(SyncStorageClient):
+    def _create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+        return StorageSession(**_session_options(get_transport(), base_url, headers))
+
+
+class PooledClient(Client):
+    """supabase Client whose table and storage sub-clients share get_transport()"""
+
+    def _init_postgrest_client(self, rest_url, headers, schema, timeout=None, verify=True, proxy=None):
+        return PooledPostgrestClient(rest_url, headers=headers, schema=schema)
+
+    def _init_storage_client(self, storage_url, headers, storage_client_timeout=None,
+                             verify=True, proxy=None):
+        return PooledStorageClient(storage_url, headers)
+
+
+class AsyncPooledPostgrestClient(AsyncPostgrestClient):
+    def __init__(self, base_url, transport, **kwargs):
+        self._transport = transport
+        super().__init__(base_url, **kwargs)
+
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+        return httpx.AsyncClient(**_session_options(self._transport, base_url, headers))
+
+
+class AsyncPooledStorageClient(AsyncStorageClient):
+    def __init__(self, url, headers, transport):
+        self._transport = transport
+        super().__init__(url, headers)
+
+    def _create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+        return httpx.AsyncClient(**_session_options(self._transport, base_url, headers))
+
+
+class AsyncPooledClient(AsyncClient):
+    """supabase AsyncClient whose table and storage sub-clients share one transport"""
+
+    def __init__(self, *args, **kwargs):
+        self.transport = AsyncCircuitBreakerTransport(
+            httpx.AsyncHTTPTransport(**_transport_options()), get_breaker()
+        )
+        super().__init__(*args, **kwargs)
+
+    def _init_postgrest_client(self, rest_url, headers, schema, timeout=None, verify=True, proxy=None):
+        return AsyncPooledPostgrestClient(rest_url, self.transport, headers=headers, schema=schema)
+
+    def _init_storage_client(self, storage_url, headers, storage_client_timeout=None,
+                             verify=True, proxy=None):
+        return AsyncPooledStorageClient(storage_url, headers, self.transport)
+
+
+def create_client(supabase_url, supabase_key):
+    """Drop-in for supabase.create_client() using the pooled transport"""
+    return PooledClient.create(supabase_url=supabase_url, supabase_key=supabase_key)
+
+
+async def acreate_client(supabase_url, supabase_key):
+    """Drop-in for supabase.acreate_client() using a pooled transport"""
+    return await AsyncPooledClient.create(supabase_url=supabase_url, supabase_key=supabase_key)
@@ -0,0 +1,247 @@
+"""
+Streaming uploads to Supabase Storage
+
+storage3's upload() needs the whole file as bytes (or a path), so uploads are
+sent directly over the storage client's HTTP session instead:
+
+- files below RESUMABLE_UPLOAD_THRESHOLD are streamed as the raw request body;
+- larger files use the resumable (TUS) endpoint in TUS_CHUNK_SIZE pieces,
+  resuming from the server's offset when a piece fails.
+
+Either way only STREAM_CHUNK_SIZE bytes of the file are held in memory.
+
+Objects are named by an HMAC-SHA256 of the uploaded file keyed with
+settings.IMAGE_HASH_KEY (content-addressed), so identical images are stored
+once, while a plain hash of a photo does not reveal whether it was reported.
+The hash is computed by the upload handlers below while Django receives the
+file; content_digest() falls back to reading the file for anything else. Uploading a name that already exists raises
+ObjectExists, which callers treat as success.
+"""
+import base64
+import hashlib
+import hmac
+import logging
+from django.conf import settings
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 64 * 1024
+# Supabase requires 6 MB pieces for resumable uploads and recommends them above that size
+TUS_CHUNK_SIZE = 6 * 1024 * 1024
+RESUMABLE_UPLOAD_THRESHOLD = 6 * 1024 * 1024
+TUS_MAX_RETRIES = 3
+CACHE_CONTROL = '3600'
+
+
+class UploadError(Exception):
+    """Raised when Supabase Storage rejects an upload"""
+
+
+class ObjectExists(UploadError):
+    """Raised when the object being uploaded is already stored"""
+
+
+def content_hasher():
+    """A keyed hash object for file contents, see content_digest()"""
+    return hmac.new(settings.IMAGE_HASH_KEY.encode(), digestmod=hashlib.sha256)
+
+
+class HashingUploadHandlerMixin:
+    """Compute the content digest of an uploaded file as its chunks arrive"""
+
+    def new_file(self, *args, **kwargs):
+        # Set first: MemoryFileUploadHandler.new_file raises StopFutureHandlers
+        self.hasher = content_hasher()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        # A memory handler passes files too large for it on to the next handler
+        if getattr(self, 'activated', True):
+            self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file_obj = super().file_complete(file_size)
+        if file_obj is not None:
+            file_obj.content_digest = self.hasher.hexdigest()
+        return file_obj
+
+
+class HashingMemoryFileUploadHandler(HashingUploadHandlerMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadHandlerMixin, TemporaryFileUploadHandler):
+    pass
+
+
+def file_size(file_obj):
+    """Size in bytes of an uploaded file or file-like object"""
+    size = getattr(file_obj, 'size', None)
+    if size is None:
+        position = file_obj.tell()
+        size = file_obj.seek(0, 2) - position
+        file_obj.seek(position)
+    return size
+
+
+def content_digest(file_obj):
+    """
+    HMAC-SHA256 hex digest of a file's contents, keyed with IMAGE_HASH_KEY: the
+    one computed on arrival when there is one, else read from the file in chunks.
+    """
+    digest = getattr(file_obj, 'content_digest', None)
+    if digest is None:
+        hasher = content_hasher()
+        for data in iter_chunks(file_obj):
+            hasher.update(data)
+        file_obj.seek(0)
+        digest = file_obj.content_digest = hasher.hexdigest()
+    return digest
+
+
+def iter_chunks(file_obj, offset=0, length=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield the file's bytes from offset, at most length bytes in total,
+    chunk_size bytes at a time.
+    """
+    file_obj.seek(offset)
+    remaining = length
+    while remaining is None or remaining > 0:
+        data = file_obj.read(chunk_size if remaining is None else min(chunk_size, remaining))
+        if not data:
+            break
+        if remaining is not None:
+            remaining -= len(data)
+        yield data
+
+
+async def aiter_chunks(file_obj, offset=0, length=None, chunk_size=STREAM_CHUNK_SIZE):
+    """Async iterator over iter_chunks() for httpx.AsyncClient request bodies"""
+    for data in iter_chunks(file_obj, offset, length, chunk_size):
+        yield data
+
+
+def _check(response, action):
+    # Older Storage versions answer 400 with {"statusCode": "409", "error": "Duplicate"}
+    if response.status_code == 409 or (response.status_code == 400 and 'Duplicate' in response.text):
+        raise ObjectExists(f"{action} skipped: object already exists")
+    if response.is_error:
+        raise UploadError(f"{action} failed with HTTP {response.status_code}: {response.text[:200]}")
+    return response
+
+
+def _stream_request(bucket, path, size, content_type):
+    return f"object/{bucket}/{path}", {
+        'content-type': content_type or 'application/octet-stream',
+        'content-length': str(size),
+        'cache-control': f'max-age={CACHE_CONTROL}',
+        'x-upsert': 'false',
+    }
+
+
+def _tus_create_headers(bucket, path, size, content_type):
+    def encode(value):
+        return base64.b64encode(value.encode()).decode()
+
+    metadata = {
+        'bucketName': bucket,
+        'objectName': path,
+        'contentType': content_type or 'application/octet-stream',
+        'cacheControl': CACHE_CONTROL,
+    }
+    return {
+        'tus-resumable': '1.0.0',
+        'upload-length': str(size),
+        'upload-metadata': ','.join(f'{key} {encode(value)}' for key, value in metadata.items()),
+        'x-upsert': 'false',
+    }
+
+
+def _tus_patch_headers(offset, length):
+    return {
+        'tus-resumable': '1.0.0',
+        'upload-offset': str(offset),
+        'content-type': 'application/offset+octet-stream',
+        'content-length': str(length),
+    }
+
+
+def upload_stream(session, bucket, path, file_obj, content_type=None):
+    """
+    Upload file_obj to bucket/path, choosing a single streamed request or a
+    resumable upload by size. session is the storage client's httpx.Client.
+    """
+    size = file_size(file_obj)
+    if size < RESUMABLE_UPLOAD_THRESHOLD:
+        url, headers = _stream_request(bucket, path, size, content_type)
+        _check(session.post(url, content=iter_chunks(file_obj), headers=headers), 'Upload')
+        return
+
+    logger.info("Starting resumable upload of %s (%s bytes)", path, size)
+    response = _check(
+        session.post('upload/resumable', headers=_tus_create_headers(bucket, path, size, content_type)),
+        'Resumable upload creation',
+    )
+    location = response.headers['location']
+
+    offset = 0
+    retries = 0
+    while offset < size:
+        length = min(TUS_CHUNK_SIZE, size - offset)
+        try:
+            response = _check(
+                session.patch(location, content=iter_chunks(file_obj, offset, length),
+                              headers=_tus_patch_headers(offset, length)),
+                'Resumable upload',
+            )
+            offset = int(response.headers.get('upload-offset', offset + length))
+        except Exception as e:
+            retries += 1
+            if retries > TUS_MAX_RETRIES:
+                raise
+            # Ask the server how much it kept and continue from there
+            logger.warning("Resumable upload of %s interrupted at %s bytes: %s", path, offset, e)
+            head = _check(session.head(location, headers={'tus-resumable': '1.0.0'}), 'Resumable upload status')
+            offset = int(head.headers['upload-offset'])
+
+
+async def aupload_stream(session, bucket, path, file_obj, content_type=None):
+    """
+    Async counterpart of upload_stream(); session is an httpx.AsyncClient.
+    """
+    size = file_size(file_obj)
+    if size < RESUMABLE_UPLOAD_THRESHOLD:
+        url, headers = _stream_request(bucket, path, size, content_type)
+        _check(await session.post(url, content=aiter_chunks(file_obj), headers=headers), 'Upload')
+        return
+
+    logger.info("Starting resumable upload of %s (%s bytes)", path, size)
+    response = _check(
+        await session.post('upload/resumable', headers=_tus_create_headers(bucket, path, size, content_type)),
+        'Resumable upload creation',
+    )
+    location = response.headers['location']
+
+    offset = 0
+    retries = 0
+    while offset < size:
+        length = min(TUS_CHUNK_SIZE, size - offset)
+        try:
+            response = _check(
+                await session.patch(location, content=aiter_chunks(file_obj, offset, length),
+                                    headers=_tus_patch_headers(offset, length)),
+                'Resumable upload',
+            )
+            offset = int(response.headers.get('upload-offset', offset + length))
+        except Exception as e:
+            retries += 1
+            if retries > TUS_MAX_RETRIES:
+                raise
+            logger.warning("Resumable upload of %s interrupted at %s bytes: %s", path, offset, e)
+            head = _check(
+                await session.head(location, headers={'tus-resumable': '1.0.0'}),
+                'Resumable upload status',
+            )
+            offset = int(head.headers['upload-offset'])
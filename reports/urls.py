@@ -2,10 +2,14 @@
 URLs for reports app
 """
 
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import views, async_views
 
 urlpatterns = [
-    path('submit/', views.submit_report, name='submit_report'),
+    path('submit/', async_views.submit_report if settings.ASYNC_VIEWS else views.submit_report,
+         name='submit_report'),
     path('submitted/', views.report_submitted, name='report_submitted'),
+    path('api/bulk/', async_views.bulk_ingest if settings.ASYNC_VIEWS else views.bulk_ingest,
+         name='bulk_ingest'),
 ]
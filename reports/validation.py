@@ -0,0 +1,129 @@
+"""
+Upload validation by header sniffing
+
+Image uploads are identified from their magic bytes, never from the
+client-supplied name or Content-Type, and their dimensions are read from the
+format headers: a few dozen bytes for PNG, GIF and WebP, and the segment
+headers up to the frame header for JPEG (segments are skipped, not read).
+Nothing is decoded, so validation costs the same for any file size; an image
+whose pixel count exceeds IMAGE_MAX_PIXELS is refused before Pillow ever
+decompresses it in process_image().
+"""
+import struct
+from collections import namedtuple
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+ImageInfo = namedtuple('ImageInfo', ['format', 'content_type', 'width', 'height'])
+
+CONTENT_TYPES = {
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+}
+
+HEADER_SIZE = 32  # bytes needed to identify any format and size all but JPEG
+
+# JPEG markers starting a frame; their header holds the dimensions
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# Markers without a length field
+_JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xD9)) | {0x01}
+_JPEG_MAX_SEGMENTS = 256
+
+
+def _jpeg_size(file_obj):
+    file_obj.seek(2)
+    for _ in range(_JPEG_MAX_SEGMENTS):
+        byte = file_obj.read(1)
+        if byte != b'\xff':
+            return None
+        marker = file_obj.read(1)
+        while marker == b'\xff':  # fill bytes
+            marker = file_obj.read(1)
+        if not marker:
+            return None
+        marker = marker[0]
+        if marker in _JPEG_STANDALONE_MARKERS:
+            continue
+        if marker == 0xDA:  # start of scan: image data began without a frame header
+            return None
+        length_bytes = file_obj.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        if length < 2:
+            return None
+        if marker in _JPEG_SOF_MARKERS:
+            header = file_obj.read(5)
+            if len(header) < 5:
+                return None
+            height, width = struct.unpack('>xHH', header)
+            return width, height
+        file_obj.seek(length - 2, 1)
+    return None
+
+
+def _webp_size(header):
+    chunk = header[12:16]
+    if chunk == b'VP8 ' and header[23:26] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and header[20] == 0x2F:
+        bits = struct.unpack('<I', header[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X':
+        width = int.from_bytes(header[24:27], 'little') + 1
+        height = int.from_bytes(header[27:30], 'little') + 1
+        return width, height
+    return None
+
+
+def sniff_image(file_obj):
+    """
+    Identify a JPEG, PNG, GIF or WebP image and read its dimensions.
+    Returns an ImageInfo, or None if the file is not one of those formats or
+    its header is malformed. Leaves the file positioned at the start.
+    """
+    try:
+        file_obj.seek(0)
+        header = file_obj.read(HEADER_SIZE)
+        size = None
+        if header.startswith(b'\xff\xd8'):
+            image_format = 'jpeg'
+            size = _jpeg_size(file_obj)
+        elif header.startswith(b'\x89PNG\r\n\x1a\n') and header[12:16] == b'IHDR':
+            image_format = 'png'
+            size = struct.unpack('>II', header[16:24])
+        elif header[:6] in (b'GIF87a', b'GIF89a') and len(header) >= 10:
+            image_format = 'gif'
+            size = struct.unpack('<HH', header[6:10])
+        elif header[:4] == b'RIFF' and header[8:12] == b'WEBP' and len(header) >= 30:
+            image_format = 'webp'
+            size = _webp_size(header)
+        else:
+            return None
+    except (OSError, struct.error):
+        return None
+    finally:
+        file_obj.seek(0)
+
+    if not size or not all(size):
+        return None
+    return ImageInfo(image_format, CONTENT_TYPES[image_format], *size)
+
+
+def validate_image(file_obj):
+    """
+    Validate an uploaded image by size, sniffed format and pixel count.
+    Returns its ImageInfo; raises ValidationError otherwise.
+    """
+    if file_obj.size > settings.IMAGE_MAX_UPLOAD_SIZE:
+        raise ValidationError(f'Image file size must be under {settings.IMAGE_MAX_UPLOAD_SIZE // 1048576}MB')
+
+    info = sniff_image(file_obj)
+    if info is None:
+        raise ValidationError('Only JPEG, PNG, GIF, and WebP images are allowed')
+    if info.width * info.height > settings.IMAGE_MAX_PIXELS:
+        raise ValidationError('Image dimensions are too large')
+    return info
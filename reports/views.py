@@ -2,14 +2,45 @@
 Views for reports app - Anonymous report submission
 """
 
+import json
+import math
 import logging
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect
 from django.views.decorators.http import require_http_methods
+from core.decorators import api_token_required
+from .circuit import get_breaker
 from .forms import ReportForm
+from .images import ImageProcessingError
+from .outbox import enqueue_report
 from .supabase_client import get_supabase_client
 
 logger = logging.getLogger(__name__)
 
+def add_submission_error(form, error):
+    """
+    Log a failed submission and add a user-facing message to the form
+    """
+    if isinstance(error, ImageProcessingError):
+        logger.warning("Rejected unprocessable image: %s", error)
+        form.add_error('image', 'This image could not be processed. Please try a different file.')
+        return
+    
+    if isinstance(error, ValueError):
+        # Configuration error (missing credentials)
+        logger.error("Configuration error: %s", error)
+        form.add_error(None, 'The reporting system is not configured. Please contact the administrator.')
+        return
+    
+    # Other errors (connection, table not found, etc.)
+    logger.error("Report submission error: %s", error, exc_info=True)
+    error_msg = str(error)
+    if 'Could not find the table' in error_msg or 'PGRST205' in error_msg:
+        form.add_error(None, 'The reporting system database is not set up. Please contact the administrator.')
+    else:
+        form.add_error(None, 'An error occurred while submitting your report. Please try again later.')
+
 @require_http_methods(["GET", "POST"])
 def submit_report(request):
     """
@@ -19,46 +50,31 @@ def submit_report(request):
         form = ReportForm(request.POST, request.FILES)
         
         if form.is_valid():
+            fields = form.report_fields()
+            image_file = request.FILES.get('image')
+            
             try:
-                supabase = get_supabase_client()
-                
-                # Upload image if provided
-                image_url = None
-                if 'image' in request.FILES:
-                    image_file = request.FILES['image']
-                    image_url = supabase.upload_file(image_file)
-                
-                # Create report in database
-                description = form.cleaned_data['description']
-                category = form.cleaned_data.get('category') or None
-                location = form.cleaned_data.get('location') or None
-                username = form.cleaned_data.get('username') or None
+                # Acknowledge immediately; drain_outbox delivers it to Supabase.
+                # Direct submissions also go to the outbox while Supabase is failing.
+                if settings.REPORT_OUTBOX_ENABLED or get_breaker().is_open():
+                    enqueue_report(image=image_file, **fields)
+                    return redirect('report_submitted')
                 
-                report = supabase.create_report(
-                    description=description,
-                    category=category,
-                    location=location,
-                    image_url=image_url,
-                    username=username
-                )
+                # Upload the image and insert the report concurrently
+                supabase = get_supabase_client()
+                report = supabase.submit_report(image_file=image_file, **fields)
                 
                 if report:
                     return redirect('report_submitted')
+                elif get_breaker().is_open():
+                    # Supabase went down during the submission; keep the report locally
+                    enqueue_report(image=image_file, **fields)
+                    return redirect('report_submitted')
                 else:
                     form.add_error(None, 'Failed to submit report. Please try again.')
             
-            except ValueError as e:
-                # Configuration error (missing credentials)
-                logger.error(f"Configuration error: {e}")
-                form.add_error(None, 'The reporting system is not configured. Please contact the administrator.')
             except Exception as e:
-                # Other errors (connection, table not found, etc.)
-                logger.error(f"Report submission error: {e}", exc_info=True)
-                error_msg = str(e)
-                if 'Could not find the table' in error_msg or 'PGRST205' in error_msg:
-                    form.add_error(None, 'The reporting system database is not set up. Please contact the administrator.')
-                else:
-                    form.add_error(None, 'An error occurred while submitting your report. Please try again later.')
+                add_submission_error(form, e)
     else:
         form = ReportForm()
     
@@ -73,3 +89,64 @@ def report_submitted(request):
     Show confirmation page after successful submission
     """
     return render(request, 'report_submitted.html')
+
+
+def read_bulk_reports(request):
+    """
+    Read the reports from a bulk ingestion request: a JSON array of report
+    objects, or an object with the array under "reports".
+    Returns (reports, None), or (None, an error response).
+    """
+    max_length = settings.INGEST_MAX_CONTENT_LENGTH
+    try:
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        content_length = 0
+    # Read the stream directly: request.body is capped at DATA_UPLOAD_MAX_MEMORY_SIZE
+    body = request.read(max_length + 1) if content_length <= max_length else b''
+    if content_length > max_length or len(body) > max_length:
+        return None, HttpResponse(f'Request body must be under {max_length // 1048576}MB', status=413)
+    
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return None, HttpResponse('Request body must be JSON', status=400)
+    
+    reports = payload.get('reports') if isinstance(payload, dict) else payload
+    if not isinstance(reports, list):
+        return None, HttpResponse('Expected a JSON array of reports', status=400)
+    if len(reports) > settings.INGEST_MAX_REPORTS:
+        return None, HttpResponse(f'At most {settings.INGEST_MAX_REPORTS} reports per request', status=413)
+    return reports, None
+
+def ingest_unavailable(error=None):
+    """
+    Response telling an ingestion client to retry later
+    """
+    if error:
+        logger.error("Configuration error: %s", error)
+    response = HttpResponse('The reporting system is unavailable. Please retry later.', status=503)
+    response.headers['Retry-After'] = str(math.ceil(settings.CIRCUIT_RESET_TIMEOUT))
+    return response
+
+@api_token_required
+@require_http_methods(["POST"])
+def bulk_ingest(request):
+    """
+    Create many reports from JSON, for partner systems and migrations.
+    Responds with the created/invalid/failed counts and a result per report.
+    """
+    reports, error = read_bulk_reports(request)
+    if error:
+        return error
+    if get_breaker().is_open():
+        return ingest_unavailable()
+    
+    try:
+        supabase = get_supabase_client()
+    except ValueError as e:
+        return ingest_unavailable(e)
+    
+    result = supabase.create_reports_bulk(reports)
+    logger.info("Bulk ingestion of %s reports: %s created", len(reports), result['created'])
+    return JsonResponse(result)